@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+NovaClaw AI - End-to-End Benchmark
+==================================
+Runs the content loop, the blog generator and both together in one
+process (run_agents.py, as in production) against local stand-ins
+(see stand_ins.py) instead of the live feeds, Claude and Supabase:
+- FeedStandIn serves every configured feed with generated entries
+- AnthropicStandIn answers with configurable latency, output token rate
+  and injected errors
+- PostgrestStandIn takes the database writes in memory
+
+Each run is traced (see tracing.py). The report holds wall time,
+latency percentiles per span (stage.*, claude.*, db.*, feed.fetch),
+Claude latency per pipeline stage and request counts per run, and is
+written as JSON so runs can be compared:
+
+    python agents/benchmark.py --runs 5 --claude-latency 0.4 --token-rate 80
+    python agents/benchmark.py --runs 5 --baseline agents/.cache/bench/<earlier>.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import importlib
+import contextlib
+import shutil
+import tempfile
+import numpy as np
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Any
+
+from stand_ins import AnthropicStandIn, PostgrestStandIn, FeedStandIn
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "bench")
+
+# Agent module → the feed list it scrapes
+AGENT_FEEDS = {
+    "content_loop": "RSS_FEEDS",
+    "blog_generator": "AI_RSS_FEEDS",
+}
+
+AGENTS = {
+    # benchmark target → (module, run function, agent modules whose runs it traces)
+    "content_loop": ("content_loop", "run_content_loop", ("content_loop",)),
+    "blog_generator": ("blog_generator", "run_blog_generator", ("blog_generator",)),
+    "run_agents": ("run_agents", "run_agents", ("blog_generator", "content_loop")),
+}
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    stats = {"count": len(values)}
+    for p in PERCENTILES:
+        stats[f"p{p}"] = round(float(np.percentile(values, p)), 1)
+    stats["max"] = round(max(values), 1)
+    stats["mean"] = round(sum(values) / len(values), 1)
+    return stats
+
+
+# ============================================
+# TRACE ANALYSIS
+# ============================================
+
+def span_durations(trace_file: str) -> List[Dict[str, Any]]:
+    """(name, stage, duration_ms) of every span in a JSONL trace."""
+    spans = []
+    if not os.path.exists(trace_file):
+        return spans
+    with open(trace_file, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            s = json.loads(line)
+            attributes = {a["key"]: next(iter(a["value"].values())) for a in s["attributes"]}
+            spans.append({
+                "name": s["name"],
+                "stage": attributes.get("stage"),
+                "ms": (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6,
+                "failed": s["status"]["code"] == "STATUS_CODE_ERROR",
+            })
+    return spans
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    by_name: Dict[str, List[float]] = {}
+    by_stage: Dict[str, List[float]] = {}
+    failed_spans: Counter = Counter()
+    requests: Counter = Counter()
+    for run in runs:
+        requests.update(run["requests"])
+        for s in run["spans"]:
+            by_name.setdefault(s["name"], []).append(s["ms"])
+            if s["name"].startswith("claude.") and s["stage"]:
+                by_stage.setdefault(s["stage"], []).append(s["ms"])
+            if s["failed"]:
+                failed_spans[s["name"]] += 1
+    count = max(1, len(runs))
+    return {
+        "runs": len(runs),
+        "failed_runs": sum(1 for run in runs if run["error"]),
+        "errors": [run["error"] for run in runs if run["error"]],
+        "wall_ms": percentiles([run["wall_ms"] for run in runs]),
+        "spans": {name: percentiles(values) for name, values in sorted(by_name.items())},
+        "claude_by_stage": {stage: percentiles(values) for stage, values in sorted(by_stage.items())},
+        "failed_spans": dict(failed_spans),
+        "requests_per_run": {key: round(value / count, 1) for key, value in sorted(requests.items())},
+    }
+
+
+# ============================================
+# RUNNER
+# ============================================
+
+class Bench:
+    """Stand-ins plus the agent modules, imported once they point at them."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.feeds = FeedStandIn(items=args.feed_items, item_bytes=args.item_bytes,
+                                 latency_s=args.feed_latency)
+        self.anthropic = AnthropicStandIn(latency_s=args.claude_latency, tokens_per_s=args.token_rate,
+                                          error_rate=args.error_rate, error_status=args.error_status,
+                                          seed=args.seed)
+        self.postgrest = PostgrestStandIn(latency_s=args.db_latency)
+        self.modules: Dict[str, Any] = {}
+        self.trace_dir = tempfile.mkdtemp(prefix="novaclaw-bench-")
+
+    async def __aenter__(self) -> "Bench":
+        await self.feeds.start()
+        await self.anthropic.start()
+        await self.postgrest.start()
+        os.environ.update({
+            "ANTHROPIC_API_KEY": "stand-in",
+            "ANTHROPIC_API_URL": self.anthropic.messages_url,
+            "SUPABASE_URL": self.postgrest.base_url,
+            "SUPABASE_SERVICE_KEY": "stand-in",
+            "POLLINATIONS_URL": self.feeds.base_url,
+            "DRY_RUN": "false",
+            # Every run starts cold: no response or feed cache
+            "CLAUDE_CACHE": "false",
+            "FEED_CACHE": "false",
+        })
+        # All stand-in feeds share one host; don't let the per-host cap serialize them
+        os.environ.setdefault("FEED_PER_HOST_LIMIT", "16")
+        for module_name, feed_list in AGENT_FEEDS.items():
+            feeds = getattr(importlib.import_module(module_name), feed_list)
+            feeds[:] = [{**feed, "url": self.feeds.feed_url(feed["source"])} for feed in feeds]
+        for agent, (module_name, _, traced) in AGENTS.items():
+            self.modules[agent] = importlib.import_module(module_name)
+            for name in traced:
+                self.modules.setdefault(name, importlib.import_module(name))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.postgrest.stop()
+        await self.anthropic.stop()
+        await self.feeds.stop()
+        shutil.rmtree(self.trace_dir, ignore_errors=True)
+
+    def _request_counts(self) -> Counter:
+        counts: Counter = Counter()
+        for service, server in (("feeds", self.feeds), ("anthropic", self.anthropic),
+                                ("postgrest", self.postgrest)):
+            for key, value in server.requests.items():
+                counts[f"{service}.{key}"] += value
+        return counts
+
+    async def run_once(self, agent: str, index: int) -> Dict[str, Any]:
+        module = self.modules[agent]
+        _, function, traced = AGENTS[agent]
+        trace_files = [os.path.join(self.trace_dir, f"{agent}-{index}-{name}.jsonl") for name in traced]
+        for name, trace_file in zip(traced, trace_files):
+            self.modules[name].TRACE_FILE = trace_file
+        self.postgrest.tables.clear()  # Same starting state (no slugs or trend history) every run
+
+        before = self._request_counts()
+        output = io.StringIO()
+        error = None
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(sys.stdout if self.args.verbose else output):
+                failed = await getattr(module, function)()
+            if isinstance(failed, int) and failed:
+                error = f"{failed} agent(s) failed"  # run_agents() reports instead of raising
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        wall_ms = (time.perf_counter() - start) * 1000
+        requests = self._request_counts() - before
+        spans = [s for trace_file in trace_files for s in span_durations(trace_file)]
+        return {"wall_ms": wall_ms, "error": error, "spans": spans, "requests": dict(requests)}
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("output", "baseline", "verbose", "max_regression")},
+        "agents": {},
+    }
+    async with Bench(args) as bench:
+        for agent in args.agents:
+            runs = []
+            for index in range(args.warmup + args.runs):
+                run = await bench.run_once(agent, index)
+                if index >= args.warmup:
+                    runs.append(run)
+                status = f"failed ({run['error']})" if run["error"] else "ok"
+                label = "warmup" if index < args.warmup else f"run {index - args.warmup + 1}"
+                print(f"  {agent} {label}: {run['wall_ms']:.0f}ms {status}")
+            report["agents"][agent] = summarize(runs)
+    return report
+
+
+# ============================================
+# REPORTING
+# ============================================
+
+def print_report(report: Dict[str, Any]):
+    for agent, result in report["agents"].items():
+        wall = result["wall_ms"]
+        print(f"\n{agent}: {result['runs']} runs, {result['failed_runs']} failed, "
+              f"wall p50 {wall.get('p50')}ms p90 {wall.get('p90')}ms max {wall.get('max')}ms")
+        for name, stats in result["spans"].items():
+            if name.startswith(("run.", "stage.")):
+                print(f"  {name:<24} p50 {stats['p50']:>8}ms  p90 {stats['p90']:>8}ms  "
+                      f"max {stats['max']:>8}ms")
+        for stage, stats in result["claude_by_stage"].items():
+            print(f"  claude[{stage}]{'':<{max(0, 16 - len(stage))}} p50 {stats['p50']:>8}ms  "
+                  f"p90 {stats['p90']:>8}ms  n={stats['count']}")
+        requests = ", ".join(f"{key} {value:g}" for key, value in result["requests_per_run"].items())
+        print(f"  requests/run: {requests}")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, float]:
+    """Relative change of wall and stage p50s against a baseline report (+0.10 = 10% slower)."""
+    changes = {}
+    for agent, result in report["agents"].items():
+        previous = baseline.get("agents", {}).get(agent)
+        if not previous:
+            continue
+        pairs = [(f"{agent}.wall", result["wall_ms"], previous["wall_ms"])]
+        pairs += [(f"{agent}.{name}", stats, previous["spans"].get(name, {}))
+                  for name, stats in result["spans"].items() if name.startswith("stage.")]
+        for key, now, before in pairs:
+            if now.get("p50") and before.get("p50"):
+                changes[key] = round(now["p50"] / before["p50"] - 1, 3)
+    return changes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the agents against local stand-ins")
+    parser.add_argument("--agents", nargs="+", choices=list(AGENTS), default=list(AGENTS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="runs discarded before measuring")
+    parser.add_argument("--feed-items", type=int, default=20, help="entries per feed")
+    parser.add_argument("--item-bytes", type=int, default=400, help="description size per entry")
+    parser.add_argument("--feed-latency", type=float, default=0.05, help="seconds per feed request")
+    parser.add_argument("--claude-latency", type=float, default=0.3, help="seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=100.0, help="output tokens/s (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of Claude calls that fail")
+    parser.add_argument("--error-status", type=int, default=529)
+    parser.add_argument("--db-latency", type=float, default=0.02, help="seconds per PostgREST request")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="report path (default: agents/.cache/bench/<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier report to compare stage and wall p50s with")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="exit 1 if a p50 is this much slower than the baseline (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="show the agents' own output")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+
+    regressions: List[str] = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["baseline"] = {"path": args.baseline, "changes": compare(report, json.load(f))}
+        print("\nAgainst baseline (p50):")
+        for key, change in report["baseline"]["changes"].items():
+            flag = ""
+            if args.max_regression is not None and change > args.max_regression:
+                regressions.append(key)
+                flag = "  [regression]"
+            print(f"  {key:<36} {change:+.1%}{flag}")
+
+    output = args.output or os.path.join(
+        BENCH_DIR, f"bench-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {output}")
+    if regressions:
+        sys.exit(1)
@@ -10,17 +10,33 @@ Runs daily via GitHub Actions to:
 5. Save to Supabase content_calendar
 """
 
+from __future__ import annotations
+
 import os
-import json
 import re
 import time
 import asyncio
-import aiohttp
-import feedparser
+import argparse
 from datetime import datetime
-from typing import Optional, Dict, List, Any
-from dataclasses import dataclass, asdict
-from supabase import create_client, Client
+from typing import Optional, Dict, List, Set, Any, Tuple
+from dataclasses import dataclass, replace
+
+from feeds import fetch_feeds, FeedResult
+from claude_client import ClaudeClient, ClaudeResult, CLAUDE_BATCH_MODE
+from topics import TOPICS, pick_topic
+from ranker import prerank, fetch_history
+from database import Database, DatabaseError
+from trend_store import upsert_trends
+from log_sink import LogSink
+from runtime import Runtime, open_runtime
+from tracing import Tracer, TRACE_FILE, default_trace_file, span
+from scoring import score_by_id, trend_ids, scoring_max_tokens
+from structured import (SCORES, BLOG_ARTICLE, CRITIC, FACT_CHECK, CriticVerdict,
+                        FactCheckVerdict, parse_output, parse_summary, start_parse_stats)
+from pipeline import Stage, StagePipeline, stage_workers, GENERATION_CONCURRENCY
+from startup import lazy_import, mark_main, print_startup_report
+
+aiohttp = lazy_import("aiohttp")  # Loaded on first use
 
 # ============================================
 # CONFIGURATION
@@ -31,6 +47,10 @@ SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
 DRY_RUN = os.environ.get("DRY_RUN", "false").lower() == "true"
 
+# Slug collisions get -2, -3, ... suffixes; inserts retry if another run wins the race
+SLUG_CANDIDATES = 20
+SLUG_SAVE_ATTEMPTS = 3
+
 # AI-focused RSS feeds for trend scraping
 AI_RSS_FEEDS = [
     {"url": "https://hnrss.org/frontpage", "source": "hackernews", "category": "tech"},
@@ -41,10 +61,23 @@ AI_RSS_FEEDS = [
     {"url": "https://www.theverge.com/rss/ai-artificial-intelligence/index.xml", "source": "theverge", "category": "AI"},
     {"url": "https://feeds.arstechnica.com/arstechnica/features", "source": "arstechnica", "category": "tech"},
 ]
+FEED_HEADERS = {"User-Agent": "NovaClaw-BlogAgent/1.0"}
 
 # Claude model for content generation
 CLAUDE_MODEL = "claude-haiku-4-5-20251001"
 
+# Full articles take much longer than scoring/review calls
+GENERATION_TIMEOUT_S = float(os.environ.get("GENERATION_TIMEOUT_S", "180"))
+
+# Scoring/review responses are always cacheable; generation only when opted in
+CACHE_GENERATION = os.environ.get("CLAUDE_CACHE_GENERATION", "false").lower() == "true"
+
+# Stream articles and stop early when a guard trips (wrong language, no JSON,
+# far over the 1000-1500 word target)
+STREAM_GENERATION = os.environ.get("BLOG_STREAM", "true").lower() == "true"
+ARTICLE_MAX_WORDS = int(os.environ.get("ARTICLE_MAX_WORDS", "1500"))
+ARTICLE_ABORT_FACTOR = float(os.environ.get("ARTICLE_ABORT_FACTOR", "1.6"))
+
 # NovaClaw context for article generation
 NOVACLAW_CONTEXT = """
 NovaClaw is een Nederlands AI agency dat custom AI agents bouwt voor bedrijven.
@@ -123,30 +156,6 @@ PRODUCT_TOPICS = [
 ]
 
 
-def extract_json(text: str) -> Any:
-    """Extract JSON from Claude response, handling markdown code blocks."""
-    text = text.strip()
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-    match = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(1).strip())
-        except json.JSONDecodeError:
-            pass
-    for start_char, end_char in [('{', '}'), ('[', ']')]:
-        start = text.find(start_char)
-        end = text.rfind(end_char)
-        if start != -1 and end != -1 and end > start:
-            try:
-                return json.loads(text[start:end + 1])
-            except json.JSONDecodeError:
-                pass
-    raise json.JSONDecodeError("No valid JSON found", text, 0)
-
-
 def slugify(text: str) -> str:
     """Convert text to URL-friendly slug."""
     text = text.lower().strip()
@@ -169,6 +178,9 @@ class Trend:
     url: str
     summary: str
     relevance_score: float
+    # False when Claude never scored it: relevance_score is only a sort key
+    # and the trend is stored without a score (see trend_store.py)
+    scored: bool = True
 
 
 @dataclass
@@ -188,99 +200,87 @@ class BlogArticle:
 # SUPABASE
 # ============================================
 
-def get_supabase() -> Client:
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise ValueError("Missing Supabase credentials")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
-
-
-def log_agent_action(supabase: Client, agent_type: str, action: str, status: str,
+def log_agent_action(logs: LogSink, agent_type: str, action: str, status: str,
                      input_data: Dict, output_data: Dict, error: Optional[str] = None,
-                     duration_ms: Optional[int] = None):
-    try:
-        supabase.table("agent_logs").insert({
-            "agent_type": agent_type,
-            "action": action,
-            "status": status,
-            "input": input_data,
-            "output": output_data,
-            "error": error,
-            "duration_ms": duration_ms,
-        }).execute()
-    except Exception as e:
-        print(f"  [warn] Failed to log: {e}")
-
-
-def check_slug_exists(supabase: Client, slug: str) -> bool:
-    """Check if a blog post with this slug already exists in Supabase."""
-    try:
-        result = supabase.table("content_calendar") \
-            .select("id") \
-            .eq("platform", "blog") \
-            .ilike("content", f"%slug: {slug}%") \
-            .execute()
-        return len(result.data) > 0
-    except:
-        return False
+                     duration_ms: Optional[int] = None, tokens_used: Optional[int] = None,
+                     cost_usd: Optional[float] = None) -> Optional[str]:
+    """Queue a row for agent_logs; the sink writes it in a batch. Returns the row id."""
+    return logs.log({
+        "agent_type": agent_type,
+        "action": action,
+        "status": status,
+        "input": input_data,
+        "output": output_data,
+        "error": error,
+        "duration_ms": duration_ms,
+        "tokens_used": tokens_used,
+        "cost_usd": cost_usd,
+    })
+
+
+def slug_candidates(slug: str, count: int = SLUG_CANDIDATES) -> List[str]:
+    """`slug`, `slug-2`, `slug-3`, ... each within slugify()'s 80 characters."""
+    candidates = [slug]
+    for n in range(2, count + 1):
+        suffix = f"-{n}"
+        candidates.append(slug[:80 - len(suffix)].rstrip("-") + suffix)
+    return candidates
+
+
+async def allocate_slug(db: Database, slug: str, skip: Set[str] = frozenset()) -> str:
+    """First free candidate for `slug`; all candidates are checked in one indexed query."""
+    candidates = [c for c in slug_candidates(slug) if c not in skip]
+    taken = await db.existing_blog_slugs(candidates)
+    for candidate in candidates:
+        if candidate not in taken:
+            return candidate
+    raise ValueError(f"no free slug among {len(candidates)} candidates for {slug}")
 
 
 # ============================================
 # TREND SCRAPER
 # ============================================
 
-async def scrape_ai_trends(session: aiohttp.ClientSession) -> List[Trend]:
-    """Scrape AI-related trends from RSS feeds."""
+async def scrape_ai_trends(session: aiohttp.ClientSession,
+                           results: Optional[List[FeedResult]] = None) -> List[Trend]:
+    """Scrape AI-related trends from RSS feeds (fetched concurrently, unless
+    `results` already holds them)."""
     trends = []
-    for feed_config in AI_RSS_FEEDS:
-        try:
-            async with session.get(
-                feed_config["url"],
-                timeout=aiohttp.ClientTimeout(total=15),
-                headers={"User-Agent": "NovaClaw-BlogAgent/1.0"}
-            ) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    parsed = feedparser.parse(content)
-                    for entry in parsed.entries[:5]:
-                        title = entry.get("title", "")
-                        if not title:
-                            continue
-                        # Filter for AI-related content
-                        ai_keywords = ["ai", "artificial intelligence", "machine learning",
-                                       "chatgpt", "llm", "agent", "automation", "neural",
-                                       "openai", "anthropic", "gemini", "deep learning",
-                                       "gpt", "claude", "robot", "generative"]
-                        title_lower = title.lower()
-                        if any(kw in title_lower for kw in ai_keywords) or feed_config["category"] == "AI":
-                            trends.append(Trend(
-                                source=feed_config["source"],
-                                category=feed_config["category"],
-                                title=title[:300],
-                                url=entry.get("link", ""),
-                                summary=entry.get("summary", "")[:500] if entry.get("summary") else "",
-                                relevance_score=0.0,
-                            ))
-        except Exception as e:
-            print(f"  [warn] Error scraping {feed_config['source']}: {e}")
+    if results is None:
+        results = await fetch_feeds(
+            session,
+            AI_RSS_FEEDS,
+            timeout=15,
+            headers=FEED_HEADERS,
+            max_entries=5,
+        )
+    for result in results:
+        feed_config = result.feed
+        if result.error:
+            print(f"  [warn] Error scraping {feed_config['source']}: {result.error}")
+            continue
+        print(f"  {feed_config['source']}: {len(result.entries)} entries "
+              f"({result.duration_ms}ms, parse {result.parse_ms}ms)")
+        for entry in result.entries[:5]:
+            title = entry.get("title", "")
+            if not title:
+                continue
+            # Filter for AI-related content
+            if feed_config["category"] == "AI" or TOPICS.matches(title, "ai"):
+                trends.append(Trend(
+                    source=feed_config["source"],
+                    category=feed_config["category"],
+                    title=title[:300],
+                    url=entry.get("link", ""),
+                    summary=entry.get("summary", "")[:500] if entry.get("summary") else "",
+                    relevance_score=0.0,
+                ))
     return trends
 
 
-async def score_trends(trends: List[Trend], session: aiohttp.ClientSession) -> List[Trend]:
-    """Score trends for blog-worthiness using Claude."""
-    if not trends:
-        return []
-
-    if not ANTHROPIC_API_KEY:
-        # Fallback keyword scoring
-        for trend in trends:
-            score = 0.5
-            for kw in ["agent", "automation", "business", "company", "enterprise", "saas"]:
-                if kw in trend.title.lower():
-                    score += 0.1
-            trend.relevance_score = min(score, 1.0)
-        return sorted(trends, key=lambda t: t.relevance_score, reverse=True)
-
-    trend_texts = "\n".join([f"{i+1}. {t.title}" for i, t in enumerate(trends[:20])])
+def build_scoring_request(entries: List[Tuple[str, Trend]]) -> Dict[str, Any]:
+    """Messages API params for scoring one chunk of (id, trend) entries."""
+    trend_texts = "\n".join([f"- [{trend_id}] {t.title}" for trend_id, t in entries])
 
     prompt = f"""Score these AI/tech trends 0.0-1.0 for how interesting they would be as a blog article
 for a B2B audience interested in AI agents, automation, and business AI applications.
@@ -299,45 +299,150 @@ Lower scores for:
 Trends:
 {trend_texts}
 
-Return ONLY a JSON array of numbers (scores), one per trend, in order. Nothing else."""
+Give a score for every trend ID: {{"scores": {{"t1": 0.8, "t2": 0.3}}}}."""
 
-    try:
-        async with session.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": ANTHROPIC_API_KEY,
-                "anthropic-version": "2023-06-01"
-            },
-            json={
-                "model": CLAUDE_MODEL,
-                "max_tokens": 300,
-                "messages": [{"role": "user", "content": prompt}]
-            }
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                raw = data["content"][0]["text"]
-                scores = extract_json(raw)
-                for i, score in enumerate(scores):
-                    if i < len(trends):
-                        trends[i].relevance_score = float(score)
-            else:
-                print(f"  [warn] Claude scoring error: {response.status}")
-    except Exception as e:
-        print(f"  [warn] Scoring failed: {e}")
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": scoring_max_tokens(len(entries)),
+        "messages": [{"role": "user", "content": prompt}],
+        **SCORES.request_params(),
+    }
 
-    return sorted(trends, key=lambda t: t.relevance_score, reverse=True)
+
+async def score_trends(
+    trends: List[Trend],
+    claude: ClaudeClient,
+    history: Optional[List[str]] = None
+) -> List[Trend]:
+    """Score trends for blog-worthiness: local BM25 pre-rank, then Claude on the top-K."""
+    if not trends:
+        return []
+
+    top, local_scores = prerank(trends, history or [])
+    if not ANTHROPIC_API_KEY:
+        # Fallback: local relevance only
+        for trend, score in zip(trends, local_scores):
+            trend.relevance_score = score
+        return sorted(trends, key=lambda t: t.relevance_score, reverse=True)
+
+    # Trends outside the local top-K are not worth the tokens
+    print(f"  Pre-ranked {len(trends)} trends locally, sending top {len(top)} to Claude")
+    # Until Claude scores them, trends keep their local relevance as sort key
+    for trend, score in zip(trends, local_scores):
+        trend.relevance_score, trend.scored = score, False
+    candidates = [trends[i] for i in top]
+    entries = list(zip(trend_ids(len(candidates)), candidates))
+    report = await score_by_id(entries, build_scoring_request, claude)
+    for trend_id, trend in entries:
+        if trend_id in report.scores:
+            trend.relevance_score, trend.scored = report.scores[trend_id], True
+
+    for error in report.errors[:3]:
+        print(f"  [warn] Scoring failed: {error}")
+    if report.missing:
+        print(f"  [warn] No score for {len(report.missing)} trends after {report.rounds} rounds")
+    print(f"  Scoring: {report.summary()}")
+
+    # Claude-scored trends first; the rest (or all, if scoring failed) in local order
+    return sorted(trends, key=lambda t: (t.scored, t.relevance_score), reverse=True)
 
 
 # ============================================
 # BLOG ARTICLE GENERATOR
 # ============================================
 
+# Static part of the generation prompt — identical for every article and
+# language, so it is sent as the system prompt. No cache_control marker: this
+# and the other system prompts are far below Haiku's minimum cacheable prefix.
+ARTICLE_INSTRUCTIONS = f"""You are an expert AI technology blogger. You write complete blog articles
+based on a trending AI topic, in the language the user asks for.
+
+REQUIREMENTS:
+- Length: 1000-1500 words
+- Format: Markdown with ## H2 and ### H3 headers
+- Style: Professional but accessible, insightful analysis
+- Structure:
+  1. Attention-grabbing introduction explaining why this matters
+  2. What happened / what's the trend (factual, cite the trend)
+  3. Why this matters for businesses
+  4. How AI agents can help businesses capitalize on this trend
+  5. Practical implications and what to expect next
+- IMPORTANT for AIO (AI Optimization):
+  - Use clear, factual statements that AI search engines can cite
+  - Include question-style H2/H3 headings (e.g. "What does this mean for businesses?")
+  - Write definitive, quotable paragraphs
+  - Mention specific NovaClaw agent types where relevant (naturally, not forced)
+
+{NOVACLAW_CONTEXT}
+
+Return ONLY a JSON object:
+{{
+  "title": "Article title (compelling, SEO-optimized, max 80 chars)",
+  "slug": "url-friendly-slug-max-60-chars",
+  "description": "Meta description, 150-160 chars, compelling",
+  "content": "Full markdown article content (1000-1500 words). Do NOT include the CTA at the end — that will be added automatically.",
+  "category": "One of: AI Trends, AI voor Business, AI Agents, AIO & SEO, Automation",
+  "tags": ["tag1", "tag2", "tag3", "tag4", "tag5"],
+  "reading_time": "X min"
+}}"""
+
+
+# Frequent function words, enough to tell Dutch from English after ~60 words
+LANGUAGE_MARKERS = {
+    "nl": {"de", "het", "een", "en", "van", "dat", "voor", "met", "niet", "zijn",
+           "je", "op", "wat", "ook", "bij", "worden", "kan", "naar", "deze", "hoe"},
+    "en": {"the", "and", "of", "to", "that", "for", "with", "not", "are", "you",
+           "on", "what", "also", "this", "it", "be", "can", "how", "your", "from"},
+}
+
+
+def guess_language(text: str, min_words: int = 60) -> Optional[str]:
+    """'nl' or 'en' when one clearly dominates, else None (too short/ambiguous)."""
+    words = re.findall(r"[a-zà-ÿ]+", text.lower())
+    if len(words) < min_words:
+        return None
+    counts = {lang: sum(1 for w in words if w in markers)
+              for lang, markers in LANGUAGE_MARKERS.items()}
+    best, other = sorted(counts, key=counts.get, reverse=True)
+    return best if counts[best] >= 2 * max(counts[other], 1) else None
+
+
+def partial_article_content(generated: str) -> str:
+    """The (possibly unterminated) "content" string of a streamed article JSON."""
+    match = re.search(r'"content"\s*:\s*"', generated)
+    if not match:
+        return ""
+    body = generated[match.end():]
+    end = re.search(r'(?<!\\)"', body)
+    if end:
+        body = body[:end.start()]
+    return body.replace("\\n", "\n").replace('\\"', '"')
+
+
+def article_stream_guard(lang: str):
+    """Abort reason for a partially generated article, or None to keep going."""
+    max_words = int(ARTICLE_MAX_WORDS * ARTICLE_ABORT_FACTOR)
+
+    def guard(generated: str) -> Optional[str]:
+        head = generated.lstrip()
+        if head and head[0] not in "{[`":
+            return "response is not JSON"
+        content = partial_article_content(generated)
+        words = len(content.split())
+        if words > max_words:
+            return f"over length ({words} words, limit {max_words})"
+        detected = guess_language(content)
+        if detected and detected != lang:
+            return f"language mismatch (expected {lang}, got {detected})"
+        return None
+
+    return guard
+
+
 async def generate_blog_article(
     trend: Trend,
     lang: str,
-    session: aiohttp.ClientSession
+    claude: ClaudeClient
 ) -> Optional[BlogArticle]:
     """Generate a full blog article based on a trend."""
 
@@ -364,87 +469,57 @@ AI developments are moving fast. Businesses that start with AI agents now are bu
 
     cta = cta_nl if lang == "nl" else cta_en
 
-    prompt = f"""You are an expert AI technology blogger writing for {lang_name} audience.
-
-Write a complete blog article based on this trending AI topic:
+    prompt = f"""Write a complete blog article for a {lang_name} audience based on this trending AI topic:
 
 TREND: {trend.title}
 SUMMARY: {trend.summary}
 SOURCE: {trend.source}
 
-REQUIREMENTS:
-- Language: {lang_name}
-- Length: 1000-1500 words
-- Format: Markdown with ## H2 and ### H3 headers
-- Style: Professional but accessible, insightful analysis
-- Structure:
-  1. Attention-grabbing introduction explaining why this matters
-  2. What happened / what's the trend (factual, cite the trend)
-  3. Why this matters for businesses
-  4. How AI agents can help businesses capitalize on this trend
-  5. Practical implications and what to expect next
-- IMPORTANT for AIO (AI Optimization):
-  - Use clear, factual statements that AI search engines can cite
-  - Include question-style H2/H3 headings (e.g. "What does this mean for businesses?")
-  - Write definitive, quotable paragraphs
-  - Mention specific NovaClaw agent types where relevant (naturally, not forced)
-
-{NOVACLAW_CONTEXT}
-
-Return ONLY a JSON object:
-{{
-  "title": "Article title (compelling, SEO-optimized, max 80 chars)",
-  "slug": "url-friendly-slug-max-60-chars",
-  "description": "Meta description, 150-160 chars, compelling",
-  "content": "Full markdown article content (1000-1500 words). Do NOT include the CTA at the end — that will be added automatically.",
-  "category": "One of: AI Trends, AI voor Business, AI Agents, AIO & SEO, Automation",
-  "tags": ["tag1", "tag2", "tag3", "tag4", "tag5"],
-  "reading_time": "X min"
-}}"""
-
+Language: {lang_name}"""
+
+    params = dict(
+        model=CLAUDE_MODEL,
+        max_tokens=4000,
+        system=ARTICLE_INSTRUCTIONS,
+        messages=[{"role": "user", "content": prompt}],
+        timeout=GENERATION_TIMEOUT_S,
+        cache=CACHE_GENERATION,
+        **BLOG_ARTICLE.request_params(),
+    )
     try:
-        async with session.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": ANTHROPIC_API_KEY,
-                "anthropic-version": "2023-06-01"
-            },
-            json={
-                "model": CLAUDE_MODEL,
-                "max_tokens": 4000,
-                "messages": [{"role": "user", "content": prompt}]
-            }
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                raw = data["content"][0]["text"]
-                result = extract_json(raw)
-                if isinstance(result, list):
-                    result = result[0]
-
-                # Append CTA to content
-                content_with_cta = result["content"] + cta
-
-                # Ensure slug is unique by adding lang suffix
-                slug = slugify(result["slug"])
-                if not slug.endswith(f"-{lang}") and lang == "en":
-                    slug = slug + "-en"
-
-                return BlogArticle(
-                    lang=lang,
-                    title=result["title"],
-                    slug=slug,
-                    description=result["description"],
-                    content=content_with_cta,
-                    category=result.get("category", "AI Trends"),
-                    tags=result.get("tags", ["AI", "agents"]),
-                    reading_time=result.get("reading_time", "6 min"),
-                    trend_source=trend.url,
-                )
-            else:
-                error_text = await response.text()
-                print(f"  [error] Claude generation error {response.status}: {error_text[:200]}")
+        if STREAM_GENERATION:
+            response = await claude.stream(**params, guard=article_stream_guard(lang))
+            if response.ttft_ms is not None:
+                print(f"  [stream] {lang.upper()}: first token {response.ttft_ms}ms, "
+                      f"{response.tokens_per_s} tok/s, {response.duration_ms}ms total")
+        else:
+            response = await claude.messages(**params)
+        if response.aborted:
+            print(f"  [abort] {lang.upper()} generation stopped early: {response.aborted}")
+        elif response.ok:
+            result = parse_output(response, BLOG_ARTICLE)
+
+            # Append CTA to content
+            content_with_cta = result["content"] + cta
+
+            # Ensure slug is unique by adding lang suffix
+            slug = slugify(result["slug"])
+            if not slug.endswith(f"-{lang}") and lang == "en":
+                slug = slug + "-en"
+
+            return BlogArticle(
+                lang=lang,
+                title=result["title"],
+                slug=slug,
+                description=result["description"],
+                content=content_with_cta,
+                category=result.get("category", "AI Trends"),
+                tags=result.get("tags", ["AI", "agents"]),
+                reading_time=result.get("reading_time", "6 min"),
+                trend_source=trend.url,
+            )
+        else:
+            print(f"  [error] Claude generation error {response.status}: {(response.error or '')[:200]}")
     except Exception as e:
         print(f"  [error] Blog generation failed: {e}")
 
@@ -455,89 +530,72 @@ Return ONLY a JSON object:
 # CRITIC AGENT
 # ============================================
 
-async def review_article(
-    article: BlogArticle,
-    session: aiohttp.ClientSession
-) -> Dict[str, Any]:
-    """Review article quality via Claude critic."""
-
-    if not ANTHROPIC_API_KEY:
-        return {"approved": True, "score": 0.8, "feedback": "No API key - auto-approved"}
-
-    prompt = f"""Review this blog article for quality, accuracy, and AIO optimization.
-
-TITLE: {article.title}
-LANGUAGE: {article.lang}
-CONTENT (first 500 chars): {article.content[:500]}
+REVIEW_INSTRUCTIONS = """Review blog articles for quality, accuracy, and AIO optimization.
 
 Check:
 1. Quality: Is it engaging, well-structured, informative?
 2. Accuracy: No false claims or hallucinated facts?
 3. AIO: Does it have clear headers, factual statements, quotable paragraphs?
 4. Brand: Is the NovaClaw mention natural (not forced)?
-5. Language: Is the {article.lang} correct and fluent?
+5. Language: Is the article's language (given as LANGUAGE) correct and fluent?
+
+Return JSON: {"approved": true/false, "score": 0.0-1.0, "feedback": "brief feedback"}"""
+
 
-Return JSON: {{"approved": true/false, "score": 0.0-1.0, "feedback": "brief feedback"}}"""
+def build_review_request(article: BlogArticle) -> Dict[str, Any]:
+    """Messages API params for the critic review of `article`."""
+    prompt = f"""Review this blog article.
 
+TITLE: {article.title}
+LANGUAGE: {article.lang}
+CONTENT (first 500 chars): {article.content[:500]}"""
+
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 300,
+        "system": REVIEW_INSTRUCTIONS,
+        "messages": [{"role": "user", "content": prompt}],
+        **CRITIC.request_params(),
+    }
+
+
+def parse_review_result(response: ClaudeResult) -> CriticVerdict:
+    """Turn a critic response into a verdict (auto-approves if the critic failed)."""
     try:
-        async with session.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": ANTHROPIC_API_KEY,
-                "anthropic-version": "2023-06-01"
-            },
-            json={
-                "model": CLAUDE_MODEL,
-                "max_tokens": 300,
-                "messages": [{"role": "user", "content": prompt}]
-            }
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                raw = data["content"][0]["text"]
-                result = extract_json(raw)
-                if isinstance(result, list):
-                    result = result[0]
-                return result
-            else:
-                print(f"  [warn] Critic error: {response.status}")
+        if response.ok:
+            return CriticVerdict.from_output(parse_output(response, CRITIC))
+        else:
+            print(f"  [warn] Critic error: {response.status}")
     except Exception as e:
         print(f"  [warn] Critic failed: {e}")
 
-    return {"approved": True, "score": 0.7, "feedback": "Critic unavailable - auto-approved"}
+    return CriticVerdict(approved=True, score=0.7, feedback="Critic unavailable - auto-approved")
 
 
-# ============================================
-# FACT-CHECKER AGENT
-# ============================================
-
-async def fact_check_article(
+async def review_article(
     article: BlogArticle,
-    session: aiohttp.ClientSession
-) -> Dict[str, Any]:
-    """
-    Dedicated fact-checker that verifies the article against KNOWN_FACTS.
-    Returns {"passed": bool, "violations": [...], "verdict": "..."}.
-    If violations are found, the article should NOT be auto-published.
-    """
+    claude: ClaudeClient
+) -> CriticVerdict:
+    """Review article quality via Claude critic."""
 
     if not ANTHROPIC_API_KEY:
-        return {"passed": True, "violations": [], "verdict": "No API key — skipped"}
+        return CriticVerdict(approved=True, score=0.8, feedback="No API key - auto-approved")
+
+    return parse_review_result(await claude.messages(**build_review_request(article)))
 
-    facts_block = "\n".join(f"- {f}" for f in KNOWN_FACTS)
 
-    prompt = f"""You are a strict fact-checker for NovaClaw, a Dutch AI agency.
+# ============================================
+# FACT-CHECKER AGENT
+# ============================================
+
+_FACTS_BLOCK = "\n".join(f"- {f}" for f in KNOWN_FACTS)
+
+# KNOWN_FACTS and the checking rules never change between articles: system prompt
+FACT_CHECK_INSTRUCTIONS = f"""You are a strict fact-checker for NovaClaw, a Dutch AI agency.
 Your job is to detect factual errors in blog articles before publication.
 
 KNOWN FACTS (these are absolute truths — never contradict them):
-{facts_block}
-
-ARTICLE TO CHECK:
-Title: {article.title}
-Language: {article.lang}
-Content (first 1500 chars):
-{article.content[:1500]}
+{_FACTS_BLOCK}
 
 INSTRUCTIONS:
 1. Read the article carefully.
@@ -555,34 +613,72 @@ Return JSON:
 
 If no violations found, return {{"passed": true, "violations": [], "verdict": "No factual errors found."}}"""
 
+
+def build_fact_check_request(article: BlogArticle) -> Dict[str, Any]:
+    """Messages API params for fact-checking `article` against KNOWN_FACTS."""
+    prompt = f"""ARTICLE TO CHECK:
+Title: {article.title}
+Language: {article.lang}
+Content (first 1500 chars):
+{article.content[:1500]}"""
+
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 500,
+        "system": FACT_CHECK_INSTRUCTIONS,
+        "messages": [{"role": "user", "content": prompt}],
+        **FACT_CHECK.request_params(),
+    }
+
+
+def parse_fact_check_result(response: ClaudeResult) -> FactCheckVerdict:
+    """Turn a fact-checker response into a verdict (fails closed)."""
     try:
-        async with session.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": ANTHROPIC_API_KEY,
-                "anthropic-version": "2023-06-01"
-            },
-            json={
-                "model": CLAUDE_MODEL,
-                "max_tokens": 500,
-                "messages": [{"role": "user", "content": prompt}]
-            }
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                raw = data["content"][0]["text"]
-                result = extract_json(raw)
-                if isinstance(result, list):
-                    result = result[0]
-                return result
-            else:
-                print(f"  [warn] Fact-checker error: {response.status}")
+        if response.ok:
+            return FactCheckVerdict.from_output(parse_output(response, FACT_CHECK))
+        else:
+            print(f"  [warn] Fact-checker error: {response.status}")
     except Exception as e:
         print(f"  [warn] Fact-checker failed: {e}")
 
     # On failure: flag for manual review (do not auto-publish)
-    return {"passed": False, "violations": [], "verdict": "Fact-checker unavailable — flagged for review"}
+    return FactCheckVerdict(passed=False, violations=[],
+                            verdict="Fact-checker unavailable — flagged for review")
+
+
+async def fact_check_article(
+    article: BlogArticle,
+    claude: ClaudeClient
+) -> FactCheckVerdict:
+    """
+    Dedicated fact-checker that verifies the article against KNOWN_FACTS.
+    Returns a FactCheckVerdict (passed, violations, verdict).
+    If violations are found, the article should NOT be auto-published.
+    """
+
+    if not ANTHROPIC_API_KEY:
+        return FactCheckVerdict(passed=True, violations=[], verdict="No API key — skipped")
+
+    return parse_fact_check_result(await claude.messages(**build_fact_check_request(article)))
+
+
+async def review_and_fact_check_batch(
+    articles: List[BlogArticle],
+    claude: ClaudeClient
+) -> List[Tuple[CriticVerdict, FactCheckVerdict]]:
+    """Critic review + fact-check for every article as one Message Batch."""
+    requests, stages = {}, {}
+    for i, article in enumerate(articles):
+        requests[f"review-{i}"] = build_review_request(article)
+        requests[f"factcheck-{i}"] = build_fact_check_request(article)
+        stages[f"review-{i}"], stages[f"factcheck-{i}"] = "review", "fact_check"
+
+    results = await claude.batch(requests, stages=stages)
+    return [
+        (parse_review_result(results[f"review-{i}"]),
+         parse_fact_check_result(results[f"factcheck-{i}"]))
+        for i in range(len(articles))
+    ]
 
 
 # ============================================
@@ -717,30 +813,7 @@ UNSPLASH_IMAGES = {
 
 def get_unsplash_image(article: "BlogArticle") -> str:
     """Pick a relevant and unique Unsplash image based on article tags, category and slug."""
-    text = " ".join(article.tags + [article.category]).lower()
-
-    if any(w in text for w in ["security", "veiligheid", "privacy", "gdpr", "compliance"]):
-        key = "security"
-    elif any(w in text for w in ["seo", "aio", "search", "zoek", "vindbaarheid"]):
-        key = "seo"
-    elif any(w in text for w in ["marketing", "email", "social media", "ads"]):
-        key = "marketing"
-    elif any(w in text for w in ["automation", "automatisering", "workflow"]):
-        key = "automation"
-    elif any(w in text for w in ["data", "analytics", "dashboard"]):
-        key = "data"
-    elif any(w in text for w in ["content", "blog", "schrijven", "writing"]):
-        key = "content"
-    elif any(w in text for w in ["code", "coding", "developer", "programming", "api"]):
-        key = "coding"
-    elif any(w in text for w in ["agent", "chatbot", "assistant"]):
-        key = "agents"
-    elif any(w in text for w in ["business", "bedrijf", "mkb", "enterprise", "startup"]):
-        key = "business"
-    elif any(w in text for w in ["ai", "artificial intelligence", "machine learning", "llm"]):
-        key = "ai"
-    else:
-        key = "ai"
+    key = pick_topic(" ".join(article.tags + [article.category]), default="ai")
 
     photos = UNSPLASH_IMAGES[key]
     # Use a proper hash for better distribution across the pool
@@ -754,8 +827,8 @@ def get_unsplash_image(article: "BlogArticle") -> str:
 # SAVE TO SUPABASE
 # ============================================
 
-def save_blog_post(supabase: Client, article: BlogArticle, critic_result: Dict) -> Optional[Dict]:
-    """Save blog article to Supabase content_calendar."""
+def build_blog_record(article: BlogArticle, critic_result: CriticVerdict) -> Dict:
+    """content_calendar row for a blog article."""
 
     # Build metadata JSON that the blog frontend will read
     metadata = {
@@ -766,7 +839,7 @@ def save_blog_post(supabase: Client, article: BlogArticle, critic_result: Dict)
         "tags": article.tags,
         "reading_time": article.reading_time,
         "trend_source": article.trend_source,
-        "critic_score": critic_result.get("score", 0),
+        "critic_score": critic_result.score,
         "generated_at": datetime.utcnow().isoformat(),
         "author": "NovaClaw AI Team",
     }
@@ -777,32 +850,140 @@ def save_blog_post(supabase: Client, article: BlogArticle, critic_result: Dict)
     # Pick a relevant Unsplash featured image
     featured_image = get_unsplash_image(article)
 
-    record = {
+    return {
         "type": "text",
         "platform": "blog",
         "content": full_content,
         # Publish if score >= 0.5 (most articles are good enough)
-        "status": "published" if critic_result.get("score", 0) >= 0.5 else "review",
+        "status": "published" if critic_result.score >= 0.5 else "review",
         "performance": metadata,  # Using performance JSON field for metadata
         "media_url": featured_image,
     }
 
-    try:
-        result = supabase.table("content_calendar").insert(record).execute()
-        if result.data:
-            return result.data[0]
-    except Exception as e:
-        print(f"  [error] Supabase save failed: {e}")
 
+async def save_blog_post(db: Database, article: BlogArticle, critic_result: CriticVerdict) -> Optional[Dict]:
+    """Save blog article to Supabase content_calendar under a free slug."""
+    taken: Set[str] = set()
+    for _ in range(SLUG_SAVE_ATTEMPTS):
+        try:
+            slug = await allocate_slug(db, article.slug, taken)
+            if slug != article.slug:
+                print(f"  [slug] {article.slug} is taken, using {slug}")
+            return await db.insert_content(build_blog_record(replace(article, slug=slug), critic_result))
+        except DatabaseError as e:
+            if e.status != 409:
+                print(f"  [error] Supabase save failed: {e}")
+                return None
+            # Unique index violation: another run claimed the slug after our lookup
+            taken.add(slug)
+        except Exception as e:
+            print(f"  [error] Supabase save failed: {e}")
+            return None
+
+    print(f"  [error] Supabase save failed: no free slug for {article.slug}")
     return None
 
 
+# ============================================
+# ARTICLE PIPELINE
+# ============================================
+
+# Workers per stage; override with PIPELINE_WORKERS="review=2,save=1"
+STAGE_WORKERS = stage_workers({
+    "generate": GENERATION_CONCURRENCY,
+    "review": 2,
+    "fact_check": 2,
+    "save": 1,
+})
+
+
+def build_article_pipeline(
+    top_trend: Trend,
+    claude: ClaudeClient,
+    db: Optional[Database]
+) -> StagePipeline:
+    """generate → review → fact-check → save; items are language codes."""
+
+    async def generate(lang: str):
+        article = await generate_blog_article(top_trend, lang, claude)
+        if article:
+            print(f"  ✓ {lang.upper()}: {article.title[:60]}")
+        else:
+            print(f"  ✗ Failed to generate {lang.upper()} article")
+        return article
+
+    def report_review(article: BlogArticle, critic: CriticVerdict):
+        status = "✓ Approved" if critic.approved else "⚠ Needs review"
+        print(f"  {status}: {article.lang.upper()} (score: {critic.score:.2f}) — {critic.feedback[:60]}")
+
+    def apply_fact_check(article: BlogArticle, critic: CriticVerdict, fc: FactCheckVerdict):
+        if fc.passed:
+            print(f"  ✓ Fact-check passed: {article.lang.upper()} — {fc.verdict[:80]}")
+            return article, critic, fc
+        print(f"  ✗ Fact-check FAILED: {article.lang.upper()} — {fc.verdict[:80]}")
+        for v in fc.violations:
+            print(f"      Violation: {v[:120]}")
+        # Force score below publish threshold so it goes to review
+        critic = replace(critic, score=0.0, approved=False,
+                         feedback=f"[FACT-CHECK FAILED] {fc.verdict}")
+        return article, critic, fc
+
+    async def review(article: BlogArticle):
+        critic = await review_article(article, claude)
+        report_review(article, critic)
+        return article, critic
+
+    async def fact_check(item):
+        article, critic = item
+        return apply_fact_check(article, critic, await fact_check_article(article, claude))
+
+    async def review_and_fact_check(articles: List[BlogArticle]):
+        # Batch mode: every review and fact-check as one Message Batch
+        print("  [batch] Submitting critic + fact-check requests as one batch...")
+        results = await review_and_fact_check_batch(articles, claude)
+        checked = []
+        for article, (critic, fc) in zip(articles, results):
+            report_review(article, critic)
+            checked.append(apply_fact_check(article, critic, fc))
+        return checked
+
+    async def save(item):
+        article, critic, fc = item
+        if DRY_RUN:
+            tag = "FACT-FAIL" if not fc.passed else "OK"
+            print(f"  Would save [{tag}]: {article.lang.upper()} — {article.title[:60]}")
+            return article
+        if critic.score < 0.5:  # Save if score >= 0.5
+            print(f"  ✗ Rejected (low score): {article.lang.upper()}")
+            return None
+        result = await save_blog_post(db, article, critic)
+        if result:
+            slug = (result.get("performance") or {}).get("slug", article.slug)
+            print(f"  ✓ Saved: {article.lang.upper()} — {slug}")
+        else:
+            print(f"  ✗ Failed to save: {article.lang.upper()}")
+        return result
+
+    stages = [Stage("generate", generate, STAGE_WORKERS["generate"])]
+    if CLAUDE_BATCH_MODE and ANTHROPIC_API_KEY:
+        stages.append(Stage("review", review_and_fact_check, collect=True))
+    else:
+        stages.append(Stage("review", review, STAGE_WORKERS["review"]))
+        stages.append(Stage("fact_check", fact_check, STAGE_WORKERS["fact_check"]))
+    stages.append(Stage("save", save, STAGE_WORKERS["save"]))
+    return StagePipeline(stages)
+
+
 # ============================================
 # MAIN
 # ============================================
 
-async def run_blog_generator():
-    """Main blog generation pipeline."""
+async def run_blog_generator(runtime: Optional[Runtime] = None):
+    """Main blog generation pipeline; run_agents.py passes a shared runtime."""
+
+    if runtime is None:
+        async with open_runtime(DRY_RUN) as runtime:
+            return await run_blog_generator(runtime)
 
     print("=" * 60)
     print("NovaClaw AI - Blog Generator Agent")
@@ -811,29 +992,49 @@ async def run_blog_generator():
     print("=" * 60)
 
     start_time = time.time()
-    supabase = get_supabase()
+
+    db, logs, session = runtime.db, runtime.logs, runtime.session
+    claude = runtime.claude.view()  # Usage of this run only
+    start_parse_stats()
 
     # Log start
-    log_agent_action(supabase, "generator", "blog_generator_start", "running",
-                     {"dry_run": DRY_RUN}, {})
+    run_id = log_agent_action(logs, "generator", "blog_generator_start", "running",
+                              {"dry_run": DRY_RUN}, {})
+
+    # Spans of this run hang off the start row; dry runs trace to a local file
+    trace_file = TRACE_FILE or (default_trace_file("blog_generator") if DRY_RUN else None)
+    async with Tracer("run.blog_generator", "generator", logs, trace_file,
+                      parent_id=run_id, dry_run=DRY_RUN) as tracer:
+        # Trend history loads while the feeds are fetched
+        history = asyncio.create_task(fetch_history(db))
 
-    async with aiohttp.ClientSession() as session:
         # STEP 1: Scrape trends
-        print("\n[1/5] Scraping AI trends...")
-        trends = await scrape_ai_trends(session)
+        print("\n[1/3] Scraping AI trends...")
+        with span("stage.scrape"):
+            trends = await scrape_ai_trends(session, runtime.feed_results)
         print(f"  Found {len(trends)} AI-related trends")
 
         if not trends:
             print("  [error] No trends found. Exiting.")
-            log_agent_action(supabase, "generator", "blog_generator_complete", "failed",
+            history.cancel()
+            tracer.root.fail("No trends scraped")
+            log_agent_action(logs, "generator", "blog_generator_complete", "failed",
                              {}, {"error": "No trends found"}, "No trends scraped")
             return
 
         # STEP 2: Score trends
-        print("\n[2/5] Scoring trends for blog-worthiness...")
-        trends = await score_trends(trends, session)
+        print("\n[2/3] Scoring trends for blog-worthiness...")
+        trends = await score_trends(trends, claude, await history)
         scored_top = trends[0]
 
+        # Persist every scored trend in one upsert (duplicates are no-ops),
+        # overlapping with article generation
+        upsert_task = None
+        if DRY_RUN:
+            print(f"  [dry-run] Would upsert {len(trends)} trends")
+        else:
+            upsert_task = asyncio.create_task(upsert_trends(db, trends))
+
         # Every 3rd day: use a rotating OpenClaw/NemoClaw product topic
         day_of_year = datetime.utcnow().timetuple().tm_yday
         if day_of_year % 3 == 0:
@@ -854,92 +1055,71 @@ async def run_blog_generator():
         print(f"  Top trend: {top_trend.title[:80]} (score: {top_trend.relevance_score:.2f})")
         print(f"  Source: {top_trend.source}")
 
-        # STEP 3: Generate articles (NL + EN)
-        print("\n[3/5] Generating blog articles...")
-        articles = []
+        # STEP 3: NL and EN each flow through their stages independently
+        print("\n[3/3] Generate → review → fact-check → save...")
+        if DRY_RUN:
+            print("  [dry-run] Skipping database writes")
+        langs = ["nl", "en"]
+        pipeline_result = await build_article_pipeline(top_trend, claude, db).run(langs)
 
-        for lang in ["nl", "en"]:
-            print(f"  Generating {lang.upper()} article...")
-            article = await generate_blog_article(top_trend, lang, session)
-            if article:
-                articles.append(article)
-                print(f"  ✓ {lang.upper()}: {article.title[:60]}")
-            else:
-                print(f"  ✗ Failed to generate {lang.upper()} article")
+        for failure in pipeline_result.failures:
+            print(f"  ✗ {langs[failure.index].upper()} failed at {failure.stage}: {failure.error}")
+        for line in pipeline_result.summary():
+            print(f"  [stage] {line}")
 
-        if not articles:
-            print("  [error] No articles generated. Exiting.")
-            log_agent_action(supabase, "generator", "blog_generator_complete", "failed",
-                             {"trend": top_trend.title}, {"error": "Generation failed"})
-            return
+        generated_count = pipeline_result.stage_passed["generate"]
+        saved_count = len(pipeline_result.outputs)
 
-        # STEP 4: Critic review
-        print("\n[4/6] Critic reviewing articles...")
-        reviewed = []
-        for article in articles:
-            critic = await review_article(article, session)
-            score = critic.get("score", 0)
-            status = "✓ Approved" if critic.get("approved") else "⚠ Needs review"
-            print(f"  {status}: {article.lang.upper()} (score: {score:.2f}) — {critic.get('feedback', '')[:60]}")
-            reviewed.append((article, critic))
-
-        # STEP 5: Fact-check articles
-        print("\n[5/6] Fact-checking articles for hallucinations...")
-        fact_checked = []
-        for article, critic in reviewed:
-            fc = await fact_check_article(article, session)
-            if fc.get("passed"):
-                print(f"  ✓ Fact-check passed: {article.lang.upper()} — {fc.get('verdict', '')[:80]}")
-            else:
-                violations = fc.get("violations", [])
-                print(f"  ✗ Fact-check FAILED: {article.lang.upper()} — {fc.get('verdict', '')[:80]}")
-                for v in violations:
-                    print(f"      Violation: {v[:120]}")
-                # Force score below publish threshold so it goes to review
-                critic = {**critic, "score": 0.0, "approved": False,
-                          "feedback": f"[FACT-CHECK FAILED] {fc.get('verdict', '')}"}
-            fact_checked.append((article, critic, fc))
-
-        # STEP 6: Save to Supabase
-        print("\n[6/6] Saving to database...")
-        saved_count = 0
+        upsert = await upsert_task if upsert_task else None
+        if upsert:
+            print(f"  Trends saved: {upsert.summary()}")
 
-        if DRY_RUN:
-            print("  [dry-run] Skipping database writes")
-            for article, critic, fc in fact_checked:
-                tag = "FACT-FAIL" if not fc.get("passed") else "OK"
-                print(f"  Would save [{tag}]: {article.lang.upper()} — {article.title[:60]}")
-                saved_count += 1
-        else:
-            for article, critic, fc in fact_checked:
-                if critic.get("score", 0) >= 0.5:  # Save if score >= 0.5
-                    result = save_blog_post(supabase, article, critic)
-                    if result:
-                        saved_count += 1
-                        print(f"  ✓ Saved: {article.lang.upper()} — {article.slug}")
-                    else:
-                        print(f"  ✗ Failed to save: {article.lang.upper()}")
-                else:
-                    print(f"  ✗ Rejected (low score): {article.lang.upper()}")
+        if not generated_count:
+            print("  [error] No articles generated. Exiting.")
+            tracer.root.fail("Generation failed")
+            log_agent_action(logs, "generator", "blog_generator_complete", "failed",
+                             {"trend": top_trend.title},
+                             {"error": "Generation failed", "claude_usage": claude.ledger.to_dict()},
+                             tokens_used=claude.ledger.tokens_used,
+                             cost_usd=claude.ledger.cost_usd)
+            return
 
     # Log completion
     duration = int((time.time() - start_time) * 1000)
 
-    log_agent_action(supabase, "generator", "blog_generator_complete", "success",
+    log_agent_action(logs, "generator", "blog_generator_complete", "success",
                      {"trend": top_trend.title, "dry_run": DRY_RUN},
                      {
                          "trends_found": len(trends),
-                         "articles_generated": len(articles),
+                         "articles_generated": generated_count,
                          "articles_saved": saved_count,
+                         "trends_inserted": upsert.inserted if upsert else 0,
+                         "trends_updated": upsert.updated if upsert else 0,
+                         "claude_usage": claude.ledger.to_dict(),
+                         "structured_output": parse_summary(),
                      },
-                     duration_ms=duration)
+                     duration_ms=duration,
+                     tokens_used=claude.ledger.tokens_used,
+                     cost_usd=claude.ledger.cost_usd)
 
     print("\n" + "=" * 60)
     print(f"Blog Generator Complete!")
     print(f"Duration: {duration}ms")
     print(f"Articles saved: {saved_count}")
+    print(f"Claude tokens: {claude.usage_summary()}")
+    for line in claude.ledger.summary():
+        print(f"  [usage] {line}")
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    asyncio.run(run_blog_generator())
+    mark_main()
+    parser = argparse.ArgumentParser(description="NovaClaw blog generator agent")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="report when heavy dependencies were loaded and what they cost")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_blog_generator())
+    finally:
+        if args.startup_profile:
+            print_startup_report()
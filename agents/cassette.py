@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+NovaClaw AI - HTTP Record / Replay
+==================================
+Captures every outbound HTTP exchange of an agent run (feeds, Anthropic,
+Pollinations, Supabase) into a gzip-compressed JSONL cassette, and serves
+a cassette back so a production run can be reproduced offline:
+- record: requests go out as usual; responses are streamed back to the
+  agent while their status, headers, body chunks and timings are saved
+- replay: nothing leaves the machine; each request is answered from the
+  cassette with its original time to first byte and chunk timing,
+  scaled by --speed (0 = as fast as possible)
+
+Every aiohttp session is routed through a local proxy, so streaming reads
+(SSE, chunked feed parsing) behave exactly as against the real services.
+Requests are matched on method, URL and body; requests whose body changed
+between runs (generated ids, timestamps) fall back to the most similar
+unused exchange for the same URL. Request headers, and so API keys, are
+never written to the cassette.
+
+    python agents/cassette.py record runs/prod.jsonl.gz content_loop
+    python agents/cassette.py replay runs/prod.jsonl.gz content_loop --speed 1
+    python agents/cassette.py record runs/unified.jsonl.gz run_agents
+    TRACE_FILE=replay.jsonl python agents/cassette.py replay runs/prod.jsonl.gz blog_generator
+
+Caches (Claude responses, feed ETags) are off in both modes, so the
+cassette holds the complete set of requests a cold run makes.
+"""
+
+import os
+import json
+import gzip
+import time
+import base64
+import asyncio
+import difflib
+import hashlib
+import argparse
+import importlib
+import aiohttp
+from aiohttp import web
+from yarl import URL
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Any
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+CASSETTE_VERSION = 1
+
+URL_HEADER = "X-Cassette-Url"
+REDIRECT_HEADER = "X-Cassette-Redirects"
+
+# Not stored or forwarded: hop-by-hop headers and those describing the
+# encoded body (the proxy hands on the decoded one)
+SKIP_HEADERS = {"host", "connection", "keep-alive", "transfer-encoding", "content-length",
+                "content-encoding", "proxy-connection", "upgrade", "te", "trailer",
+                URL_HEADER.lower(), REDIRECT_HEADER.lower()}
+
+# Base URLs the agents build requests from; replay needs the recorded ones
+RECORDED_ENV = ("ANTHROPIC_API_URL", "SUPABASE_URL", "POLLINATIONS_URL")
+
+AGENTS = {
+    "content_loop": ("content_loop", "run_content_loop"),
+    "blog_generator": ("blog_generator", "run_blog_generator"),
+    "run_agents": ("run_agents", "run_agents"),  # Both agents in one process, as in production
+}
+
+
+def body_hash(method: str, url: str, body: bytes) -> str:
+    return hashlib.sha256(method.encode() + b" " + url.encode() + b"\n" + body).hexdigest()
+
+
+def _encode(data: bytes) -> Dict[str, str]:
+    try:
+        return {"text": data.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(data).decode("ascii")}
+
+
+def _decode(data: Dict[str, str]) -> bytes:
+    if "base64" in data:
+        return base64.b64decode(data["base64"])
+    return data.get("text", "").encode("utf-8")
+
+
+# ============================================
+# CASSETTE FILE
+# ============================================
+
+def save_cassette(path: str, header: Dict[str, Any], exchanges: List[Dict[str, Any]]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for exchange in exchanges:
+            f.write(json.dumps(exchange) + "\n")
+
+
+def load_cassette(path: str):
+    """(header, exchanges) of a cassette file."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("cassette") != CASSETTE_VERSION:
+        raise ValueError(f"{path} is not a version {CASSETTE_VERSION} cassette")
+    return lines[0], lines[1:]
+
+
+# ============================================
+# PROXY
+# ============================================
+
+class Cassette:
+    """Record or replay all aiohttp traffic inside `async with`.
+
+        async with Cassette("run.jsonl.gz", "record"):
+            await run_content_loop()
+    """
+
+    def __init__(self, path: str, mode: str, speed: float = 1.0, name: str = ""):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.name = name
+        self.header: Dict[str, Any] = {}
+        self.exchanges: List[Dict[str, Any]] = []
+        self.stats: Counter = Counter()
+        self._by_hash: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_url: Dict[str, List[Dict[str, Any]]] = {}
+        self._used: set = set()
+        self._started = 0.0
+        self._runner: Optional[web.AppRunner] = None
+        self._upstream: Optional[aiohttp.ClientSession] = None
+        self._original_request = None
+        self.base_url = ""
+
+        if mode == "replay":
+            self.header, self.exchanges = load_cassette(path)
+            for exchange in self.exchanges:
+                request = exchange["request"]
+                self._by_hash.setdefault(request["hash"], []).append(exchange)
+                self._by_url.setdefault(f"{request['method']} {request['url']}", []).append(exchange)
+
+    # --- Lifecycle ---
+
+    async def __aenter__(self) -> "Cassette":
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_route("*", "/{tail:.*}", self._record if self.mode == "record" else self._replay)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        if self.mode == "record":
+            self._upstream = aiohttp.ClientSession(auto_decompress=True)
+        self._started = time.monotonic()
+        self._install()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._uninstall()
+        if self._upstream is not None:
+            await self._upstream.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+        if self.mode == "record":
+            self.exchanges.sort(key=lambda exchange: exchange["started_ms"])
+            save_cassette(self.path, {
+                "cassette": CASSETTE_VERSION,
+                "name": self.name,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "env": {key: os.environ[key] for key in RECORDED_ENV if os.environ.get(key)},
+            }, self.exchanges)
+            print(f"  [cassette] {len(self.exchanges)} exchanges recorded to {self.path}")
+        else:
+            print(f"  [cassette] replayed {self.stats['exact']} exact, {self.stats['similar']} "
+                  f"by similarity, {self.stats['missing']} not in cassette")
+
+    def _install(self):
+        """Route every ClientSession request (except our own) through the proxy."""
+        cassette = self
+        original = self._original_request = aiohttp.ClientSession._request
+
+        async def _request(session, method, str_or_url, *, params=None, headers=None,
+                           allow_redirects=True, **kwargs):
+            if session is cassette._upstream:
+                return await original(session, method, str_or_url, params=params, headers=headers,
+                                      allow_redirects=allow_redirects, **kwargs)
+            url = URL(str_or_url)
+            if params:
+                url = url.update_query(params)
+            proxied = dict(headers or {})
+            proxied[URL_HEADER] = str(url)
+            proxied[REDIRECT_HEADER] = "1" if allow_redirects else "0"
+            kwargs.pop("ssl", None)
+            return await original(session, method, f"{cassette.base_url}/", headers=proxied,
+                                  allow_redirects=False, **kwargs)
+
+        aiohttp.ClientSession._request = _request
+
+    def _uninstall(self):
+        if self._original_request is not None:
+            aiohttp.ClientSession._request = self._original_request
+            self._original_request = None
+
+    # --- Record ---
+
+    async def _record(self, request: web.Request) -> web.StreamResponse:
+        url = request.headers[URL_HEADER]
+        body = await request.read()
+        started = time.monotonic()
+        exchange: Dict[str, Any] = {
+            "started_ms": int((started - self._started) * 1000),
+            "request": {"method": request.method, "url": url, "hash": body_hash(request.method, url, body),
+                        "body": _encode(body)},
+        }
+        forwarded = {k: v for k, v in request.headers.items() if k.lower() not in SKIP_HEADERS}
+        try:
+            async with self._upstream.request(
+                request.method, URL(url, encoded=True), headers=forwarded, data=body or None,
+                allow_redirects=request.headers.get(REDIRECT_HEADER) == "1",
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=300),
+            ) as upstream:
+                headers_at = time.monotonic()
+                headers = {k: v for k, v in upstream.headers.items() if k.lower() not in SKIP_HEADERS}
+                exchange["response"] = {"status": upstream.status, "headers": headers,
+                                        "ttfb_ms": round((headers_at - started) * 1000, 1)}
+                chunks = exchange["response"]["chunks"] = []
+                response = web.StreamResponse(status=upstream.status, headers=headers)
+                await response.prepare(request)
+                try:
+                    async for chunk in upstream.content.iter_any():
+                        chunks.append({"at_ms": round((time.monotonic() - headers_at) * 1000, 1),
+                                       **_encode(chunk)})
+                        await response.write(chunk)
+                    await response.write_eof()
+                except ConnectionResetError:
+                    exchange["response"]["aborted"] = True  # Agent stopped reading early
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            exchange["error"] = str(e) or type(e).__name__
+            response = self._error_response(exchange["error"])
+        finally:
+            # Also on cancellation: the agent gave up, but the exchange happened
+            if "response" not in exchange:
+                exchange.setdefault("error", "cancelled before a response")
+                exchange["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+            self.exchanges.append(exchange)
+        return response
+
+    # --- Replay ---
+
+    @staticmethod
+    def _error_response(message: str) -> web.Response:
+        # Transport errors come back as 502 with the original error message
+        return web.json_response({"error": {"type": "cassette_upstream_error", "message": message}},
+                                 status=502, headers={"X-Cassette-Error": message[:200]})
+
+    def _match(self, method: str, url: str, body: bytes) -> Optional[Dict[str, Any]]:
+        for exchange in self._by_hash.get(body_hash(method, url, body), []):
+            if id(exchange) not in self._used:
+                self.stats["exact"] += 1
+                return exchange
+        candidates = [e for e in self._by_url.get(f"{method} {url}", []) if id(e) not in self._used]
+        if not candidates:
+            return None
+        self.stats["similar"] += 1
+        text = body.decode("utf-8", "replace")
+        return max(candidates, key=lambda e: difflib.SequenceMatcher(
+            None, text, _decode(e["request"]["body"]).decode("utf-8", "replace")).quick_ratio())
+
+    async def _replay(self, request: web.Request) -> web.StreamResponse:
+        url = request.headers[URL_HEADER]
+        exchange = self._match(request.method, url, await request.read())
+        if exchange is None:
+            self.stats["missing"] += 1
+            print(f"  [cassette] Not in cassette: {request.method} {url[:120]}")
+            return web.json_response({"error": {"type": "cassette_miss",
+                                                "message": f"{request.method} {url} not recorded"}},
+                                     status=404)
+        self._used.add(id(exchange))
+
+        if "error" in exchange:
+            await asyncio.sleep(exchange.get("duration_ms", 0) / 1000 * self.speed)
+            return self._error_response(exchange["error"])
+        recorded = exchange["response"]
+        await asyncio.sleep(recorded["ttfb_ms"] / 1000 * self.speed)
+        response = web.StreamResponse(status=recorded["status"], headers=recorded["headers"])
+        await response.prepare(request)
+        headers_at = time.monotonic()
+        try:
+            for chunk in recorded["chunks"]:
+                delay = chunk["at_ms"] / 1000 * self.speed - (time.monotonic() - headers_at)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await response.write(_decode(chunk))
+            await response.write_eof()
+        except ConnectionResetError:
+            pass  # Client stopped reading early (e.g. an aborted stream)
+        return response
+
+
+# ============================================
+# ENTRY POINT
+# ============================================
+
+async def run_agent(agent: str, cassette: Cassette):
+    module_name, function = AGENTS[agent]
+    module = importlib.import_module(module_name)
+    async with cassette:
+        await getattr(module, function)()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or replay an agent run's HTTP traffic")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("cassette", help="cassette file (gzip JSONL)")
+    parser.add_argument("agent", choices=list(AGENTS))
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay timing scale: 1 = original, 0.5 = twice as fast, 0 = no delays")
+    args = parser.parse_args()
+
+    os.environ["CLAUDE_CACHE"] = "false"
+    os.environ["FEED_CACHE"] = "false"
+    cassette = Cassette(args.cassette, args.mode, speed=args.speed, name=args.agent)
+    if args.mode == "replay":
+        # Rebuild the recorded request URLs; keys only need to be present
+        os.environ.update(cassette.header.get("env", {}))
+        os.environ.setdefault("ANTHROPIC_API_KEY", "replay")
+        os.environ.setdefault("SUPABASE_SERVICE_KEY", "replay")
+    asyncio.run(run_agent(args.agent, cassette))
@@ -0,0 +1,785 @@
+"""
+NovaClaw AI - Shared Claude Client
+==================================
+One async client for every Anthropic Messages call made by the agents:
+- Keep-alive connection pool with DNS caching
+- Retries with exponential backoff + full jitter on 408/409/429/5xx/529
+  and network errors, honouring the `retry-after` header
+- Per-call timeouts
+- Typed ClaudeResult instead of raw response dicts
+- Optional content-addressed response cache (see response_cache.py);
+  only complete responses are stored, and a response whose content fails
+  to parse is dropped again (ClaudeResult.uncache)
+- Message Batches mode for stages that do not need a synchronous answer
+- Running token totals
+- Per-call usage, cost and latency in a UsageLedger (see usage.py), with
+  an optional per-run token budget
+- Streaming (SSE) calls with time-to-first-token, tokens/sec and an
+  early-abort guard
+"""
+
+from __future__ import annotations
+
+import os
+import copy
+import json
+import time
+import random
+import sqlite3
+import asyncio
+from typing import Optional, Dict, List, Any, Tuple, Callable, AsyncIterator
+from dataclasses import dataclass, field
+
+from response_cache import ResponseCache, CLAUDE_CACHE_ENABLED, cache_key
+from usage import UsageLedger
+from pipeline import current_stage, stage_scope, map_bounded, GENERATION_CONCURRENCY
+from tracing import span
+from startup import lazy_import
+
+aiohttp = lazy_import("aiohttp")  # Loaded on first use
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
+ANTHROPIC_API_URL = os.environ.get("ANTHROPIC_API_URL", "https://api.anthropic.com/v1/messages")
+ANTHROPIC_VERSION = "2023-06-01"
+
+CLAUDE_MAX_RETRIES = int(os.environ.get("CLAUDE_MAX_RETRIES", "4"))
+CLAUDE_BACKOFF_BASE_S = float(os.environ.get("CLAUDE_BACKOFF_BASE_S", "1.0"))
+CLAUDE_BACKOFF_MAX_S = float(os.environ.get("CLAUDE_BACKOFF_MAX_S", "30"))
+CLAUDE_TIMEOUT_S = float(os.environ.get("CLAUDE_TIMEOUT_S", "60"))
+CLAUDE_POOL_SIZE = int(os.environ.get("CLAUDE_POOL_SIZE", "16"))
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Message Batches: non-interactive stages can run at half price via /v1/messages/batches
+CLAUDE_BATCH_MODE = os.environ.get("CLAUDE_BATCH", "false").lower() == "true"
+CLAUDE_BATCH_POLL_S = float(os.environ.get("CLAUDE_BATCH_POLL_S", "5"))
+CLAUDE_BATCH_MAX_WAIT_S = float(os.environ.get("CLAUDE_BATCH_MAX_WAIT_S", "420"))
+# Total batch waiting per run (per client view); once spent, batch() calls go
+# synchronous. Keeps a slow batch day inside the workflow's job timeout
+CLAUDE_BATCH_RUN_BUDGET_S = float(os.environ.get("CLAUDE_BATCH_RUN_BUDGET_S", "600"))
+# After a cancel, how long to wait for the batch to end so finished results are kept
+CLAUDE_BATCH_CANCEL_WAIT_S = float(os.environ.get("CLAUDE_BATCH_CANCEL_WAIT_S", "60"))
+# Submitted batch files kept under CLAUDE_BATCH_DIR (oldest are deleted)
+CLAUDE_BATCH_KEEP = int(os.environ.get("CLAUDE_BATCH_KEEP", "20"))
+CLAUDE_BATCH_DIR = os.environ.get(
+    "CLAUDE_BATCH_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "batches"),
+)
+
+# Streaming: run the abort guard after every N generated characters
+CLAUDE_STREAM_GUARD_CHARS = int(os.environ.get("CLAUDE_STREAM_GUARD_CHARS", "400"))
+
+# Only finished responses are cached; max_tokens truncations are not
+CACHEABLE_STOP_REASONS = {"end_turn", "tool_use", "stop_sequence"}
+
+
+# ============================================
+# DATA CLASSES
+# ============================================
+
+@dataclass
+class ClaudeResult:
+    ok: bool
+    text: str = ""
+    status: Optional[int] = None
+    error: Optional[str] = None
+    usage: Dict[str, int] = field(default_factory=dict)
+    stop_reason: Optional[str] = None
+    attempts: int = 0
+    duration_ms: int = 0
+    cached: bool = False
+    data: Optional[Dict] = None
+    # Streaming only
+    ttft_ms: Optional[int] = None
+    tokens_per_s: Optional[float] = None
+    aborted: Optional[str] = None
+    # Set when the response is billed (see UsageLedger)
+    cost_usd: Optional[float] = None
+    # (cache, key) of the response cache entry holding this response
+    cache_entry: Optional[Tuple[ResponseCache, str]] = field(default=None, repr=False)
+
+    def apply_response(self, data: Dict):
+        """Fill the result from a successful Messages API response body."""
+        self.ok = True
+        self.error = None
+        self.data = data
+        self.text = "".join(
+            block.get("text", "") for block in data.get("content", [])
+            if block.get("type", "text") == "text"
+        )
+        self.usage = data.get("usage", {}) or {}
+        self.stop_reason = data.get("stop_reason")
+
+    def uncache(self):
+        """Drop this response from the response cache, e.g. when its content is unusable."""
+        if self.cache_entry is not None:
+            cache, key = self.cache_entry
+            cache.delete(key)
+            self.cache_entry = None
+
+    def tool_input(self, name: Optional[str] = None) -> Optional[Dict]:
+        """Input of the first tool_use block (named `name`, if given), else None."""
+        for block in (self.data or {}).get("content", []):
+            if block.get("type") == "tool_use" and name in (None, block.get("name")):
+                return block.get("input")
+        return None
+
+
+# ============================================
+# STREAMING
+# ============================================
+
+async def iter_sse(stream: aiohttp.StreamReader) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (event name, parsed data) for each server-sent event."""
+    event, data_lines = "", []
+    async for raw in stream:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+    if data_lines:
+        yield event, json.loads("\n".join(data_lines))
+
+
+class MessageStream:
+    """Rebuilds a Messages response body from streamed events."""
+
+    def __init__(self):
+        self.message: Dict[str, Any] = {"usage": {}}
+        self.blocks: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self._partial_json: Dict[int, str] = {}
+
+    def feed(self, event: str, data: Dict[str, Any]) -> str:
+        """Apply one event; returns the newly generated text or tool-input JSON."""
+        kind = data.get("type", event)
+        index = data.get("index", 0)
+        if kind == "message_start":
+            message = data.get("message", {})
+            self.message.update({k: v for k, v in message.items() if k != "content"})
+        elif kind == "content_block_start":
+            while len(self.blocks) <= index:
+                self.blocks.append({})
+            self.blocks[index] = dict(data.get("content_block", {}))
+        elif kind == "content_block_delta":
+            delta = data.get("delta", {})
+            if delta.get("type") == "text_delta":
+                piece = delta.get("text", "")
+                self.blocks[index]["text"] = self.blocks[index].get("text", "") + piece
+                return piece
+            if delta.get("type") == "input_json_delta":
+                piece = delta.get("partial_json", "")
+                self._partial_json[index] = self._partial_json.get(index, "") + piece
+                return piece
+        elif kind == "content_block_stop":
+            if index in self._partial_json:
+                self.blocks[index]["input"] = json.loads(self._partial_json.pop(index) or "{}")
+        elif kind == "message_delta":
+            self.message.update(data.get("delta", {}))
+            self.message["usage"] = {**self.message.get("usage", {}), **data.get("usage", {})}
+        elif kind == "error":
+            self.error = json.dumps(data.get("error", data))
+        return ""
+
+    def body(self) -> Dict[str, Any]:
+        return {**self.message, "content": self.blocks}
+
+
+# ============================================
+# CLIENT
+# ============================================
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None,
+                  base: float = CLAUDE_BACKOFF_BASE_S,
+                  cap: float = CLAUDE_BACKOFF_MAX_S) -> float:
+    """Seconds to wait before retry `attempt` (0-based); a valid retry-after wins."""
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), cap)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ClaudeClient:
+    """Pooled, retrying client for the Anthropic Messages API.
+
+    Use as an async context manager so the connection pool is closed:
+
+        async with ClaudeClient() as claude:
+            result = await claude.messages(model, 300, [{"role": "user", "content": "..."}])
+
+    Successful responses are cached on disk unless CLAUDE_CACHE=false;
+    pass `cache=False` to a call that must always hit the API.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = ANTHROPIC_API_KEY,
+        api_url: str = ANTHROPIC_API_URL,
+        max_retries: int = CLAUDE_MAX_RETRIES,
+        timeout: float = CLAUDE_TIMEOUT_S,
+        pool_size: int = CLAUDE_POOL_SIZE,
+        cache: Optional[ResponseCache] = None,
+        use_cache: bool = CLAUDE_CACHE_ENABLED,
+        ledger: Optional[UsageLedger] = None,
+        batch_budget_s: float = CLAUDE_BATCH_RUN_BUDGET_S,
+    ):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.batches_url = f"{api_url.rstrip('/')}/batches"
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.cache = cache
+        self.use_cache = use_cache or cache is not None
+        self._owns_cache = False
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.ledger = ledger if ledger is not None else UsageLedger()
+        self.batch_budget_s = batch_budget_s
+        self.batch_wait_left = batch_budget_s
+        # Token totals for responses actually billed in this client's lifetime
+        self.usage_totals: Dict[str, int] = {
+            "input_tokens": 0,
+            "output_tokens": 0,
+        }
+
+    def view(self, ledger: Optional[UsageLedger] = None) -> "ClaudeClient":
+        """This client with its own usage ledger and totals, for one of several
+        agent runs sharing the connection pool and cache. Close the original only."""
+        shared = copy.copy(self)
+        shared.ledger = ledger if ledger is not None else UsageLedger(self.ledger.prices,
+                                                                      self.ledger.token_budget)
+        shared.usage_totals = dict.fromkeys(self.usage_totals, 0)
+        shared.batch_wait_left = self.batch_budget_s
+        shared._owns_cache = False
+        return shared
+
+    def _record_usage(self, result: ClaudeResult, model: str, batch: bool = False,
+                      stage: Optional[str] = None):
+        if result.cached:
+            return
+        for key in self.usage_totals:
+            self.usage_totals[key] += result.usage.get(key, 0) or 0
+        call = self.ledger.record(model, result.usage, result.duration_ms, batch=batch, stage=stage)
+        result.cost_usd = call.cost_usd
+
+    @staticmethod
+    def _trace_result(trace, result: ClaudeResult):
+        if trace is None:
+            return
+        trace.set(status=result.status, attempts=result.attempts, cached=result.cached,
+                  stop_reason=result.stop_reason, ttft_ms=result.ttft_ms,
+                  tokens=sum(v for v in result.usage.values() if isinstance(v, int)) or None,
+                  cost_usd=result.cost_usd)
+        if not result.ok:
+            trace.fail(result.aborted or (result.error or "")[:300] or f"HTTP {result.status}")
+
+    def _budget_refusal(self, count: int = 1) -> Optional[ClaudeResult]:
+        """A failed result when the run's token budget is spent, else None."""
+        reason = self.ledger.over_budget()
+        if reason is None:
+            return None
+        if not self.ledger.refused:
+            print(f"  [budget] {reason}; refusing further Claude calls")
+        self.ledger.refused += count
+        return ClaudeResult(ok=False, error=reason)
+
+    def usage_summary(self) -> str:
+        totals = self.usage_totals
+        return (f"{totals['input_tokens']} in / {totals['output_tokens']} out, "
+                f"${self.ledger.cost_usd:.4f}")
+
+    async def __aenter__(self) -> "ClaudeClient":
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
+        if self.use_cache and self.cache is None:
+            try:
+                self.cache = ResponseCache()
+                self._owns_cache = True
+            except sqlite3.Error as e:
+                print(f"  [warn] Claude response cache disabled: {e}")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._owns_cache and self.cache is not None:
+            self.cache.close()
+            self.cache = None
+            self._owns_cache = False
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "x-api-key": self.api_key or "",
+            "anthropic-version": ANTHROPIC_VERSION,
+        }
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        payload: Optional[Dict] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[Optional[int], str, int]:
+        """Send one API request with retries; returns (status, body text, attempts)."""
+        if self._session is None:
+            raise RuntimeError("ClaudeClient must be used inside 'async with'")
+
+        call_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        status: Optional[int] = None
+        body = ""
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._session.request(
+                    method, url, headers=self._headers(), json=payload, timeout=call_timeout
+                ) as response:
+                    status = response.status
+                    body = await response.text()
+                    if status == 200 or status not in RETRY_STATUSES:
+                        return status, body, attempt + 1
+                    retry_after = response.headers.get("retry-after")
+            except asyncio.TimeoutError:
+                status, body = None, f"timeout after {call_timeout.total}s"
+            except aiohttp.ClientError as e:
+                status, body = None, str(e) or type(e).__name__
+
+            if attempt < self.max_retries:
+                delay = backoff_delay(attempt, retry_after)
+                print(f"  [retry] Claude {status or 'network'} error, "
+                      f"attempt {attempt + 1}/{self.max_retries}, waiting {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        return status, body, self.max_retries + 1
+
+    def _cached_result(self, key: Optional[str]) -> Optional[ClaudeResult]:
+        if key is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        result = ClaudeResult(ok=False, status=200, cached=True, cache_entry=(self.cache, key))
+        result.apply_response(cached)
+        return result
+
+    def _cache_put(self, key: Optional[str], result: ClaudeResult):
+        if key is None or result.stop_reason not in CACHEABLE_STOP_REASONS:
+            return
+        self.cache.put(key, result.data)
+        result.cache_entry = (self.cache, key)
+
+    async def messages(
+        self,
+        model: str,
+        max_tokens: int,
+        messages: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
+        cache: bool = True,
+        **params: Any,
+    ) -> ClaudeResult:
+        """POST /v1/messages with retries; extra keyword args go into the request body."""
+        with span("claude.messages", model=model, stage=current_stage.get()) as trace:
+            result = await self._messages(model, max_tokens, messages, timeout, cache, **params)
+            self._trace_result(trace, result)
+            return result
+
+    async def _messages(
+        self,
+        model: str,
+        max_tokens: int,
+        messages: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
+        cache: bool = True,
+        **params: Any,
+    ) -> ClaudeResult:
+        payload = {"model": model, "max_tokens": max_tokens, "messages": messages, **params}
+        start = time.monotonic()
+
+        key = cache_key(payload) if cache and self.cache is not None else None
+        result = self._cached_result(key)
+        if result is not None:
+            result.duration_ms = int((time.monotonic() - start) * 1000)
+            return result
+        refusal = self._budget_refusal()
+        if refusal is not None:
+            return refusal
+
+        result = ClaudeResult(ok=False)
+        result.status, body, result.attempts = await self._request(
+            "POST", self.api_url, payload, timeout
+        )
+        if result.status == 200:
+            try:
+                result.apply_response(json.loads(body))
+            except ValueError as e:
+                result.error = f"invalid JSON response: {e}"
+        else:
+            result.error = body[:500]
+
+        result.duration_ms = int((time.monotonic() - start) * 1000)
+        if result.ok:
+            self._record_usage(result, model)
+            self._cache_put(key, result)
+        return result
+
+    # ============================================
+    # STREAMING
+    # ============================================
+
+    async def stream(
+        self,
+        model: str,
+        max_tokens: int,
+        messages: List[Dict[str, Any]],
+        guard: Optional[Callable[[str], Optional[str]]] = None,
+        guard_every: int = CLAUDE_STREAM_GUARD_CHARS,
+        timeout: Optional[float] = None,
+        cache: bool = True,
+        **params: Any,
+    ) -> ClaudeResult:
+        """POST /v1/messages with stream=true; same result shape as messages().
+
+        `guard(generated)` is called with the text (or tool-input JSON)
+        generated so far, every `guard_every` characters. Returning a reason
+        closes the stream: the result is not ok and `aborted` holds the reason.
+        HTTP, network and in-stream errors are retried only before the first
+        token arrives. A stream that ends without a stop_reason is not ok.
+        """
+        with span("claude.stream", model=model, stage=current_stage.get()) as trace:
+            result = await self._stream(model, max_tokens, messages, guard, guard_every,
+                                        timeout, cache, **params)
+            self._trace_result(trace, result)
+            return result
+
+    async def _stream(
+        self,
+        model: str,
+        max_tokens: int,
+        messages: List[Dict[str, Any]],
+        guard: Optional[Callable[[str], Optional[str]]] = None,
+        guard_every: int = CLAUDE_STREAM_GUARD_CHARS,
+        timeout: Optional[float] = None,
+        cache: bool = True,
+        **params: Any,
+    ) -> ClaudeResult:
+        if self._session is None:
+            raise RuntimeError("ClaudeClient must be used inside 'async with'")
+        payload = {"model": model, "max_tokens": max_tokens, "messages": messages, **params}
+        start = time.monotonic()
+
+        key = cache_key(payload) if cache and self.cache is not None else None
+        result = self._cached_result(key)
+        if result is not None:
+            result.duration_ms = int((time.monotonic() - start) * 1000)
+            return result
+        refusal = self._budget_refusal()
+        if refusal is not None:
+            return refusal
+
+        result = ClaudeResult(ok=False)
+        call_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        for attempt in range(self.max_retries + 1):
+            result.attempts = attempt + 1
+            retry_after = None
+            try:
+                async with self._session.post(
+                    self.api_url, headers=self._headers(), json={**payload, "stream": True},
+                    timeout=call_timeout,
+                ) as response:
+                    result.status = response.status
+                    if response.status == 200:
+                        await self._read_stream(response, result, start, guard, guard_every)
+                        if result.ok or result.aborted or result.ttft_ms is not None:
+                            break
+                        # In-stream error (e.g. overloaded_error) before any token: retry
+                    else:
+                        result.error = (await response.text())[:500]
+                        if response.status not in RETRY_STATUSES:
+                            break
+                        retry_after = response.headers.get("retry-after")
+            except asyncio.TimeoutError:
+                result.status, result.error = None, f"timeout after {call_timeout.total}s"
+            except (aiohttp.ClientError, ValueError) as e:
+                result.status, result.error = None, str(e) or type(e).__name__
+
+            # Never replay a stream that already produced (billed) tokens
+            if result.ttft_ms is not None or attempt >= self.max_retries:
+                break
+            delay = backoff_delay(attempt, retry_after)
+            kind = "stream" if result.status == 200 else result.status or "network"
+            print(f"  [retry] Claude {kind} error, "
+                  f"attempt {attempt + 1}/{self.max_retries}, waiting {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        result.duration_ms = int((time.monotonic() - start) * 1000)
+        if result.ok or result.aborted:
+            self._record_usage(result, model)
+        if result.ok:
+            self._cache_put(key, result)
+        return result
+
+    async def _read_stream(
+        self,
+        response: aiohttp.ClientResponse,
+        result: ClaudeResult,
+        start: float,
+        guard: Optional[Callable[[str], Optional[str]]],
+        guard_every: int,
+    ):
+        state = MessageStream()
+        pieces: List[str] = []
+        generated = 0
+        next_check = guard_every
+        first_token: Optional[float] = None
+
+        async for event, data in iter_sse(response.content):
+            piece = state.feed(event, data)
+            if state.error:
+                break
+            if not piece:
+                continue
+            if first_token is None:
+                first_token = time.monotonic()
+                result.ttft_ms = int((first_token - start) * 1000)
+            pieces.append(piece)
+            generated += len(piece)
+            if guard is not None and generated >= next_check:
+                next_check = generated + guard_every
+                reason = guard("".join(pieces))
+                if reason:
+                    result.aborted = reason
+                    break
+
+        usage = state.message.get("usage", {})
+        if result.aborted:
+            # No final message_delta: estimate the output tokens billed so far
+            usage = {**usage, "output_tokens": max(usage.get("output_tokens", 0) or 0, generated // 4)}
+        if first_token is not None:
+            elapsed = max(time.monotonic() - first_token, 1e-3)
+            result.tokens_per_s = round((usage.get("output_tokens", 0) or 0) / elapsed, 1)
+
+        if state.error:
+            result.error = state.error[:500]
+        elif result.aborted:
+            result.usage = usage
+            result.stop_reason = "aborted"
+            result.error = f"aborted: {result.aborted}"
+        elif not state.message.get("stop_reason"):
+            # Connection closed mid-body: the content is truncated, not a response
+            result.error = "stream ended without a stop_reason"
+        else:
+            result.apply_response(state.body())
+
+    # ============================================
+    # MESSAGE BATCHES
+    # ============================================
+
+    def _write_batch_file(self, requests: List[Dict[str, Any]]) -> Optional[str]:
+        """Keep a JSONL copy of the last CLAUDE_BATCH_KEEP submitted batches for auditing/replay."""
+        if CLAUDE_BATCH_KEEP <= 0:
+            return None
+        path = os.path.join(CLAUDE_BATCH_DIR, f"batch-{int(time.time() * 1000)}.jsonl")
+        try:
+            os.makedirs(CLAUDE_BATCH_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                for request in requests:
+                    f.write(json.dumps(request) + "\n")
+            names = sorted(name for name in os.listdir(CLAUDE_BATCH_DIR)
+                           if name.startswith("batch-") and name.endswith(".jsonl"))
+            for name in names[:-CLAUDE_BATCH_KEEP]:
+                os.remove(os.path.join(CLAUDE_BATCH_DIR, name))
+            return path
+        except OSError as e:
+            print(f"  [warn] Could not write batch file: {e}")
+            return None
+
+    @staticmethod
+    def _batch_object(status: Optional[int], body: str, action: str) -> Optional[Dict[str, Any]]:
+        """The batch object of a Batches API response, or None after a warning."""
+        if status != 200:
+            print(f"  [warn] Batch {action} failed ({status}): {body[:200]}")
+            return None
+        try:
+            batch = json.loads(body)
+        except ValueError:
+            batch = None
+        if not isinstance(batch, dict) or not batch.get("id"):
+            print(f"  [warn] Batch {action} returned an unexpected body: {body[:200]}")
+            return None
+        return batch
+
+    async def _run_batch(
+        self,
+        requests: Dict[str, Dict[str, Any]],
+        poll_interval: float,
+        max_wait: float,
+    ) -> Dict[str, ClaudeResult]:
+        """Submit one Message Batch, poll until it ends and collect its results.
+
+        A batch still running after `max_wait` is cancelled, then polled for
+        up to CLAUDE_BATCH_CANCEL_WAIT_S until it ends: requests that already
+        succeeded (and are billed) are kept, the canceled ones come back
+        without a result and are retried by the caller.
+        """
+        batch_requests = [{"custom_id": cid, "params": params} for cid, params in requests.items()]
+        self._write_batch_file(batch_requests)
+
+        status, body, _ = await self._request(
+            "POST", self.batches_url, {"requests": batch_requests}
+        )
+        batch = self._batch_object(status, body, "submit")
+        if batch is None:
+            return {}
+        batch_id = batch["id"]
+        print(f"  [batch] Submitted {batch_id} with {len(batch_requests)} requests")
+
+        deadline = time.monotonic() + max_wait
+        canceled = False
+        while batch.get("processing_status") != "ended":
+            if time.monotonic() >= deadline:
+                if canceled:
+                    print(f"  [warn] Batch {batch_id} has not ended "
+                          f"{CLAUDE_BATCH_CANCEL_WAIT_S:.0f}s after cancelling")
+                    return {}
+                print(f"  [warn] Batch {batch_id} not done after {max_wait:.0f}s — cancelling")
+                await self._request("POST", f"{self.batches_url}/{batch_id}/cancel")
+                canceled = True
+                deadline = time.monotonic() + CLAUDE_BATCH_CANCEL_WAIT_S
+            await asyncio.sleep(poll_interval)
+            status, body, _ = await self._request("GET", f"{self.batches_url}/{batch_id}")
+            batch = self._batch_object(status, body, "poll") or batch
+
+        if not batch.get("results_url"):
+            print(f"  [warn] Batch {batch_id} ended without a results_url")
+            return {}
+        status, body, _ = await self._request("GET", batch["results_url"])
+        if status != 200:
+            print(f"  [warn] Batch results download failed ({status})")
+            return {}
+
+        results: Dict[str, ClaudeResult] = {}
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                custom_id = item["custom_id"]
+            except (ValueError, KeyError, TypeError):
+                print(f"  [warn] Skipping malformed batch result line: {line[:200]}")
+                continue
+            outcome = item.get("result") or {}
+            result = ClaudeResult(ok=False, attempts=1)
+            if outcome.get("type") == "succeeded" and isinstance(outcome.get("message"), dict):
+                result.status = 200
+                result.apply_response(outcome["message"])
+            else:
+                result.error = json.dumps(outcome.get("error") or outcome.get("type"))
+            results[custom_id] = result
+        if canceled:
+            print(f"  [batch] Kept {sum(r.ok for r in results.values())}/{len(batch_requests)} "
+                  f"results of cancelled batch {batch_id}")
+        return results
+
+    async def batch(
+        self,
+        requests: Dict[str, Dict[str, Any]],
+        poll_interval: float = CLAUDE_BATCH_POLL_S,
+        max_wait: float = CLAUDE_BATCH_MAX_WAIT_S,
+        cache: bool = True,
+        stages: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, ClaudeResult]:
+        """Run many Messages requests through the Message Batches API.
+
+        `requests` maps a custom_id to Messages params (model, max_tokens,
+        messages, ...). Cached responses are served directly; anything the
+        batch does not return successfully is retried synchronously
+        (GENERATION_CONCURRENCY calls at a time), so every custom_id gets a
+        result. `stages` maps custom_ids to the stage
+        their usage is recorded under (default: the current stage).
+        """
+        with span("claude.batch", requests=len(requests), stage=current_stage.get()) as trace:
+            results = await self._batch(requests, poll_interval, max_wait, cache, stages or {})
+            if trace is not None:
+                trace.set(ok=sum(r.ok for r in results.values()),
+                          cached=sum(r.cached for r in results.values()),
+                          cost_usd=round(sum(r.cost_usd or 0.0 for r in results.values()), 6))
+            return results
+
+    async def _batch(
+        self,
+        requests: Dict[str, Dict[str, Any]],
+        poll_interval: float = CLAUDE_BATCH_POLL_S,
+        max_wait: float = CLAUDE_BATCH_MAX_WAIT_S,
+        cache: bool = True,
+        stages: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, ClaudeResult]:
+        stages = stages or {}
+        start = time.monotonic()
+        results: Dict[str, ClaudeResult] = {}
+        pending: Dict[str, Dict[str, Any]] = {}
+        keys: Dict[str, Optional[str]] = {}
+
+        for custom_id, params in requests.items():
+            keys[custom_id] = cache_key(params) if cache and self.cache is not None else None
+            cached = self._cached_result(keys[custom_id])
+            if cached is not None:
+                results[custom_id] = cached
+            else:
+                pending[custom_id] = params
+
+        refusal = self._budget_refusal(len(pending)) if pending else None
+        if refusal is not None:
+            results.update({custom_id: ClaudeResult(ok=False, error=refusal.error)
+                            for custom_id in pending})
+            pending = {}
+
+        if pending and self.batch_wait_left <= 0:
+            print(f"  [budget] Batch wait budget of {self.batch_budget_s:.0f}s used up, "
+                  f"sending {len(pending)} requests synchronously")
+        elif pending:
+            wait_start = time.monotonic()
+            batch_results = await self._run_batch(pending, poll_interval,
+                                                  min(max_wait, self.batch_wait_left))
+            self.batch_wait_left -= time.monotonic() - wait_start
+            for custom_id, result in batch_results.items():
+                if custom_id in pending and result.ok:
+                    results[custom_id] = result
+                    result.duration_ms = int((time.monotonic() - start) * 1000)
+                    self._record_usage(result, pending[custom_id].get("model", ""), batch=True,
+                                       stage=stages.get(custom_id))
+                    self._cache_put(keys[custom_id], result)
+
+        # Whatever the batch did not return runs synchronously, a few calls at a time
+        async def fallback(custom_id: str) -> ClaudeResult:
+            with stage_scope(stages.get(custom_id) or current_stage.get()):
+                return await self.messages(**pending[custom_id], cache=cache)
+
+        missing = [custom_id for custom_id in pending if custom_id not in results]
+        for item in await map_bounded(fallback, missing, limit=GENERATION_CONCURRENCY):
+            results[item.item] = item.value if item.ok else ClaudeResult(ok=False, error=item.error)
+
+        duration_ms = int((time.monotonic() - start) * 1000)
+        for result in results.values():
+            result.duration_ms = result.duration_ms or duration_ms
+        return results
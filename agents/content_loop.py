@@ -10,50 +10,33 @@ This agent runs every 12 hours via GitHub Actions to:
 5. Schedule distribution
 """
 
+from __future__ import annotations
+
 import os
-import json
-import re
 import time
 import hashlib
 import asyncio
-import aiohttp
-import feedparser
+import argparse
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
 from dataclasses import dataclass, asdict
-from supabase import create_client, Client
 
+from feeds import fetch_feeds, FeedResult
+from claude_client import ClaudeClient, ClaudeResult, CLAUDE_BATCH_MODE
+from ranker import prerank, fetch_history
+from database import Database
+from trend_store import upsert_trends
+from log_sink import LogSink
+from runtime import Runtime, open_runtime
+from tracing import Tracer, TRACE_FILE, default_trace_file, span
+from scoring import score_by_id, trend_ids, scoring_max_tokens
+from structured import (SCORES, SOCIAL_POST, CRITIC, CriticVerdict,
+                        parse_output, parse_summary, start_parse_stats)
+from pipeline import Stage, StagePipeline, stage_workers, GENERATION_CONCURRENCY
+from startup import lazy_import, mark_main, print_startup_report
 
-def extract_json(text: str) -> Any:
-    """Extract JSON from Claude response, handling markdown code blocks and extra text."""
-    # Strip whitespace
-    text = text.strip()
+aiohttp = lazy_import("aiohttp")  # Loaded on first use
 
-    # Try direct parse first
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-
-    # Try extracting from markdown code block ```json ... ```
-    match = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(1).strip())
-        except json.JSONDecodeError:
-            pass
-
-    # Try finding first [ or { and matching to last ] or }
-    for start_char, end_char in [('[', ']'), ('{', '}')]:
-        start = text.find(start_char)
-        end = text.rfind(end_char)
-        if start != -1 and end != -1 and end > start:
-            try:
-                return json.loads(text[start:end + 1])
-            except json.JSONDecodeError:
-                pass
-
-    raise json.JSONDecodeError("No valid JSON found in response", text, 0)
 
 # ============================================
 # CONFIGURATION
@@ -62,6 +45,17 @@ def extract_json(text: str) -> Any:
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
+# Generate and review but write nothing; no Supabase client is created
+DRY_RUN = os.environ.get("DRY_RUN", "false").lower() == "true"
+
+# Claude model for scoring, generation and review
+CLAUDE_MODEL = "claude-haiku-4-5-20251001"
+
+# Scoring/review responses are always cacheable; generation only when opted in
+CACHE_GENERATION = os.environ.get("CLAUDE_CACHE_GENERATION", "false").lower() == "true"
+
+# Image API (free, URL-based)
+POLLINATIONS_URL = os.environ.get("POLLINATIONS_URL", "https://image.pollinations.ai")
 
 # Free RSS feeds for trend scraping
 RSS_FEEDS = [
@@ -92,6 +86,9 @@ class Trend:
     url: str
     summary: str
     relevance_score: float
+    # False when Claude never scored it: relevance_score is only a sort key
+    # and the trend is stored without a score (see trend_store.py)
+    scored: bool = True
 
 
 @dataclass
@@ -112,105 +109,104 @@ class AgentLog:
     output: Dict
     error: Optional[str]
     duration_ms: Optional[int]
+    tokens_used: Optional[int] = None
+    cost_usd: Optional[float] = None
 
 
 # ============================================
-# SUPABASE CLIENT
+# DATABASE
 # ============================================
 
-def get_supabase() -> Client:
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise ValueError("Missing Supabase credentials")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
-
-
-def log_agent_action(supabase: Client, log: AgentLog):
-    """Log agent activity to Supabase"""
-    try:
-        supabase.table("agent_logs").insert(asdict(log)).execute()
-    except Exception as e:
-        print(f"Failed to log: {e}")
+def log_agent_action(logs: LogSink, log: AgentLog) -> Optional[str]:
+    """Queue agent activity for agent_logs (written in batches by the sink); returns the row id"""
+    return logs.log(asdict(log))
 
 
 # ============================================
 # TREND SCRAPER AGENT
 # ============================================
 
-async def scrape_trends(session: aiohttp.ClientSession) -> List[Trend]:
-    """Scrape trends from multiple RSS feeds"""
+async def scrape_trends(session: aiohttp.ClientSession,
+                        results: Optional[List[FeedResult]] = None) -> List[Trend]:
+    """Scrape trends from multiple RSS feeds (fetched concurrently, unless
+    `results` already holds them)"""
     trends = []
 
-    for feed_config in RSS_FEEDS:
-        try:
-            async with session.get(feed_config["url"], timeout=10) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    parsed = feedparser.parse(content)
-
-                    for entry in parsed.entries[:5]:  # Top 5 from each source
-                        trend = Trend(
-                            source=feed_config["source"],
-                            category=feed_config["category"],
-                            title=entry.get("title", "")[:300],
-                            url=entry.get("link", ""),
-                            summary=entry.get("summary", "")[:500] if entry.get("summary") else "",
-                            relevance_score=0.0  # Will be scored later
-                        )
-                        trends.append(trend)
-        except Exception as e:
-            print(f"Error scraping {feed_config['source']}: {e}")
+    if results is None:
+        results = await fetch_feeds(session, RSS_FEEDS, timeout=10, max_entries=5)
+    for result in results:
+        feed_config = result.feed
+        if result.error:
+            print(f"Error scraping {feed_config['source']}: {result.error}")
             continue
+        print(f"    {feed_config['source']}: {len(result.entries)} entries "
+              f"({result.duration_ms}ms, parse {result.parse_ms}ms)")
+
+        for entry in result.entries[:5]:  # Top 5 from each source
+            trend = Trend(
+                source=feed_config["source"],
+                category=feed_config["category"],
+                title=entry.get("title", "")[:300],
+                url=entry.get("link", ""),
+                summary=entry.get("summary", "")[:500] if entry.get("summary") else "",
+                relevance_score=0.0  # Will be scored later
+            )
+            trends.append(trend)
 
     return trends
 
 
-async def score_trends(trends: List[Trend], session: aiohttp.ClientSession) -> List[Trend]:
-    """Score trends for relevance using Claude (batch for efficiency)"""
-    if not ANTHROPIC_API_KEY:
-        # Fallback: simple keyword scoring
-        keywords = ["ai", "automation", "marketing", "business", "growth", "startup"]
-        for trend in trends:
-            score = sum(1 for k in keywords if k in trend.title.lower()) / len(keywords)
-            trend.relevance_score = round(score, 2)
-        return sorted(trends, key=lambda t: t.relevance_score, reverse=True)
-
-    # Use Claude for intelligent scoring
-    trend_texts = "\n".join([f"- {t.title}" for t in trends[:20]])
+def build_scoring_request(entries: List[Tuple[str, Trend]]) -> Dict[str, Any]:
+    """Messages API params for scoring one chunk of (id, trend) entries"""
+    trend_texts = "\n".join([f"- [{trend_id}] {t.title}" for trend_id, t in entries])
 
     prompt = f"""Score these trends 0.0-1.0 for relevance to B2B marketing/AI automation audience.
-Return ONLY a JSON array of scores in order, nothing else.
+Give a score for every trend ID: {{"scores": {{"t1": 0.8, "t2": 0.3}}}}.
 
 Trends:
 {trend_texts}"""
 
-    try:
-        async with session.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": ANTHROPIC_API_KEY,
-                "anthropic-version": "2023-06-01"
-            },
-            json={
-                "model": "claude-haiku-4-5-20251001",
-                "max_tokens": 200,
-                "messages": [{"role": "user", "content": prompt}]
-            }
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                raw_text = data["content"][0]["text"]
-                scores = extract_json(raw_text)
-                for i, score in enumerate(scores):
-                    if i < len(trends):
-                        trends[i].relevance_score = float(score)
-            else:
-                error_text = await response.text()
-                print(f"Claude scoring API error {response.status}: {error_text[:200]}")
-    except Exception as e:
-        print(f"Claude scoring failed: {e}")
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": scoring_max_tokens(len(entries)),
+        "messages": [{"role": "user", "content": prompt}],
+        **SCORES.request_params(),
+    }
+
+
+async def score_trends(
+    trends: List[Trend],
+    claude: ClaudeClient,
+    history: Optional[List[str]] = None
+) -> List[Trend]:
+    """Pre-rank trends locally, then score the top candidates using Claude"""
+    top, local_scores = prerank(trends, history or [])
+    if not ANTHROPIC_API_KEY:
+        # Fallback: local BM25 relevance only
+        for trend, score in zip(trends, local_scores):
+            trend.relevance_score = round(score, 2)
+        return sorted(trends, key=lambda t: t.relevance_score, reverse=True)
+
+    # Use Claude for the local top-K only, in chunks keyed by trend ID
+    print(f"Pre-ranked {len(trends)} trends locally, sending top {len(top)} to Claude")
+    # Until Claude scores them, trends keep their local relevance as sort key
+    for trend, score in zip(trends, local_scores):
+        trend.relevance_score, trend.scored = round(score, 2), False
+    candidates = [trends[i] for i in top]
+    entries = list(zip(trend_ids(len(candidates)), candidates))
+    report = await score_by_id(entries, build_scoring_request, claude)
+    for trend_id, trend in entries:
+        if trend_id in report.scores:
+            trend.relevance_score, trend.scored = report.scores[trend_id], True
 
-    return sorted(trends, key=lambda t: t.relevance_score, reverse=True)
+    for error in report.errors[:3]:
+        print(f"Claude scoring failed: {error}")
+    if report.missing:
+        print(f"No score for {len(report.missing)} trends after {report.rounds} rounds")
+    print(f"Scoring: {report.summary()}")
+
+    # Claude-scored trends first; the rest (or all, if scoring failed) in local order
+    return sorted(trends, key=lambda t: (t.scored, t.relevance_score), reverse=True)
 
 
 # ============================================
@@ -220,7 +216,7 @@ Trends:
 async def generate_content(
     trend: Trend,
     platform: str,
-    session: aiohttp.ClientSession
+    claude: ClaudeClient
 ) -> Optional[GeneratedContent]:
     """Generate platform-specific content from a trend"""
 
@@ -252,36 +248,24 @@ Return JSON:
 {{"content": "...", "hashtags": ["...", "..."], "image_prompt": "description for AI image generation"}}"""
 
     try:
-        async with session.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": ANTHROPIC_API_KEY,
-                "anthropic-version": "2023-06-01"
-            },
-            json={
-                "model": "claude-haiku-4-5-20251001",
-                "max_tokens": 1000,
-                "messages": [{"role": "user", "content": prompt}]
-            }
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                raw_text = data["content"][0]["text"]
-                result = extract_json(raw_text)
-                # Handle case where Claude returns a list wrapper
-                if isinstance(result, list) and len(result) > 0:
-                    result = result[0]
-                return GeneratedContent(
-                    platform=platform,
-                    content=result["content"][:config["max_length"]],
-                    media_prompt=result.get("image_prompt"),
-                    hashtags=result.get("hashtags", []),
-                    trend_source=trend.url
-                )
-            else:
-                error_text = await response.text()
-                print(f"Content gen API error {response.status}: {error_text[:200]}")
+        response = await claude.messages(
+            model=CLAUDE_MODEL,
+            max_tokens=1000,
+            messages=[{"role": "user", "content": prompt}],
+            cache=CACHE_GENERATION,
+            **SOCIAL_POST.request_params(),
+        )
+        if response.ok:
+            result = parse_output(response, SOCIAL_POST)
+            return GeneratedContent(
+                platform=platform,
+                content=result["content"][:config["max_length"]],
+                media_prompt=result.get("image_prompt"),
+                hashtags=result.get("hashtags", []),
+                trend_source=trend.url
+            )
+        else:
+            print(f"Content gen API error {response.status}: {(response.error or '')[:200]}")
     except Exception as e:
         print(f"Content generation failed: {e}")
 
@@ -303,15 +287,22 @@ async def generate_visual(prompt: str, session: aiohttp.ClientSession) -> Option
     encoded_prompt = enhanced_prompt.replace(" ", "%20")
 
     # Pollinations generates images via URL
-    image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1200&height=675&nologo=true"
+    image_url = f"{POLLINATIONS_URL}/prompt/{encoded_prompt}?width=1200&height=675&nologo=true"
 
     # Verify the URL works
-    try:
-        async with session.head(image_url, timeout=30) as response:
-            if response.status == 200:
-                return image_url
-    except Exception as e:
-        print(f"Visual generation failed: {e}")
+    with span("image.check", prompt=prompt[:100]) as trace:
+        try:
+            async with session.head(image_url, timeout=30) as response:
+                if trace is not None:
+                    trace.set(status=response.status)
+                if response.status == 200:
+                    return image_url
+                if trace is not None:
+                    trace.fail(f"HTTP {response.status}")
+        except Exception as e:
+            print(f"Visual generation failed: {e}")
+            if trace is not None:
+                trace.fail(str(e) or type(e).__name__)
 
     return None
 
@@ -320,15 +311,8 @@ async def generate_visual(prompt: str, session: aiohttp.ClientSession) -> Option
 # CRITIC AGENT (Quality & GDPR Check)
 # ============================================
 
-async def critic_review(
-    content: GeneratedContent,
-    session: aiohttp.ClientSession
-) -> Dict[str, Any]:
-    """Second Claude instance reviews content for quality and compliance"""
-
-    if not ANTHROPIC_API_KEY:
-        return {"approved": True, "score": 0.85, "feedback": "Demo mode - auto-approved"}
-
+def build_critic_request(content: GeneratedContent) -> Dict[str, Any]:
+    """Messages API params for the critic review of a post"""
     prompt = f"""Review this {content.platform} marketing post for quality and compliance.
 
 Content:
@@ -344,47 +328,60 @@ Check for:
 Return JSON:
 {{"approved": true/false, "score": 0.0-1.0, "feedback": "...", "suggested_edits": "..." or null}}"""
 
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 500,
+        "messages": [{"role": "user", "content": prompt}],
+        **CRITIC.request_params(),
+    }
+
+
+def parse_critic_result(response: ClaudeResult) -> CriticVerdict:
+    """Turn a critic response into a validated verdict"""
     try:
-        async with session.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": ANTHROPIC_API_KEY,
-                "anthropic-version": "2023-06-01"
-            },
-            json={
-                "model": "claude-haiku-4-5-20251001",
-                "max_tokens": 500,
-                "messages": [{"role": "user", "content": prompt}]
-            }
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                raw_text = data["content"][0]["text"]
-                result = extract_json(raw_text)
-                # Handle case where Claude returns [{"approved": ...}] instead of {"approved": ...}
-                if isinstance(result, list) and len(result) > 0:
-                    result = result[0]
-                return result
-            else:
-                error_text = await response.text()
-                print(f"Critic API error {response.status}: {error_text[:200]}")
+        if response.ok:
+            return CriticVerdict.from_output(parse_output(response, CRITIC))
+        else:
+            print(f"Critic API error {response.status}: {(response.error or '')[:200]}")
     except Exception as e:
         print(f"Critic review failed: {e}")
 
     # Fail-safe: require manual review if critic fails
-    return {"approved": False, "score": 0.0, "feedback": "Critic agent unavailable - manual review required"}
+    return CriticVerdict(approved=False, score=0.0, feedback="Critic agent unavailable - manual review required")
+
+
+async def critic_review(
+    content: GeneratedContent,
+    claude: ClaudeClient
+) -> CriticVerdict:
+    """Second Claude instance reviews content for quality and compliance"""
+
+    if not ANTHROPIC_API_KEY:
+        return CriticVerdict(approved=True, score=0.85, feedback="Demo mode - auto-approved")
+
+    return parse_critic_result(await claude.messages(**build_critic_request(content)))
+
+
+async def critic_review_batch(
+    contents: List[GeneratedContent],
+    claude: ClaudeClient
+) -> List[CriticVerdict]:
+    """Critic review for every post as one Message Batch"""
+    results = await claude.batch({
+        f"critic-{i}": build_critic_request(content) for i, content in enumerate(contents)
+    })
+    return [parse_critic_result(results[f"critic-{i}"]) for i in range(len(contents))]
 
 
 # ============================================
 # DISTRIBUTION SCHEDULER
 # ============================================
 
-def schedule_content(
-    supabase: Client,
+async def schedule_content(
+    db: Database,
     content: GeneratedContent,
     media_url: Optional[str],
-    critic_result: Dict
+    critic_result: CriticVerdict
 ):
     """Save content to calendar and schedule distribution"""
 
@@ -413,128 +410,191 @@ def schedule_content(
         "media_url": media_url,
         "hashtags": content.hashtags,
         "scheduled_for": base_time.isoformat(),
-        "status": "scheduled" if critic_result.get("approved") else "review",
+        "status": "scheduled" if critic_result.approved else "review",
         "trend_source": content.trend_source,
-        "critic_score": critic_result.get("score", 0),
-        "critic_feedback": critic_result.get("feedback"),
+        "critic_score": critic_result.score,
+        "critic_feedback": critic_result.feedback,
     }
 
-    result = supabase.table("content_calendar").insert(record).execute()
-    return result.data[0] if result.data else None
+    return await db.insert_content(record)
+
+
+# ============================================
+# CONTENT PIPELINE
+# ============================================
+
+# Workers per stage; override with PIPELINE_WORKERS="critic=2,schedule=1"
+STAGE_WORKERS = stage_workers({
+    "generate": GENERATION_CONCURRENCY,
+    "visual": 3,
+    "critic": 3,
+    "schedule": 1,
+})
+
+
+def build_content_pipeline(
+    session: aiohttp.ClientSession,
+    claude: ClaudeClient,
+    db: Optional[Database]
+) -> StagePipeline:
+    """generate → visual → critic → schedule; items are (trend, platform) pairs"""
+
+    async def generate(item):
+        trend, platform = item
+        content = await generate_content(trend, platform, claude)
+        if content:
+            print(f"    ✓ Generated for {platform}")
+        return content
+
+    async def visual(content: GeneratedContent):
+        media_url = None
+        if content.media_prompt:
+            media_url = await generate_visual(content.media_prompt, session)
+            if media_url:
+                print(f"    ✓ Visual generated for {content.platform}")
+        return content, media_url
+
+    async def critic(item):
+        content, media_url = item
+        return content, media_url, await critic_review(content, claude)
+
+    async def critic_batch(items):
+        # Batch mode: one Message Batch for every post that reached this stage
+        results = await critic_review_batch([content for content, _ in items], claude)
+        return [(content, media_url, r) for (content, media_url), r in zip(items, results)]
+
+    async def schedule(item):
+        content, media_url, critic_result = item
+        if critic_result.score < 0.6:
+            print(f"    ✗ Rejected: {content.platform} (score: {critic_result.score:.2f})")
+            return None
+        if DRY_RUN:
+            print(f"    Would schedule: {content.platform} (score: {critic_result.score:.2f})")
+            return content
+        result = await schedule_content(db, content, media_url, critic_result)
+        if result:
+            status = "✓ Scheduled" if critic_result.approved else "⚠ Needs review"
+            print(f"    {status}: {content.platform} (score: {critic_result.score:.2f})")
+        return result
+
+    batch_critic = bool(CLAUDE_BATCH_MODE and ANTHROPIC_API_KEY)
+    return StagePipeline([
+        Stage("generate", generate, STAGE_WORKERS["generate"]),
+        Stage("visual", visual, STAGE_WORKERS["visual"]),
+        Stage("critic", critic_batch if batch_critic else critic, STAGE_WORKERS["critic"],
+              collect=batch_critic),
+        Stage("schedule", schedule, STAGE_WORKERS["schedule"]),
+    ])
 
 
 # ============================================
 # MAIN CONTENT LOOP
 # ============================================
 
-async def run_content_loop():
-    """Main orchestration function"""
+async def run_content_loop(runtime: Optional[Runtime] = None):
+    """Main orchestration function; run_agents.py passes a shared runtime"""
+
+    if runtime is None:
+        async with open_runtime(DRY_RUN) as runtime:
+            return await run_content_loop(runtime)
 
     print("=" * 50)
     print("NovaClaw AI - Content Loop Agent Starting")
     print(f"Time: {datetime.utcnow().isoformat()}")
+    print(f"Dry run: {DRY_RUN}")
     print("=" * 50)
 
-    supabase = get_supabase()
     start_time = time.time()
 
+    db, logs, session = runtime.db, runtime.logs, runtime.session
+    claude = runtime.claude.view()  # Usage of this run only
+    start_parse_stats()
+
     # Log start
-    log_agent_action(supabase, AgentLog(
+    run_id = log_agent_action(logs, AgentLog(
         agent_type="scraper",
         action="content_loop_start",
         status="running",
-        input={"platforms": PLATFORMS},
+        input={"platforms": PLATFORMS, "dry_run": DRY_RUN},
         output={},
         error=None,
         duration_ms=None
     ))
 
-    async with aiohttp.ClientSession() as session:
+    # Spans of this run hang off the start row; dry runs trace to a local file
+    trace_file = TRACE_FILE or (default_trace_file("content_loop") if DRY_RUN else None)
+    async with Tracer("run.content_loop", "scraper", logs, trace_file,
+                      parent_id=run_id, dry_run=DRY_RUN):
+        # Trend history loads while the feeds are fetched
+        history = asyncio.create_task(fetch_history(db))
+
         # STEP 1: Scrape trends
-        print("\n[1/5] Scraping trends...")
-        trends = await scrape_trends(session)
+        print("\n[1/3] Scraping trends...")
+        with span("stage.scrape"):
+            trends = await scrape_trends(session, runtime.feed_results)
         print(f"    Found {len(trends)} raw trends")
 
         # STEP 2: Score and rank trends
-        print("\n[2/5] Scoring trends...")
-        trends = await score_trends(trends, session)
+        print("\n[2/3] Scoring trends...")
+        trends = await score_trends(trends, claude, await history)
         top_trends = trends[:3]  # Top 3 trends
         print(f"    Top trends: {[t.title[:50] for t in top_trends]}")
 
-        # Store trends in database
-        for trend in top_trends:
-            try:
-                supabase.table("trends").insert({
-                    "source": trend.source,
-                    "category": trend.category,
-                    "title": trend.title,
-                    "url": trend.url,
-                    "summary": trend.summary,
-                    "relevance_score": trend.relevance_score,
-                }).execute()
-            except:
-                pass  # Ignore duplicates
-
-        # STEP 3: Generate content for each platform
-        print("\n[3/5] Generating content...")
-        generated_content = []
-
-        for trend in top_trends[:1]:  # Use top trend
-            for platform in PLATFORMS:
-                content = await generate_content(trend, platform, session)
-                if content:
-                    generated_content.append(content)
-                    print(f"    ✓ Generated for {platform}")
-
-        # STEP 4: Generate visuals
-        print("\n[4/5] Generating visuals...")
-        content_with_media = []
-
-        for content in generated_content:
-            media_url = None
-            if content.media_prompt:
-                media_url = await generate_visual(content.media_prompt, session)
-                if media_url:
-                    print(f"    ✓ Visual generated for {content.platform}")
-            content_with_media.append((content, media_url))
-
-        # STEP 5: Critic review and scheduling
-        print("\n[5/5] Critic review & scheduling...")
-        scheduled_count = 0
-
-        for content, media_url in content_with_media:
-            critic_result = await critic_review(content, session)
-
-            if critic_result.get("score", 0) >= 0.6:
-                result = schedule_content(supabase, content, media_url, critic_result)
-                if result:
-                    scheduled_count += 1
-                    status = "✓ Scheduled" if critic_result.get("approved") else "⚠ Needs review"
-                    print(f"    {status}: {content.platform} (score: {critic_result.get('score', 0):.2f})")
-            else:
-                print(f"    ✗ Rejected: {content.platform} (score: {critic_result.get('score', 0):.2f})")
+        # Store every scored trend in one upsert (duplicates are no-ops),
+        # overlapping with content generation
+        upsert_task = None
+        if DRY_RUN:
+            print(f"    [dry-run] Would upsert {len(trends)} trends")
+        else:
+            upsert_task = asyncio.create_task(upsert_trends(db, trends))
+
+        # STEP 3: Each post flows through its stages as soon as it is ready
+        print("\n[3/3] Generate → visual → critic → schedule...")
+        items = [(trend, platform) for trend in top_trends[:1] for platform in PLATFORMS]
+        pipeline_result = await build_content_pipeline(session, claude, db).run(items)
+
+        for failure in pipeline_result.failures:
+            print(f"    ✗ {items[failure.index][1]} failed at {failure.stage}: {failure.error}")
+        for line in pipeline_result.summary():
+            print(f"    [stage] {line}")
+
+        generated_count = pipeline_result.stage_passed["generate"]
+        scheduled_count = len(pipeline_result.outputs)
+
+        upsert = await upsert_task if upsert_task else None
+        if upsert:
+            print(f"    Trends saved: {upsert.summary()}")
 
     # Log completion
     duration = int((time.time() - start_time) * 1000)
 
-    log_agent_action(supabase, AgentLog(
+    log_agent_action(logs, AgentLog(
         agent_type="scraper",
         action="content_loop_complete",
         status="success",
-        input={"platforms": PLATFORMS},
+        input={"platforms": PLATFORMS, "dry_run": DRY_RUN},
         output={
             "trends_found": len(trends),
-            "content_generated": len(generated_content),
-            "content_scheduled": scheduled_count
+            "content_generated": generated_count,
+            "content_scheduled": scheduled_count,
+            "trends_inserted": upsert.inserted if upsert else 0,
+            "trends_updated": upsert.updated if upsert else 0,
+            "claude_usage": claude.ledger.to_dict(),
+            "structured_output": parse_summary(),
         },
         error=None,
-        duration_ms=duration
+        duration_ms=duration,
+        tokens_used=claude.ledger.tokens_used,
+        cost_usd=claude.ledger.cost_usd
     ))
 
     print("\n" + "=" * 50)
     print(f"Content Loop Complete!")
     print(f"Duration: {duration}ms")
     print(f"Scheduled: {scheduled_count} posts")
+    print(f"Claude tokens: {claude.usage_summary()}")
+    for line in claude.ledger.summary():
+        print(f"  [usage] {line}")
     print("=" * 50)
 
 
@@ -543,4 +603,13 @@ async def run_content_loop():
 # ============================================
 
 if __name__ == "__main__":
-    asyncio.run(run_content_loop())
+    mark_main()
+    parser = argparse.ArgumentParser(description="NovaClaw content loop agent")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="report when heavy dependencies were loaded and what they cost")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_content_loop())
+    finally:
+        if args.startup_profile:
+            print_startup_report()
@@ -0,0 +1,231 @@
+"""
+NovaClaw AI - Async Database Layer
+==================================
+Async repository over the Supabase REST API (PostgREST) for the tables
+the agents touch:
+- content_calendar: scheduled posts and blog articles
+- trends: trend history and the bulk `upsert_trends` RPC
+- agent_logs: batched run logs (see log_sink.py)
+
+All calls share one keep-alive connection pool, so database round trips
+run on the event loop next to Claude and feed requests instead of
+blocking it.
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import asyncio
+from typing import Optional, Dict, List, Set, Any
+
+from claude_client import backoff_delay
+from tracing import span
+from startup import lazy_import
+
+aiohttp = lazy_import("aiohttp")  # Loaded on first use
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+SUPABASE_URL = os.environ.get("SUPABASE_URL")
+SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_TIMEOUT_S = float(os.environ.get("DB_TIMEOUT_S", "30"))
+DB_MAX_RETRIES = int(os.environ.get("DB_MAX_RETRIES", "2"))
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class DatabaseError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================
+# DATABASE
+# ============================================
+
+class Database:
+    """Pooled async client for the agents' Supabase tables.
+
+        async with Database(SUPABASE_URL, SUPABASE_KEY) as db:
+            row = await db.insert_content({...})
+
+    Reads and the idempotent upsert RPC are retried on network errors and
+    408/429/5xx; plain inserts are sent once so a retry never duplicates a row.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = SUPABASE_URL,
+        key: Optional[str] = SUPABASE_KEY,
+        pool_size: int = DB_POOL_SIZE,
+        timeout: float = DB_TIMEOUT_S,
+        max_retries: int = DB_MAX_RETRIES,
+    ):
+        if not url or not key:
+            raise ValueError("Missing Supabase credentials")
+        self.rest_url = f"{url.rstrip('/')}/rest/v1"
+        self.key = key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.requests = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "Database":
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _headers(self, prefer: Optional[str] = None) -> Dict[str, str]:
+        headers = {
+            "apikey": self.key,
+            "Authorization": f"Bearer {self.key}",
+            "Content-Type": "application/json",
+        }
+        if prefer:
+            headers["Prefer"] = prefer
+        return headers
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, str]] = None,
+        payload: Any = None,
+        prefer: Optional[str] = None,
+        retry: bool = True,
+        traced: bool = True,
+    ) -> Any:
+        """Send one PostgREST request; returns the decoded JSON body (None if empty)."""
+        if self._session is None:
+            raise RuntimeError("Database must be used inside 'async with'")
+        if not traced:
+            return await self._send(method, path, params, payload, prefer, retry)
+        rows = len(payload) if isinstance(payload, list) else None
+        with span(f"db.{method.lower()}", path=path, rows=rows) as trace:
+            data = await self._send(method, path, params, payload, prefer, retry)
+            if trace is not None and isinstance(data, list):
+                trace.set(returned=len(data))
+            return data
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, str]],
+        payload: Any,
+        prefer: Optional[str],
+        retry: bool,
+    ) -> Any:
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        attempts = self.max_retries + 1 if retry else 1
+        for attempt in range(attempts):
+            self.requests += 1
+            retry_after = None
+            try:
+                async with self._session.request(
+                    method, f"{self.rest_url}/{path}", params=params, json=payload,
+                    headers=self._headers(prefer), timeout=timeout,
+                ) as response:
+                    body = await response.text()
+                    if response.status < 300:
+                        return json.loads(body) if body.strip() else None
+                    error = DatabaseError(f"{method} {path}: {response.status} {body[:300]}",
+                                          response.status)
+                    if response.status not in RETRY_STATUSES:
+                        raise error
+                    retry_after = response.headers.get("retry-after")
+            except asyncio.TimeoutError:
+                error = DatabaseError(f"{method} {path}: timeout after {self.timeout}s")
+            except aiohttp.ClientError as e:
+                error = DatabaseError(f"{method} {path}: {e or type(e).__name__}")
+
+            if attempt < attempts - 1:
+                await asyncio.sleep(backoff_delay(attempt, retry_after, base=0.5, cap=5.0))
+        raise error
+
+    # --- Generic PostgREST ---
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Optional[Dict[str, str]] = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Rows of `table`; filters use PostgREST syntax, e.g. {"score": "gte.0.7"}."""
+        params = {"select": columns, **(filters or {})}
+        if order:
+            params["order"] = order
+        if limit is not None:
+            params["limit"] = str(limit)
+        return await self._request("GET", table, params=params) or []
+
+    async def insert(self, table: str, rows: Any, returning: bool = True,
+                     traced: bool = True) -> List[Dict[str, Any]]:
+        """Insert one row or a list of rows in a single request."""
+        prefer = "return=representation" if returning else "return=minimal"
+        data = await self._request("POST", table, payload=rows, prefer=prefer, retry=False,
+                                   traced=traced)
+        return data or []
+
+    async def rpc(self, function: str, params: Dict[str, Any]) -> Any:
+        return await self._request("POST", f"rpc/{function}", payload=params)
+
+    # --- content_calendar ---
+
+    async def insert_content(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        rows = await self.insert("content_calendar", record)
+        return rows[0] if rows else None
+
+    async def existing_blog_slugs(self, slugs: List[str]) -> Set[str]:
+        """Which of `slugs` are already used by blog posts (one query on
+        idx_content_blog_slug)."""
+        if not slugs:
+            return set()
+        quoted = ",".join(f'"{slug}"' for slug in slugs)
+        rows = await self.select("content_calendar", "performance->>slug", {
+            "platform": "eq.blog",
+            "performance->>slug": f"in.({quoted})",
+        })
+        return {row["slug"] for row in rows if row.get("slug")}
+
+    # --- trends ---
+
+    async def trend_history(self, min_score: float, limit: int) -> List[Dict[str, Any]]:
+        return await self.select("trends", "title,summary",
+                                 {"relevance_score": f"gte.{min_score}"},
+                                 order="scraped_at.desc", limit=limit)
+
+    async def upsert_trends(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Run the upsert_trends function; returns {"inserted": n, "updated": n}."""
+        data = await self.rpc("upsert_trends", {"trend_rows": rows}) or {}
+        counts = data[0] if isinstance(data, list) and data else data
+        return {"inserted": int(counts.get("inserted") or 0),
+                "updated": int(counts.get("updated") or 0)}
+
+    # --- agent_logs ---
+
+    async def insert_logs(self, rows: List[Dict[str, Any]]):
+        # Not traced: these writes carry the spans themselves
+        await self.insert("agent_logs", rows, returning=False, traced=False)
@@ -0,0 +1,458 @@
+"""
+NovaClaw AI - Shared Feed Fetcher
+=================================
+Concurrent RSS/Atom fetching used by both agents:
+- Fans out over all feeds at once with a global concurrency cap
+- Limits simultaneous requests per host (Reddit, hnrss, ...)
+- Enforces one overall deadline for the whole scrape stage
+- Returns results in the same order as the feed list
+- Sends conditional GETs (ETag / Last-Modified) and reuses cached
+  entries from disk when a feed answers 304 Not Modified
+- Parses feed documents on a thread or process pool so a large
+  document never blocks the event loop
+- Optionally streams RSS/Atom incrementally and stops reading the socket
+  once enough entries are found, with a hard cap on response size; the
+  streamed chunks are parsed on the pool too (threads only)
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional, Dict, List, Any
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+
+from tracing import span
+from startup import lazy_import
+
+aiohttp = lazy_import("aiohttp")  # Loaded on first use
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+FEED_CONCURRENCY = int(os.environ.get("FEED_CONCURRENCY", "16"))
+FEED_PER_HOST_LIMIT = int(os.environ.get("FEED_PER_HOST_LIMIT", "2"))
+FEED_DEADLINE_S = float(os.environ.get("FEED_DEADLINE_S", "30"))
+
+FEED_CACHE_ENABLED = os.environ.get("FEED_CACHE", "true").lower() == "true"
+FEED_CACHE_PATH = os.environ.get(
+    "FEED_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "feeds.json"),
+)
+FEED_CACHE_MAX_AGE_S = float(os.environ.get("FEED_CACHE_MAX_AGE_S", str(7 * 24 * 3600)))
+FEED_CACHE_MAX_BYTES = int(os.environ.get("FEED_CACHE_MAX_BYTES", str(5 * 1024 * 1024)))
+
+# "thread" or "process"; process avoids the GIL for very large documents
+FEED_PARSE_EXECUTOR = os.environ.get("FEED_PARSE_EXECUTOR", "thread").lower()
+FEED_PARSE_WORKERS = int(os.environ.get("FEED_PARSE_WORKERS", "4"))
+
+# "stream" stops reading after `max_entries` usable entries; "full" reads the whole body
+FEED_PARSE_MODE = os.environ.get("FEED_PARSE_MODE", "stream").lower()
+FEED_MAX_BYTES = int(os.environ.get("FEED_MAX_BYTES", str(5 * 1024 * 1024)))
+FEED_CHUNK_SIZE = 16 * 1024
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+RSS1_NS = "{http://purl.org/rss/1.0/}"
+ENTRY_TAGS = ("item", f"{RSS1_NS}item", f"{ATOM_NS}entry")
+
+# Only these entry fields are used downstream, so only these are cached
+ENTRY_FIELDS = ("title", "link", "summary")
+
+
+# ============================================
+# DATA CLASSES
+# ============================================
+
+@dataclass
+class FeedResult:
+    feed: Dict
+    entries: List[Any] = field(default_factory=list)
+    status: Optional[int] = None
+    error: Optional[str] = None
+    duration_ms: int = 0
+    parse_ms: int = 0
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status in (200, 304)
+
+
+def simplify_entry(entry: Any) -> Dict[str, str]:
+    """Reduce a feedparser entry to the plain fields the agents use."""
+    return {k: entry.get(k, "") or "" for k in ENTRY_FIELDS}
+
+
+def parse_feed(content: bytes) -> List[Dict[str, str]]:
+    """Parse a feed document into simplified entries (runs inside the parse pool)."""
+    import feedparser  # Only needed in "full" mode or when streaming gives up
+    return [simplify_entry(e) for e in feedparser.parse(content).entries]
+
+
+_parse_executor: Optional[Executor] = None
+_stream_executor: Optional[Executor] = None
+
+
+def get_parse_executor() -> Executor:
+    """Return the shared parse pool, creating it on first use."""
+    global _parse_executor
+    if _parse_executor is None:
+        workers = max(1, FEED_PARSE_WORKERS)
+        if FEED_PARSE_EXECUTOR == "process":
+            _parse_executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _parse_executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="feed-parse"
+            )
+    return _parse_executor
+
+
+def get_stream_executor() -> Executor:
+    """Pool the streaming parser runs on: always threads, its state cannot cross processes."""
+    global _stream_executor
+    if FEED_PARSE_EXECUTOR != "process":
+        return get_parse_executor()
+    if _stream_executor is None:
+        _stream_executor = ThreadPoolExecutor(
+            max_workers=max(1, FEED_PARSE_WORKERS), thread_name_prefix="feed-stream"
+        )
+    return _stream_executor
+
+
+def shutdown_parse_executor():
+    global _parse_executor, _stream_executor
+    for executor in (_parse_executor, _stream_executor):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _parse_executor = _stream_executor = None
+
+
+# ============================================
+# STREAMING PARSER
+# ============================================
+
+def _child_text(elem: ElementTree.Element, *tags: str) -> str:
+    for tag in tags:
+        child = elem.find(tag)
+        if child is not None:
+            text = "".join(child.itertext()).strip()
+            if text:
+                return text
+    return ""
+
+
+def _atom_link(elem: ElementTree.Element) -> str:
+    for link in elem.findall(f"{ATOM_NS}link"):
+        if link.get("rel", "alternate") == "alternate" and link.get("href"):
+            return link.get("href")
+    return ""
+
+
+def element_to_entry(elem: ElementTree.Element) -> Dict[str, str]:
+    """Map an RSS <item> or Atom <entry> element to the simplified entry shape."""
+    return {
+        "title": _child_text(elem, "title", f"{RSS1_NS}title", f"{ATOM_NS}title"),
+        "link": _child_text(elem, "link", f"{RSS1_NS}link") or _atom_link(elem),
+        "summary": _child_text(
+            elem, "description", f"{RSS1_NS}description",
+            f"{ATOM_NS}summary", f"{ATOM_NS}content",
+        ),
+    }
+
+
+class StreamingFeedParser:
+    """Incremental RSS/Atom parser that is done once `max_entries` usable entries are read."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+        self.entries: List[Dict[str, str]] = []
+        self._parser = ElementTree.XMLPullParser(events=("end",))
+
+    @property
+    def done(self) -> bool:
+        return self.max_entries is not None and len(self.entries) >= self.max_entries
+
+    def feed(self, data: bytes):
+        """Feed a chunk; raises ElementTree.ParseError on malformed XML."""
+        self._parser.feed(data)
+        for _, elem in self._parser.read_events():
+            if elem.tag not in ENTRY_TAGS or self.done:
+                continue
+            entry = element_to_entry(elem)
+            elem.clear()  # Keep memory flat on huge feeds
+            if entry["title"]:
+                self.entries.append(entry)
+
+
+# ============================================
+# CONDITIONAL-GET CACHE
+# ============================================
+
+class FeedCache:
+    """On-disk cache of feed validators and entries, keyed by URL."""
+
+    def __init__(self, path: str = FEED_CACHE_PATH,
+                 max_age_s: float = FEED_CACHE_MAX_AGE_S,
+                 max_bytes: int = FEED_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_age_s = max_age_s
+        self.max_bytes = max_bytes
+        self.records: Dict[str, Dict] = {}
+        self.hits = 0
+
+    @classmethod
+    def load(cls, path: str = FEED_CACHE_PATH, **kwargs) -> "FeedCache":
+        cache = cls(path, **kwargs)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cache.records = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"  [warn] Ignoring unreadable feed cache {path}: {e}")
+        cache.evict()
+        return cache
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        record = self.records.get(url)
+        if not record:
+            return {}
+        headers = {}
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    def revalidate(self, url: str, record: Dict) -> List[Dict]:
+        """Entries of `record` after a 304: the copy is current again, so it counts
+        as freshly stored (and is put back if it was evicted meanwhile)."""
+        now = time.time()
+        record["stored_at"] = record["used_at"] = now
+        self.records[url] = record
+        self.hits += 1
+        return record["entries"]
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str],
+              entries: List[Dict]):
+        if not etag and not last_modified:
+            # Without validators a conditional GET is impossible
+            self.records.pop(url, None)
+            return
+        now = time.time()
+        self.records[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "entries": entries,
+            "stored_at": now,
+            "used_at": now,
+        }
+
+    def evict(self):
+        """Drop records older than max_age, then least recently used until under max_bytes."""
+        cutoff = time.time() - self.max_age_s
+        self.records = {
+            url: r for url, r in self.records.items() if r.get("stored_at", 0) >= cutoff
+        }
+        sizes = {url: len(json.dumps(r)) for url, r in self.records.items()}
+        total = sum(sizes.values())
+        for url in sorted(self.records, key=lambda u: self.records[u].get("used_at", 0)):
+            if total <= self.max_bytes:
+                break
+            total -= sizes[url]
+            del self.records[url]
+
+    def save(self):
+        self.evict()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.records, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"  [warn] Failed to write feed cache {self.path}: {e}")
+
+
+# ============================================
+# FETCH ENGINE
+# ============================================
+
+async def _read_entries(
+    response: aiohttp.ClientResponse,
+    max_entries: Optional[int],
+    max_bytes: int,
+    result: FeedResult,
+) -> List[Dict[str, str]]:
+    """Read the body in chunks up to `max_bytes`, parsing as configured by FEED_PARSE_MODE.
+
+    Streamed chunks are parsed on the parse pool one at a time, so a feed's
+    parser is never used by two threads at once and the event loop only
+    waits on the socket.
+    """
+    loop = asyncio.get_running_loop()
+    parser = StreamingFeedParser(max_entries) if FEED_PARSE_MODE == "stream" else None
+    body = bytearray()
+    parse_s = 0.0
+    oversized = False
+
+    async for chunk in response.content.iter_chunked(FEED_CHUNK_SIZE):
+        if len(body) + len(chunk) > max_bytes:
+            oversized = True
+            break
+        body.extend(chunk)
+        if parser is not None:
+            parse_start = time.monotonic()
+            try:
+                await loop.run_in_executor(get_stream_executor(), parser.feed, bytes(chunk))
+            except ElementTree.ParseError:
+                parser = None  # Not well-formed XML: fall back to feedparser
+            parse_s += time.monotonic() - parse_start
+            if parser is not None and parser.done:
+                break  # Leaving the response context closes the socket
+
+    if parser is not None and parser.entries:
+        entries = parser.entries
+    elif oversized:
+        raise ValueError(f"response exceeds {max_bytes} bytes")
+    else:
+        parse_start = time.monotonic()
+        entries = await loop.run_in_executor(get_parse_executor(), parse_feed, bytes(body))
+        parse_s += time.monotonic() - parse_start
+        if max_entries is not None:
+            entries = entries[:max_entries]
+
+    result.parse_ms = int(parse_s * 1000)
+    return entries
+
+
+async def _fetch_one(
+    session: aiohttp.ClientSession,
+    feed_config: Dict,
+    timeout: float,
+    headers: Optional[Dict],
+    global_limit: asyncio.Semaphore,
+    host_limits: Dict[str, asyncio.Semaphore],
+    cache: Optional[FeedCache],
+    max_entries: Optional[int],
+    max_bytes: int,
+) -> FeedResult:
+    url = feed_config["url"]
+    host = urlparse(url).netloc
+    result = FeedResult(feed=feed_config)
+    start = time.monotonic()
+
+    with span("feed.fetch", url=url, source=feed_config.get("source")) as trace:
+        request_headers = dict(headers or {})
+        # Validators are only sent when there is a cached copy to fall back on
+        record = cache.records.get(url) if cache is not None else None
+        if record is not None:
+            request_headers.update(cache.request_headers(url))
+
+        async with global_limit, host_limits[host]:
+            try:
+                async with session.get(
+                    url,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                    headers=request_headers,
+                ) as response:
+                    result.status = response.status
+                    if response.status == 304 and record is not None:
+                        result.entries = cache.revalidate(url, record)
+                        result.cached = True
+                    elif response.status == 200:
+                        result.entries = await _read_entries(
+                            response, max_entries, max_bytes, result
+                        )
+                        if cache is not None:
+                            cache.store(
+                                url,
+                                response.headers.get("ETag"),
+                                response.headers.get("Last-Modified"),
+                                result.entries,
+                            )
+                    else:
+                        result.error = f"HTTP {response.status}"
+            except asyncio.TimeoutError:
+                result.error = f"timeout after {timeout}s"
+            except Exception as e:
+                result.error = str(e) or type(e).__name__
+
+        result.duration_ms = int((time.monotonic() - start) * 1000)
+        if trace is not None:
+            trace.set(status=result.status, entries=len(result.entries or []),
+                      cached=result.cached, parse_ms=result.parse_ms)
+            if result.error:
+                trace.fail(result.error)
+    return result
+
+
+async def fetch_feeds(
+    session: aiohttp.ClientSession,
+    feeds: List[Dict],
+    timeout: float = 15,
+    headers: Optional[Dict] = None,
+    concurrency: int = FEED_CONCURRENCY,
+    per_host: int = FEED_PER_HOST_LIMIT,
+    deadline: float = FEED_DEADLINE_S,
+    cache: Optional[FeedCache] = None,
+    max_entries: Optional[int] = None,
+    max_bytes: int = FEED_MAX_BYTES,
+) -> List[FeedResult]:
+    """Fetch and parse all feeds concurrently; results follow the order of `feeds`.
+
+    `max_entries` caps the entries kept per feed; in stream mode reading
+    stops as soon as that many usable entries are parsed. Without an explicit
+    `cache`, the on-disk feed cache is loaded and saved around the fetch
+    unless FEED_CACHE=false.
+    """
+    if not feeds:
+        return []
+
+    owns_cache = cache is None and FEED_CACHE_ENABLED
+    if owns_cache:
+        cache = FeedCache.load()
+
+    global_limit = asyncio.Semaphore(max(1, concurrency))
+    host_limits = {
+        urlparse(f["url"]).netloc: asyncio.Semaphore(max(1, per_host))
+        for f in feeds
+    }
+
+    tasks = [
+        asyncio.create_task(
+            _fetch_one(
+                session, f, timeout, headers, global_limit, host_limits,
+                cache, max_entries, max_bytes,
+            )
+        )
+        for f in feeds
+    ]
+
+    # One deadline for the whole stage: whatever is still running gets cancelled
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for feed_config, task in zip(feeds, tasks):
+        if task in done and not task.cancelled():
+            results.append(task.result())
+        else:
+            results.append(FeedResult(
+                feed=feed_config,
+                error=f"stage deadline of {deadline}s exceeded",
+                duration_ms=int(deadline * 1000),
+            ))
+
+    if owns_cache:
+        cache.save()
+    return results
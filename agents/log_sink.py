@@ -0,0 +1,157 @@
+"""
+NovaClaw AI - Buffered Agent Log Writer
+=======================================
+`agent_logs` rows are queued in memory and written in batches by a
+background task, so logging never waits for a database round trip:
+- bounded queue; records beyond LOG_QUEUE_SIZE are dropped and counted
+- a batch is written when LOG_BATCH_SIZE rows are waiting or
+  LOG_FLUSH_INTERVAL_S has passed since the oldest one
+- `async with LogSink(...)` always drains and flushes on exit, also
+  when the run fails
+- rows get their `id` client-side, so trace spans can reference their
+  parent before it is written; a row waits until its parent_log_id row
+  has been written (or goes in the same batch), which keeps the foreign
+  key satisfied
+- without a database (dry runs) rows are counted, never queued
+"""
+
+import os
+import uuid
+import asyncio
+from typing import Optional, Dict, List, Set, Any
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "500"))
+LOG_BATCH_SIZE = int(os.environ.get("LOG_BATCH_SIZE", "50"))
+LOG_FLUSH_INTERVAL_S = float(os.environ.get("LOG_FLUSH_INTERVAL_S", "5"))
+
+
+class LogSink:
+    """Non-blocking, batching writer for agent_logs rows."""
+
+    def __init__(
+        self,
+        db: Optional[Any],
+        max_queue: int = LOG_QUEUE_SIZE,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL_S,
+    ):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queue))
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.skipped = 0  # Rows not written because there is no database
+        self._written: Set[str] = set()
+        self._waiting: Dict[str, List[Dict[str, Any]]] = {}  # parent id → rows
+        self._task: Optional[asyncio.Task] = None
+        self._closing = asyncio.Event()
+
+    def log(self, row: Dict[str, Any]) -> Optional[str]:
+        """Queue one row; returns its id, or None (counted as a drop) when the queue is full."""
+        row = {"id": str(uuid.uuid4()), **row}
+        if self.db is None:
+            self.skipped += 1
+            return row["id"]
+        try:
+            self.queue.put_nowait(row)
+            return row["id"]
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the writer after flushing everything still queued."""
+        self._closing.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self._flush(self._drain())  # Rows queued without a running writer
+        orphans = [row for rows in self._waiting.values() for row in rows]
+        self._waiting.clear()
+        await self._flush(orphans, final=True)
+        if self.skipped:
+            print(f"  [dry-run] agent_logs: {self.skipped} rows not written (no database)")
+        if self.dropped or self.failed:
+            print(f"  [warn] agent_logs: {self.dropped} dropped, {self.failed} failed to write")
+
+    async def __aenter__(self) -> "LogSink":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _drain(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = []
+        while not self.queue.empty() and (limit is None or len(rows) < limit):
+            rows.append(self.queue.get_nowait())
+        return rows
+
+    async def _run(self):
+        while not (self._closing.is_set() and self.queue.empty()):
+            try:
+                first = await asyncio.wait_for(self.queue.get(), timeout=0.1)
+            except asyncio.TimeoutError:
+                continue
+            rows = [first]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(rows) < self.batch_size and not self._closing.is_set():
+                rows.extend(self._drain(self.batch_size - len(rows)))
+                remaining = deadline - asyncio.get_running_loop().time()
+                if len(rows) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    rows.append(await asyncio.wait_for(self.queue.get(), timeout=min(remaining, 0.1)))
+                except asyncio.TimeoutError:
+                    pass
+            rows.extend(self._drain(self.batch_size - len(rows)))
+            await self._flush(rows)
+
+    def _ready(self, rows: List[Dict[str, Any]], final: bool) -> List[Dict[str, Any]]:
+        """Rows whose parent is written or in this batch; the others wait for it.
+
+        On the final flush nothing waits: a parent that never made it (dropped
+        or failed) is unlinked so its children can still be written.
+        """
+        ready, batch_ids = [], set()
+        final_ids = {row["id"] for row in rows} if final else set()
+        pending = list(rows)
+        while pending:
+            row = pending.pop()
+            parent = row.get("parent_log_id")
+            if parent and parent not in self._written and parent not in batch_ids:
+                if not final:
+                    self._waiting.setdefault(parent, []).append(row)
+                    continue
+                if parent not in final_ids:
+                    row["parent_log_id"] = None
+            ready.append(row)
+            batch_ids.add(row["id"])
+            pending.extend(self._waiting.pop(row["id"], []))
+        # PostgREST bulk inserts need the same keys on every row
+        keys = list(dict.fromkeys(key for row in ready for key in row))
+        return [{key: row.get(key) for key in keys} for row in ready]
+
+    async def _flush(self, rows: List[Dict[str, Any]], final: bool = False):
+        rows = self._ready(rows, final)
+        if not rows:
+            return
+        try:
+            await self.db.insert_logs(rows)
+            self._written.update(row["id"] for row in rows)
+            self.written += len(rows)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(rows)
+            print(f"  [warn] Failed to write {len(rows)} agent_logs rows: {e}")
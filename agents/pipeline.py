@@ -0,0 +1,265 @@
+"""
+NovaClaw AI - Pipeline Helpers
+==============================
+Concurrency helpers shared by both agents:
+- map_bounded: run one coroutine per item with a concurrency limit,
+  keeping input order and reporting failures per item
+- StagePipeline: queue-connected stages with their own worker counts;
+  each item moves on as soon as its stage is done, and bounded queues
+  give back-pressure
+- current_stage: the stage the running task belongs to (used to attribute
+  Claude usage); set by StagePipeline workers or with stage_scope()
+"""
+
+import os
+import time
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Any, Callable, Awaitable, Iterable
+from dataclasses import dataclass, field
+
+from tracing import span
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+GENERATION_CONCURRENCY = int(os.environ.get("GENERATION_CONCURRENCY", "3"))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "8"))
+
+NO_RESULT = "no result"  # Failure recorded for an item whose func returned None
+
+
+current_stage: ContextVar[Optional[str]] = ContextVar("current_stage", default=None)
+
+
+@contextmanager
+def stage_scope(name: str):
+    """Run a block (and the tasks it starts) as stage `name`."""
+    token = current_stage.set(name)
+    try:
+        yield
+    finally:
+        current_stage.reset(token)
+
+
+def stage_workers(defaults: Dict[str, int]) -> Dict[str, int]:
+    """Per-stage worker counts, overridable as PIPELINE_WORKERS="generate=4,critic=2"."""
+    workers = dict(defaults)
+    for part in os.environ.get("PIPELINE_WORKERS", "").split(","):
+        name, _, count = part.partition("=")
+        if name.strip() in workers and count.strip().isdigit():
+            workers[name.strip()] = max(1, int(count))
+    return workers
+
+
+# ============================================
+# DATA CLASSES
+# ============================================
+
+@dataclass
+class ItemResult:
+    item: Any
+    value: Any = None
+    error: Optional[str] = None
+    duration_ms: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+    # Barrier stage: waits for every item, then func(list) -> list (e.g. a Message Batch)
+    collect: bool = False
+
+
+@dataclass
+class StageFailure:
+    index: int
+    stage: str
+    error: str
+
+
+@dataclass
+class PipelineResult:
+    outputs: List[Any] = field(default_factory=list)
+    failures: List[StageFailure] = field(default_factory=list)
+    stage_ms: Dict[str, List[int]] = field(default_factory=dict)
+    stage_passed: Dict[str, int] = field(default_factory=dict)
+    duration_ms: int = 0
+
+    def summary(self) -> List[str]:
+        lines = []
+        for name, timings in self.stage_ms.items():
+            if timings:
+                lines.append(f"{name}: {self.stage_passed.get(name, 0)}/{len(timings)} passed, "
+                             f"max {max(timings)}ms, total {sum(timings)}ms")
+        return lines
+
+
+# ============================================
+# BOUNDED MAP
+# ============================================
+
+async def map_bounded(
+    func: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    limit: int = GENERATION_CONCURRENCY,
+) -> List[ItemResult]:
+    """Await func(item) for every item, at most `limit` at a time.
+
+    Results come back in input order. An exception, or a None return value,
+    marks only that item as failed.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: Any) -> ItemResult:
+        result = ItemResult(item=item)
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                result.value = await func(item)
+                if result.value is None:
+                    result.error = NO_RESULT
+            except Exception as e:
+                result.error = str(e) or type(e).__name__
+            result.duration_ms = int((time.monotonic() - start) * 1000)
+        return result
+
+    return await asyncio.gather(*(run(item) for item in items))
+
+
+# ============================================
+# STAGE PIPELINE
+# ============================================
+
+_DONE = object()
+
+
+class StagePipeline:
+    """Run items through queue-connected stages.
+
+    A stage's func receives the previous stage's output and returns the
+    next item, or None to drop it (rejected, failed). A None return or an
+    exception drops only that item and is recorded, with the stage name, in
+    PipelineResult.failures. Each item gets its own stage.<name> span.
+    Outputs of the last stage are returned in input order.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.stages = stages
+        self.queue_size = queue_size
+
+    async def run(self, items: Iterable[Any]) -> PipelineResult:
+        start = time.monotonic()
+        result = PipelineResult(
+            stage_ms={stage.name: [] for stage in self.stages},
+            stage_passed={stage.name: 0 for stage in self.stages},
+        )
+        queues = [asyncio.Queue(maxsize=max(1, self.queue_size)) for _ in self.stages]
+        sink: asyncio.Queue = asyncio.Queue()
+        outboxes = queues[1:] + [sink]
+        outputs: List[Any] = []
+
+        async def feed():
+            for index, item in enumerate(items):
+                await queues[0].put((index, item))  # Blocks when the first stage is saturated
+            for _ in range(self._worker_count(self.stages[0])):
+                await queues[0].put(_DONE)
+
+        async def drain():
+            while True:
+                entry = await sink.get()
+                if entry is _DONE:
+                    return
+                outputs.append(entry)
+
+        async def run_stage(position: int):
+            stage = self.stages[position]
+            inbox, outbox = queues[position], outboxes[position]
+            worker = self._collect_worker if stage.collect else self._worker
+            await asyncio.gather(*(
+                worker(stage, inbox, outbox, result)
+                for _ in range(self._worker_count(stage))
+            ))
+            downstream = (self._worker_count(self.stages[position + 1])
+                          if position + 1 < len(self.stages) else 1)
+            for _ in range(downstream):
+                await outbox.put(_DONE)
+
+        await asyncio.gather(feed(), drain(), *(run_stage(i) for i in range(len(self.stages))))
+
+        result.outputs = [value for _, value in sorted(outputs, key=lambda entry: entry[0])]
+        result.failures.sort(key=lambda failure: failure.index)
+        result.duration_ms = int((time.monotonic() - start) * 1000)
+        return result
+
+    @staticmethod
+    def _worker_count(stage: Stage) -> int:
+        return 1 if stage.collect else max(1, stage.workers)
+
+    @staticmethod
+    async def _worker(stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                      result: PipelineResult):
+        current_stage.set(stage.name)  # Workers run as their own tasks
+        while True:
+            entry = await inbox.get()
+            if entry is _DONE:
+                return
+            index, value = entry
+            started = time.monotonic()
+            # One span per item: time spent waiting on the inbox is not stage work
+            with span(f"stage.{stage.name}", item=index) as trace:
+                try:
+                    output = await stage.func(value)
+                    error = None if output is not None else NO_RESULT
+                except Exception as e:
+                    output, error = None, str(e) or type(e).__name__
+                if error is not None:
+                    result.failures.append(StageFailure(index, stage.name, error))
+                    if trace is not None:
+                        trace.fail(error)
+            result.stage_ms[stage.name].append(int((time.monotonic() - started) * 1000))
+            if output is not None:
+                result.stage_passed[stage.name] += 1
+                await outbox.put((index, output))
+
+    @staticmethod
+    async def _collect_worker(stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                              result: PipelineResult):
+        current_stage.set(stage.name)
+        entries = []
+        while True:
+            entry = await inbox.get()
+            if entry is _DONE:
+                break
+            entries.append(entry)
+        if not entries:
+            return
+
+        started = time.monotonic()
+        with span(f"stage.{stage.name}", items=len(entries)) as trace:
+            try:
+                outputs = await stage.func([value for _, value in entries])
+                error = None
+            except Exception as e:
+                outputs, error = [None] * len(entries), str(e) or type(e).__name__
+            if trace is not None:
+                trace.set(passed=sum(output is not None for output in outputs))
+                if error is not None:
+                    trace.fail(error)
+        elapsed = int((time.monotonic() - started) * 1000)
+
+        for (index, _), output in zip(entries, outputs):
+            result.stage_ms[stage.name].append(elapsed)
+            if output is None:
+                result.failures.append(StageFailure(index, stage.name, error or NO_RESULT))
+            else:
+                result.stage_passed[stage.name] += 1
+                await outbox.put((index, output))
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+NovaClaw AI - Local Trend Pre-ranker
+====================================
+BM25 relevance of every trend (title + summary) against a weighted
+NovaClaw topic profile, computed in one vectorized NumPy pass. The
+profile is the static topic vocabulary below, optionally extended with
+terms from past high-scoring trends.
+
+Used as the offline scorer when there is no API key, and to pick the
+top-K candidates that are worth sending to Claude.
+
+Benchmark over synthetic headlines:
+
+    python agents/ranker.py --bench 5000
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import math
+import time
+import random
+import argparse
+from collections import Counter
+from typing import Optional, Dict, List, Any, Iterable, Tuple
+
+from startup import lazy_import
+
+np = lazy_import("numpy")  # Loaded on first use
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+RANKER_TOP_K = int(os.environ.get("RANKER_TOP_K", "40"))
+RANKER_K1 = float(os.environ.get("RANKER_K1", "1.2"))
+RANKER_B = float(os.environ.get("RANKER_B", "0.75"))
+# Raw BM25 score that maps to a relevance of 0.5
+RANKER_SATURATION = float(os.environ.get("RANKER_SATURATION", "6.0"))
+# Weight of terms learned from past high-scoring trends, relative to TOPIC_TERMS
+RANKER_HISTORY_WEIGHT = float(os.environ.get("RANKER_HISTORY_WEIGHT", "0.5"))
+
+# NovaClaw topic vocabulary: term → weight
+TOPIC_TERMS: Dict[str, float] = {
+    "agent": 3.0, "agents": 3.0, "agentic": 3.0, "automation": 3.0, "automate": 2.5,
+    "ai": 2.0, "llm": 2.0, "llms": 2.0, "gpt": 1.5, "claude": 1.5, "openai": 1.5,
+    "anthropic": 1.5, "gemini": 1.2, "copilot": 1.5, "chatbot": 1.5, "assistant": 1.2,
+    "business": 2.0, "enterprise": 2.0, "b2b": 2.5, "saas": 2.0, "smb": 2.5,
+    "startup": 1.5, "company": 1.0, "companies": 1.0, "workflow": 2.0, "workflows": 2.0,
+    "marketing": 2.0, "sales": 1.5, "customer": 1.2, "productivity": 1.5, "growth": 1.2,
+    "model": 1.0, "models": 1.0, "launch": 0.8, "tool": 1.0, "tools": 1.0,
+    "seo": 1.5, "aio": 2.0, "search": 0.8, "content": 1.0,
+    "openclaw": 3.0, "nemoclaw": 3.0, "novaclaw": 3.0,
+}
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have how in into is it its new of on or
+that the their this to was were what when why will with you your de het een en van
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+# ============================================
+# TOPIC PROFILE
+# ============================================
+
+def build_profile(
+    history: Iterable[str] = (),
+    base: Dict[str, float] = TOPIC_TERMS,
+    history_weight: float = RANKER_HISTORY_WEIGHT,
+    max_history_terms: int = 200,
+) -> Dict[str, float]:
+    """Topic vocabulary plus the most frequent terms of past high-scoring trends."""
+    profile = dict(base)
+    counts = Counter(token for text in history for token in tokenize(text)
+                     if token not in STOP_WORDS and len(token) > 2 and not token.isdigit())
+    if counts:
+        top = counts.most_common(max_history_terms)
+        peak = top[0][1]
+        for term, count in top:
+            profile[term] = profile.get(term, 0.0) + history_weight * count / peak
+    return profile
+
+
+async def fetch_history(db: Optional[Any], min_score: float = 0.7, limit: int = 200) -> List[str]:
+    """Titles and summaries of recent trends that scored at least `min_score` (none without a db)."""
+    if db is None:
+        return []
+    try:
+        rows = await db.trend_history(min_score, limit)
+    except Exception as e:
+        print(f"  [warn] Could not load trend history: {e}")
+        return []
+    return [f"{row.get('title') or ''} {row.get('summary') or ''}" for row in rows]
+
+
+# ============================================
+# BM25 RANKER
+# ============================================
+
+class TrendRanker:
+    """Vectorized BM25 of documents against a weighted query profile.
+
+    Only profile terms are materialized: the term-frequency matrix is
+    (documents × profile terms), filled with one np.bincount call.
+    """
+
+    def __init__(self, profile: Optional[Dict[str, float]] = None,
+                 k1: float = RANKER_K1, b: float = RANKER_B,
+                 saturation: float = RANKER_SATURATION):
+        profile = profile or TOPIC_TERMS
+        self.terms = list(profile)
+        self.index = {term: i for i, term in enumerate(self.terms)}
+        self.weights = np.array([profile[t] for t in self.terms], dtype=np.float64)
+        self.k1 = k1
+        self.b = b
+        self.saturation = saturation
+
+    def term_frequencies(self, docs: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(tf matrix, document lengths) for the profile terms."""
+        rows, cols = [], []
+        lengths = np.empty(len(docs), dtype=np.float64)
+        index = self.index
+        for row, doc in enumerate(docs):
+            tokens = tokenize(doc)
+            lengths[row] = len(tokens)
+            hits = [index[token] for token in tokens if token in index]
+            rows.extend([row] * len(hits))
+            cols.extend(hits)
+        width = len(self.terms)
+        flat = np.asarray(rows, dtype=np.intp) * width + np.asarray(cols, dtype=np.intp)
+        tf = np.bincount(flat, minlength=len(docs) * width).reshape(len(docs), width)
+        return tf.astype(np.float64), lengths
+
+    def bm25(self, docs: List[str]) -> np.ndarray:
+        """Raw BM25 score per document."""
+        if not docs:
+            return np.zeros(0)
+        tf, lengths = self.term_frequencies(docs)
+        n_docs = len(docs)
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1.0 - self.b + self.b * lengths / max(lengths.mean(), 1.0))
+        saturated = tf * (self.k1 + 1.0) / (tf + norm[:, None])
+        return saturated @ (idf * self.weights)
+
+    def relevance(self, docs: List[str]) -> np.ndarray:
+        """BM25 mapped to 0.0-1.0 (RANKER_SATURATION scores 0.5)."""
+        scores = self.bm25(docs)
+        return scores / (scores + self.saturation)
+
+    def top_k(self, docs: List[str], k: int = RANKER_TOP_K) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices of the k most relevant docs (best first) and every doc's relevance."""
+        relevance = self.relevance(docs)
+        k = min(k, len(docs))
+        if k <= 0:
+            return np.zeros(0, dtype=np.intp), relevance
+        top = np.argpartition(-relevance, k - 1)[:k]
+        return top[np.argsort(-relevance[top], kind="stable")], relevance
+
+
+def trend_text(trend: Any) -> str:
+    return f"{trend.title} {getattr(trend, 'summary', '') or ''}"
+
+
+def prerank(trends: List[Any], history: Iterable[str] = (),
+            k: int = RANKER_TOP_K) -> Tuple[List[int], List[float]]:
+    """Top-k trend indices (best first) and the local relevance of every trend."""
+    ranker = TrendRanker(build_profile(history))
+    top, relevance = ranker.top_k([trend_text(t) for t in trends], k)
+    return top.tolist(), relevance.round(3).tolist()
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+_BENCH_SUBJECTS = ["OpenAI", "Anthropic", "A startup", "Google", "The EU", "Researchers",
+                   "A Dutch bank", "Apple", "Microsoft", "A SaaS company", "Gamers"]
+_BENCH_VERBS = ["launches", "ships", "tests", "bans", "acquires", "releases", "explores"]
+_BENCH_OBJECTS = ["AI agents for customer support", "workflow automation for SMB teams",
+                  "a new LLM for enterprise search", "a football transfer", "a crypto exchange",
+                  "marketing automation tools", "a smartphone camera", "an agentic B2B sales copilot",
+                  "quarterly earnings", "a climate report", "open-source model weights"]
+
+
+def synthetic_headlines(count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(_BENCH_SUBJECTS)} {rng.choice(_BENCH_VERBS)} {rng.choice(_BENCH_OBJECTS)} "
+            f"— {rng.choice(_BENCH_OBJECTS)} in {rng.randint(2020, 2030)}"
+            for _ in range(count)]
+
+
+def naive_bm25(docs: List[str], profile: Dict[str, float],
+               k1: float = RANKER_K1, b: float = RANKER_B) -> List[float]:
+    """Reference pure-Python BM25, used to check and time the vectorized version."""
+    tokenized = [tokenize(doc) for doc in docs]
+    avg_len = max(sum(map(len, tokenized)) / max(len(docs), 1), 1.0)
+    df = Counter(term for tokens in tokenized for term in set(tokens) if term in profile)
+    scores = []
+    for tokens in tokenized:
+        counts = Counter(tokens)
+        score = 0.0
+        for term, weight in profile.items():
+            tf = counts.get(term, 0)
+            if tf:
+                idf = math.log1p((len(docs) - df[term] + 0.5) / (df[term] + 0.5))
+                score += weight * idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def run_benchmark(count: int, k: int, repeat: int = 3) -> Dict[str, Any]:
+    docs = synthetic_headlines(count)
+    profile = build_profile(synthetic_headlines(200, seed=11))
+    ranker = TrendRanker(profile)
+
+    def best(func) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000
+
+    vector_ms = best(lambda: ranker.bm25(docs))
+    naive_ms = best(lambda: naive_bm25(docs, profile))
+    assert np.allclose(ranker.bm25(docs), naive_bm25(docs, profile))
+    top, _ = ranker.top_k(docs, k)
+    return {
+        "headlines": count,
+        "profile_terms": len(profile),
+        "vectorized_ms": round(vector_ms, 2),
+        "naive_ms": round(naive_ms, 2),
+        "speedup": round(naive_ms / max(vector_ms, 1e-6), 1),
+        "sent_to_claude": len(top),
+        "claude_share": round(len(top) / max(count, 1), 4),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local trend pre-ranker")
+    parser.add_argument("--bench", type=int, default=5000, help="number of synthetic headlines")
+    parser.add_argument("--top-k", type=int, default=RANKER_TOP_K)
+    args = parser.parse_args()
+
+    for count in sorted({100, 1000, args.bench}):
+        print(run_benchmark(count, args.top_k))
@@ -0,0 +1,103 @@
+"""
+NovaClaw AI - Claude Response Cache
+===================================
+Content-addressed cache for Anthropic Messages responses, stored in a
+local SQLite file. The key is a SHA-256 of the request payload (model,
+max_tokens, messages and any other body params), so identical prompts
+on re-runs and workflow_dispatch retries are answered from disk.
+Entries expire after a TTL; beyond `max_entries` the least recently
+used rows are evicted.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Optional, Dict, Any
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+CLAUDE_CACHE_ENABLED = os.environ.get("CLAUDE_CACHE", "true").lower() == "true"
+CLAUDE_CACHE_PATH = os.environ.get(
+    "CLAUDE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "claude.sqlite3"),
+)
+CLAUDE_CACHE_TTL_S = float(os.environ.get("CLAUDE_CACHE_TTL_S", str(24 * 3600)))
+CLAUDE_CACHE_MAX_ENTRIES = int(os.environ.get("CLAUDE_CACHE_MAX_ENTRIES", "2000"))
+
+
+def cache_key(payload: Dict[str, Any]) -> str:
+    """Stable hash of a Messages request body."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed TTL + LRU cache of raw Messages API response bodies."""
+
+    def __init__(self, path: str = CLAUDE_CACHE_PATH,
+                 ttl_s: float = CLAUDE_CACHE_TTL_S,
+                 max_entries: int = CLAUDE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] < now - self.ttl_s:
+            self.misses += 1
+            return None
+        self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, response: Dict[str, Any]):
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, json.dumps(response), now, now),
+        )
+        self.evict(now)
+        self._conn.commit()
+
+    def delete(self, key: str):
+        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def evict(self, now: Optional[float] = None):
+        """Delete expired rows, then the least recently used beyond max_entries."""
+        now = now or time.time()
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_s,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+NovaClaw AI - Unified Agent Runner
+==================================
+Runs the blog generator and the content loop in one process:
+- the union of AI_RSS_FEEDS and RSS_FEEDS is fetched and parsed once;
+  feeds both lists contain (hnrss.org, TechCrunch) are requested once
+- one HTTP session, one Supabase connection pool + log sink and one
+  Claude connection pool serve both agents (see runtime.py)
+- both pipelines then run concurrently, each on its own feed results
+  and with its own usage ledger
+
+    python agents/run_agents.py
+    python agents/run_agents.py --skip content_loop
+"""
+
+import sys
+import asyncio
+import argparse
+import traceback
+from dataclasses import replace
+from typing import Optional, Dict, List
+
+from feeds import fetch_feeds, FeedResult
+from runtime import open_runtime
+from startup import mark_main, print_startup_report
+import blog_generator
+import content_loop
+
+AGENTS = {
+    "blog_generator": (blog_generator.run_blog_generator, blog_generator.AI_RSS_FEEDS),
+    "content_loop": (content_loop.run_content_loop, content_loop.RSS_FEEDS),
+}
+
+
+def union_feeds(feed_lists: List[List[Dict]]) -> List[Dict]:
+    """All feeds of `feed_lists`, each URL once (first config wins)."""
+    feeds: Dict[str, Dict] = {}
+    for feed_list in feed_lists:
+        for feed in feed_list:
+            feeds.setdefault(feed["url"], feed)
+    return list(feeds.values())
+
+
+def results_for(feed_list: List[Dict], by_url: Dict[str, FeedResult]) -> List[FeedResult]:
+    """One agent's results, labelled with that agent's own feed configs."""
+    return [replace(by_url[feed["url"]], feed=feed) for feed in feed_list]
+
+
+async def run_agents(names: Optional[List[str]] = None) -> int:
+    """Run the named agents (default: all) concurrently; returns the number that raised."""
+    names = names or list(AGENTS)
+    # Both agents read the same DRY_RUN variable
+    async with open_runtime(blog_generator.DRY_RUN) as runtime:
+        feed_lists = [AGENTS[name][1] for name in names]
+        feeds = union_feeds(feed_lists)
+        print(f"Fetching {len(feeds)} feeds for {', '.join(names)} "
+              f"({sum(len(f) for f in feed_lists) - len(feeds)} shared)...")
+        # The blog agent's longer timeout and User-Agent cover both lists
+        results = await fetch_feeds(runtime.session, feeds, timeout=15,
+                                    headers=blog_generator.FEED_HEADERS, max_entries=5)
+        by_url = {result.feed["url"]: result for result in results}
+
+        outcomes = await asyncio.gather(*[
+            AGENTS[name][0](replace(runtime, feed_results=results_for(AGENTS[name][1], by_url)))
+            for name in names
+        ], return_exceptions=True)
+
+    failed = 0
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, BaseException):
+            failed += 1
+            print(f"[error] {name} failed: {outcome!r}")
+            traceback.print_exception(type(outcome), outcome, outcome.__traceback__)
+    return failed
+
+
+if __name__ == "__main__":
+    mark_main()
+    parser = argparse.ArgumentParser(description="Run the NovaClaw agents in one process")
+    parser.add_argument("--skip", nargs="*", choices=list(AGENTS), default=[],
+                        help="agents not to run")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="report when heavy dependencies were loaded and what they cost")
+    args = parser.parse_args()
+
+    names = [name for name in AGENTS if name not in args.skip]
+    if not names:
+        print("Nothing to run")
+        sys.exit(0)
+    try:
+        failed = asyncio.run(run_agents(names))
+    finally:
+        if args.startup_profile:
+            print_startup_report()
+    sys.exit(1 if failed else 0)
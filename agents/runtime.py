@@ -0,0 +1,48 @@
+"""
+NovaClaw AI - Shared Agent Runtime
+==================================
+The clients an agent run works with, opened once per process:
+- Database and the LogSink that batches agent_logs writes; dry runs
+  get no Database at all (db is None) and their log rows are only counted
+- one aiohttp session for feeds and image checks
+- one pooled ClaudeClient; each agent run takes a view of it with its
+  own usage ledger (see ClaudeClient.view)
+
+An agent started on its own opens a runtime for itself; run_agents.py
+opens one and hands it to both agents, together with the feed results
+it fetched once for both.
+"""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager, AsyncExitStack
+from dataclasses import dataclass
+from typing import Optional, List, AsyncIterator
+
+from feeds import FeedResult
+from claude_client import ClaudeClient
+from database import Database
+from log_sink import LogSink
+from startup import lazy_import
+
+aiohttp = lazy_import("aiohttp")  # Loaded on first use
+
+
+@dataclass
+class Runtime:
+    db: Optional[Database]  # None in dry runs
+    logs: LogSink
+    session: aiohttp.ClientSession
+    claude: ClaudeClient
+    # Feeds already fetched for this agent (None = the agent scrapes itself)
+    feed_results: Optional[List[FeedResult]] = None
+
+
+@asynccontextmanager
+async def open_runtime(dry_run: bool = False) -> AsyncIterator[Runtime]:
+    async with AsyncExitStack() as stack:
+        db = None if dry_run else await stack.enter_async_context(Database())
+        logs = await stack.enter_async_context(LogSink(db))
+        session = await stack.enter_async_context(aiohttp.ClientSession())
+        claude = await stack.enter_async_context(ClaudeClient())
+        yield Runtime(db, logs, session, claude)
@@ -0,0 +1,156 @@
+"""
+NovaClaw AI - Trend Scoring Engine
+==================================
+Scores any number of trends with Claude:
+- trends are split into chunks that are scored concurrently
+  (or submitted as one Message Batch per round in batch mode)
+- every trend gets a short ID and Claude answers through the
+  record_scores tool with {"scores": {"id": score}}, so a dropped or
+  extra score never shifts the others
+- the response is checked for coverage and only the missing IDs are
+  asked again, for up to SCORING_MAX_ROUNDS rounds
+"""
+
+import os
+from typing import Optional, Dict, List, Any, Callable, Tuple
+from dataclasses import dataclass, field
+
+from claude_client import ClaudeClient, ClaudeResult, CLAUDE_BATCH_MODE
+from pipeline import map_bounded, stage_scope
+from tracing import span
+from structured import SCORES, parse_output
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+SCORING_CHUNK_SIZE = int(os.environ.get("SCORING_CHUNK_SIZE", "20"))
+SCORING_CONCURRENCY = int(os.environ.get("SCORING_CONCURRENCY", "4"))
+SCORING_MAX_ROUNDS = int(os.environ.get("SCORING_MAX_ROUNDS", "3"))
+
+
+def scoring_max_tokens(count: int) -> int:
+    """Output budget for a chunk: roughly 10 tokens per '"t123": 0.85' entry."""
+    return 50 + 12 * count
+
+
+# ============================================
+# DATA CLASSES
+# ============================================
+
+@dataclass
+class ScoringReport:
+    scores: Dict[str, float] = field(default_factory=dict)
+    requests: int = 0
+    rounds: int = 0
+    missing: List[str] = field(default_factory=list)
+    # Entries dropped during validation: unknown IDs, non-numeric scores
+    invalid: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        total = len(self.scores) + len(self.missing)
+        return (f"{len(self.scores)}/{total} scored in {self.requests} requests, "
+                f"{self.rounds} round(s), {len(self.missing)} missing, {self.invalid} invalid")
+
+
+# ============================================
+# HELPERS
+# ============================================
+
+def trend_ids(count: int) -> List[str]:
+    """Short, stable IDs for a trend list: t1, t2, ..."""
+    return [f"t{i + 1}" for i in range(count)]
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def parse_scores(data: Any, expected: set) -> Tuple[Dict[str, float], int]:
+    """Validate a parsed scoring response against the IDs that were asked.
+
+    Accepts {"t1": 0.8, ...} or [{"id": "t1", "score": 0.8}, ...]. Scores are
+    clamped to 0.0-1.0; unknown IDs and non-numeric values are counted as invalid.
+    """
+    if isinstance(data, list):
+        data = {str(entry.get("id")): entry.get("score")
+                for entry in data if isinstance(entry, dict)}
+    if not isinstance(data, dict):
+        raise ValueError(f"expected an object of scores, got {type(data).__name__}")
+
+    scores, invalid = {}, 0
+    for key, value in data.items():
+        key = str(key).strip()
+        if key not in expected or isinstance(value, bool):
+            invalid += 1
+            continue
+        try:
+            scores[key] = min(max(float(value), 0.0), 1.0)
+        except (TypeError, ValueError):
+            invalid += 1
+    return scores, invalid
+
+
+# ============================================
+# SCORING ENGINE
+# ============================================
+
+async def score_by_id(
+    entries: List[Tuple[str, Any]],
+    build_request: Callable[[List[Tuple[str, Any]]], Dict[str, Any]],
+    claude: ClaudeClient,
+    chunk_size: int = SCORING_CHUNK_SIZE,
+    concurrency: int = SCORING_CONCURRENCY,
+    max_rounds: int = SCORING_MAX_ROUNDS,
+    use_batch: Optional[bool] = None,
+) -> ScoringReport:
+    """Score (id, item) entries in chunks until every ID has a score.
+
+    `build_request(chunk)` returns Messages API params for one chunk,
+    including SCORES.request_params(). Each round only the IDs still
+    missing are chunked and asked again.
+    """
+    use_batch = CLAUDE_BATCH_MODE if use_batch is None else use_batch
+    report = ScoringReport()
+    pending = list(entries)
+    # Claude usage of these calls is attributed to the "score" stage
+    with stage_scope("score"), span("stage.score", trends=len(entries)) as trace:
+        while pending and report.rounds < max_rounds:
+            report.rounds += 1
+            chunks = chunked(pending, chunk_size)
+            requests = [build_request(chunk) for chunk in chunks]
+            report.requests += len(requests)
+
+            if use_batch:
+                custom_ids = [f"score-r{report.rounds}-c{i}" for i in range(len(chunks))]
+                batched = await claude.batch(dict(zip(custom_ids, requests)))
+                results = [batched[custom_id] for custom_id in custom_ids]
+            else:
+                outcomes = await map_bounded(lambda request: claude.messages(**request),
+                                             requests, concurrency)
+                results = [outcome.value if outcome.ok
+                           else ClaudeResult(ok=False, error=outcome.error)
+                           for outcome in outcomes]
+
+            for chunk, result in zip(chunks, results):
+                if not result.ok:
+                    report.errors.append(f"{result.status}: {(result.error or '')[:200]}")
+                    continue
+                try:
+                    output = parse_output(result, SCORES)
+                    scores, invalid = parse_scores(output["scores"], {key for key, _ in chunk})
+                except Exception as e:
+                    report.errors.append(str(e))
+                    continue
+                report.scores.update(scores)
+                report.invalid += invalid
+
+            pending = [entry for entry in entries if entry[0] not in report.scores]
+
+        if trace is not None:
+            trace.set(requests=report.requests, rounds=report.rounds, missing=len(pending))
+
+    report.missing = [key for key, _ in pending]
+    return report
@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+"""
+NovaClaw AI - Local API Stand-ins
+=================================
+Small aiohttp servers that mimic the external APIs the agents talk to,
+so the agents can be exercised without spending tokens:
+- AnthropicStandIn: /v1/messages (plain JSON or SSE with "stream": true)
+  and the /v1/messages/batches family, with optional latency, output
+  token rate and error injection
+- PostgrestStandIn: the Supabase REST API (/rest/v1) over in-memory
+  tables, incl. the upsert_trends function
+- FeedStandIn: generated RSS feeds of configurable size and latency, plus
+  the Pollinations image URL check
+
+Run one manually and point the agents at it:
+
+    python agents/stand_ins.py anthropic --port 8787
+    export ANTHROPIC_API_URL=http://127.0.0.1:8787/v1/messages
+
+    python agents/stand_ins.py postgrest --port 8788
+    export SUPABASE_URL=http://127.0.0.1:8788 SUPABASE_SERVICE_KEY=local
+
+benchmark.py starts all three and runs the agents against them.
+"""
+
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from aiohttp import web
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional, Dict, List, Any, Callable, Iterable
+from xml.sax.saxutils import escape
+
+
+# ============================================
+# CANNED CLAUDE RESPONSES
+# ============================================
+
+def _blocks_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return "\n".join(block.get("text", "") for block in content or [])
+
+
+def _prompt_text(params: Dict[str, Any]) -> str:
+    parts = [_blocks_text(params.get("system"))] if params.get("system") else []
+    for message in params.get("messages", []):
+        parts.append(_blocks_text(message.get("content")))
+    return "\n".join(parts)
+
+
+def default_responder(params: Dict[str, Any]) -> str:
+    """Return a plausible response text for each of the agents' prompt types."""
+    prompt = _prompt_text(params)
+
+    if "Score these" in prompt:
+        ids = re.findall(r"^- \[(\w+)\]", prompt, re.MULTILINE)
+        return json.dumps({"scores": {trend_id: round(0.9 - 0.002 * i, 3)
+                                      for i, trend_id in enumerate(ids)}})
+    if "fact-checker" in prompt:
+        return json.dumps({"passed": True, "violations": [], "verdict": "No factual errors found."})
+    if "Review this" in prompt or "Review blog articles" in prompt:
+        return json.dumps({"approved": True, "score": 0.82, "feedback": "Clear and on-brand.",
+                           "suggested_edits": None})
+    if "blog article" in prompt:
+        lang = "nl" if "Dutch" in prompt else "en"
+        body = "## Wat betekent dit?\n\n" if lang == "nl" else "## What does this mean?\n\n"
+        return json.dumps({
+            "title": f"Stand-in article ({lang})",
+            "slug": f"stand-in-article-{lang}",
+            "description": "A locally generated stand-in article for testing the pipeline.",
+            "content": body + ("Lorem ipsum dolor sit amet. " * 200),
+            "category": "AI Trends",
+            "tags": ["AI", "agents", "automation", "business", "test"],
+            "reading_time": "6 min",
+        })
+    platform = re.search(r"Create a (\w+) post", prompt)
+    if platform:
+        return json.dumps({
+            "content": f"Stand-in {platform.group(1)} post about AI agents. Learn more!",
+            "hashtags": ["AI", "Automation", "Marketing"],
+            "image_prompt": "Futuristic office with friendly AI agents",
+        })
+    return "{}"
+
+
+def message_response(params: Dict[str, Any], text: str) -> Dict[str, Any]:
+    """Wrap `text` in a Messages API response body.
+
+    Text beyond `max_tokens` (~4 characters per token) is cut off with
+    stop_reason "max_tokens". With a forced tool_choice, JSON `text` becomes
+    that tool's `tool_use` input. Prompt caching is not simulated: every
+    response reports its whole prompt as input tokens.
+    """
+    prompt = _blocks_text(params.get("system")) + json.dumps(params.get("messages", []))
+    usage = {
+        "input_tokens": max(1, len(prompt) // 4),
+        "output_tokens": max(1, len(text) // 4),
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+    }
+
+    stop_reason = "end_turn"
+    max_tokens = params.get("max_tokens")
+    if max_tokens and len(text) // 4 > max_tokens:
+        text, stop_reason = text[:max_tokens * 4], "max_tokens"
+        usage["output_tokens"] = max_tokens
+    content = [{"type": "text", "text": text}]
+    tool_choice = params.get("tool_choice") or {}
+    if tool_choice.get("type") == "tool" and stop_reason == "end_turn":
+        try:
+            content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}",
+                        "name": tool_choice["name"], "input": json.loads(text)}]
+            stop_reason = "tool_use"
+        except json.JSONDecodeError:
+            pass
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": params.get("model", "stand-in"),
+        "content": content,
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": usage,
+    }
+
+
+# ============================================
+# ANTHROPIC STAND-IN
+# ============================================
+
+class AnthropicStandIn:
+    """Local stand-in for the Anthropic Messages and Message Batches API.
+
+    `latency_s` delays every Messages response (time to first token) and
+    `tokens_per_s` paces output tokens (0 = instant). A share `error_rate`
+    of Messages requests fails with `error_status` (529 overloaded by default).
+
+    A batch finishes its requests one by one over `batch_delay_s`; a cancel
+    ends it with the finished requests succeeded and the rest canceled.
+    Custom IDs in `batch_error_ids` come back errored.
+    """
+
+    def __init__(
+        self,
+        responder: Callable[[Dict[str, Any]], str] = default_responder,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        batch_delay_s: float = 0.2,
+        stream_chunk_chars: int = 32,
+        stream_delay_s: float = 0.0,
+        latency_s: float = 0.0,
+        tokens_per_s: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 529,
+        seed: Optional[int] = None,
+        batch_error_ids: Iterable[str] = (),
+    ):
+        self.responder = responder
+        self.host = host
+        self.port = port
+        self.batch_delay_s = batch_delay_s
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_delay_s = stream_delay_s
+        self.latency_s = latency_s
+        self.tokens_per_s = tokens_per_s
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.batch_error_ids = set(batch_error_ids)
+        self.random = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.received: List[Dict[str, Any]] = []
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def messages_url(self) -> str:
+        return f"{self.base_url}/v1/messages"
+
+    def _app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/messages", self._messages)
+        app.router.add_post("/v1/messages/batches", self._create_batch)
+        app.router.add_get("/v1/messages/batches/{batch_id}", self._get_batch)
+        app.router.add_post("/v1/messages/batches/{batch_id}/cancel", self._cancel_batch)
+        app.router.add_get("/v1/messages/batches/{batch_id}/results", self._batch_results)
+        return app
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self._app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.messages_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "AnthropicStandIn":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    # --- Messages ---
+
+    def _output_delay(self, chars: int) -> float:
+        """Seconds to emit `chars` of output at `tokens_per_s` (~4 chars per token)."""
+        return chars / 4 / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+
+    def _injected_error(self) -> Optional[web.Response]:
+        if self.error_rate <= 0 or self.random.random() >= self.error_rate:
+            return None
+        self.requests["errors"] += 1
+        kind = {429: "rate_limit_error", 500: "api_error", 529: "overloaded_error"}.get(
+            self.error_status, "api_error")
+        return web.json_response(
+            {"type": "error", "error": {"type": kind, "message": "Injected by the stand-in"}},
+            status=self.error_status, headers={"retry-after": "0"})
+
+    async def _messages(self, request: web.Request) -> web.Response:
+        self.requests["messages"] += 1
+        params = await request.json()
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        error = self._injected_error()
+        if error is not None:
+            return error
+        self.received.append(params)
+        body = message_response(params, self.responder(params))
+        if params.get("stream"):
+            return await self._stream(request, body)
+        await asyncio.sleep(self._output_delay(len(json.dumps(body["content"]))))
+        return web.json_response(body)
+
+    async def _stream(self, request: web.Request, body: Dict[str, Any]) -> web.StreamResponse:
+        """Replay a complete response body as Messages API server-sent events."""
+        self.requests["streams"] += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream",
+                                               "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        async def send(event: str, data: Dict[str, Any]):
+            await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+
+        message = {k: v for k, v in body.items() if k != "content"}
+        usage = message["usage"]
+        try:
+            await send("message_start", {"type": "message_start", "message": {
+                **message, "content": [], "stop_reason": None,
+                "usage": {**usage, "output_tokens": 1}}})
+            for index, block in enumerate(body["content"]):
+                if block["type"] == "tool_use":
+                    start, text = {**block, "input": {}}, json.dumps(block["input"])
+                    delta_type, field = "input_json_delta", "partial_json"
+                else:
+                    start, text = {"type": "text", "text": ""}, block["text"]
+                    delta_type, field = "text_delta", "text"
+                await send("content_block_start",
+                           {"type": "content_block_start", "index": index, "content_block": start})
+                for i in range(0, len(text), self.stream_chunk_chars):
+                    delay = self.stream_delay_s + self._output_delay(self.stream_chunk_chars)
+                    if delay:
+                        await asyncio.sleep(delay)
+                    await send("content_block_delta", {
+                        "type": "content_block_delta", "index": index,
+                        "delta": {"type": delta_type, field: text[i:i + self.stream_chunk_chars]}})
+                await send("content_block_stop", {"type": "content_block_stop", "index": index})
+            await send("message_delta", {
+                "type": "message_delta",
+                "delta": {"stop_reason": body["stop_reason"], "stop_sequence": None},
+                "usage": {"output_tokens": usage["output_tokens"]}})
+            await send("message_stop", {"type": "message_stop"})
+            await response.write_eof()
+        except ConnectionResetError:
+            self.requests["streams_aborted"] += 1  # Client closed the stream early
+        return response
+
+    # --- Message Batches ---
+
+    def _outcome(self, batch: Dict[str, Any], index: int) -> str:
+        """"processing", "succeeded", "errored" or "canceled" for one request of `batch`."""
+        done_at = batch["created_at"] + self.batch_delay_s * (index + 1) / len(batch["requests"])
+        if batch["canceled_at"] is not None and done_at > batch["canceled_at"]:
+            return "canceled"
+        if batch["processing_status"] != "ended" and time.monotonic() < done_at:
+            return "processing"
+        return "errored" if batch["requests"][index]["custom_id"] in self.batch_error_ids else "succeeded"
+
+    def _batch_body(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        if batch["processing_status"] == "in_progress" and time.monotonic() >= batch["ready_at"]:
+            batch["processing_status"] = "ended"
+        elif batch["processing_status"] == "canceling":
+            batch["processing_status"] = "ended"  # Cancellation completes by the next poll
+        ended = batch["processing_status"] == "ended"
+        counts = Counter(self._outcome(batch, i) for i in range(len(batch["requests"])))
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": batch["processing_status"],
+            "request_counts": {
+                "processing": counts["processing"],
+                "succeeded": counts["succeeded"],
+                "errored": counts["errored"],
+                "canceled": counts["canceled"],
+                "expired": 0,
+            },
+            "results_url": f"{self.base_url}/v1/messages/batches/{batch['id']}/results" if ended else None,
+        }
+
+    async def _create_batch(self, request: web.Request) -> web.Response:
+        self.requests["batches_create"] += 1
+        body = await request.json()
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "requests": body["requests"],
+            "processing_status": "in_progress",
+            "created_at": time.monotonic(),
+            "ready_at": time.monotonic() + self.batch_delay_s,
+            "canceled_at": None,
+        }
+        self.received.extend(r["params"] for r in body["requests"])
+        return web.json_response(self._batch_body(self.batches[batch_id]))
+
+    async def _get_batch(self, request: web.Request) -> web.Response:
+        self.requests["batches_get"] += 1
+        batch = self.batches.get(request.match_info["batch_id"])
+        if batch is None:
+            return web.json_response({"error": {"type": "not_found_error"}}, status=404)
+        return web.json_response(self._batch_body(batch))
+
+    async def _cancel_batch(self, request: web.Request) -> web.Response:
+        self.requests["batches_cancel"] += 1
+        batch = self.batches.get(request.match_info["batch_id"])
+        if batch is None:
+            return web.json_response({"error": {"type": "not_found_error"}}, status=404)
+        if batch["processing_status"] == "in_progress":
+            batch["processing_status"] = "canceling"
+            batch["canceled_at"] = time.monotonic()
+        return web.json_response(self._batch_body(batch))
+
+    async def _batch_results(self, request: web.Request) -> web.Response:
+        self.requests["batches_results"] += 1
+        batch = self.batches.get(request.match_info["batch_id"])
+        if batch is None or batch["processing_status"] != "ended":
+            return web.json_response({"error": {"type": "not_found_error"}}, status=404)
+        lines = []
+        for index, item in enumerate(batch["requests"]):
+            params, outcome = item["params"], self._outcome(batch, index)
+            if outcome == "succeeded":
+                result = {"type": "succeeded",
+                          "message": message_response(params, self.responder(params))}
+            elif outcome == "errored":
+                result = {"type": "errored",
+                          "error": {"type": "invalid_request_error", "message": "stand-in error"}}
+            else:
+                result = {"type": "canceled"}
+            lines.append(json.dumps({"custom_id": item["custom_id"], "result": result}))
+        return web.Response(text="\n".join(lines), content_type="application/x-jsonl")
+
+
+# ============================================
+# POSTGREST STAND-IN
+# ============================================
+
+# Columns refreshed by the upsert_trends function (see supabase/schema.sql)
+TREND_FIELDS = ("title", "summary", "relevance_score")
+
+
+def _column_value(row: Dict[str, Any], column: str) -> Any:
+    """Value of a column or JSON path (`performance->>slug`, `a->b->>c`)."""
+    parts = re.split(r"->>?", column)
+    value: Any = row.get(parts[0].strip())
+    for key in parts[1:]:
+        value = value.get(key.strip()) if isinstance(value, dict) else None
+    if "->>" in column and value is not None and not isinstance(value, str):
+        value = json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+    return value
+
+
+def _compare(value: Any, operand: str) -> Optional[float]:
+    """-1/0/1 comparing `value` with a query-string operand (numeric when possible)."""
+    if value is None:
+        return None
+    try:
+        left, right = float(value), float(operand)
+    except (TypeError, ValueError):
+        left, right = str(value), operand
+    return (left > right) - (left < right)
+
+
+def _matches(row: Dict[str, Any], column: str, expression: str) -> bool:
+    """Evaluate one PostgREST filter (eq, neq, gt, gte, lt, lte, like, ilike, in, is)."""
+    op, _, operand = expression.partition(".")
+    value = _column_value(row, column)
+    if op in ("like", "ilike"):
+        pattern = "^" + ".*".join(re.escape(part) for part in re.split(r"[*%]", operand)) + "$"
+        flags = re.IGNORECASE | re.DOTALL if op == "ilike" else re.DOTALL
+        return value is not None and re.match(pattern, str(value), flags) is not None
+    if op == "in":
+        return value is not None and str(value) in [item.strip('"')
+                                                    for item in operand.strip("()").split(",")]
+    if op == "is":
+        return value is None if operand == "null" else str(value).lower() == operand
+    result = _compare(value, operand)
+    if result is None:
+        return False
+    return {"eq": result == 0, "neq": result != 0, "gt": result > 0,
+            "gte": result >= 0, "lt": result < 0, "lte": result <= 0}.get(op, False)
+
+
+class PostgrestStandIn:
+    """Local stand-in for the Supabase REST API over in-memory tables.
+
+    Supports select (columns, filters, order, limit), single and bulk
+    inserts with `Prefer: return=representation|minimal`, the unique blog
+    slug index and the upsert_trends function. `latency_s` is added to
+    every request.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_s: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency_s = latency_s
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.requests: Counter = Counter()
+        self.functions: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "upsert_trends": self._upsert_trends,
+        }
+        # Unique indexes: table → row → key (None = not indexed)
+        self.unique: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "content_calendar": lambda row: (_column_value(row, "performance->>slug")
+                                             if row.get("platform") == "blog" else None),
+        }
+        self._next_id = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/rest/v1/rpc/{function}", self._rpc)
+        app.router.add_get("/rest/v1/{table}", self._select)
+        app.router.add_post("/rest/v1/{table}", self._insert)
+        return app
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self._app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "PostgrestStandIn":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def _new_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        self._next_id += 1
+        now = datetime.utcnow().isoformat()
+        return {"id": str(uuid.UUID(int=self._next_id)), "created_at": now, **row}
+
+    @staticmethod
+    def _error(status: int, code: str, message: str) -> web.Response:
+        return web.json_response({"code": code, "message": message, "details": None, "hint": None},
+                                 status=status)
+
+    # --- Tables ---
+
+    async def _select(self, request: web.Request) -> web.Response:
+        table = request.match_info["table"]
+        self.requests[f"select:{table}"] += 1
+        await asyncio.sleep(self.latency_s)
+        rows = self.tables.get(table, [])
+        for column, expression in request.query.items():
+            if column not in ("select", "order", "limit", "offset"):
+                rows = [row for row in rows if _matches(row, column, expression)]
+        for term in reversed(request.query.get("order", "").split(",")):
+            if term:
+                column, _, direction = term.partition(".")
+                present = [row for row in rows if _column_value(row, column) is not None]
+                present.sort(key=lambda row: _column_value(row, column),
+                             reverse=direction.startswith("desc"))
+                rows = present + [row for row in rows if _column_value(row, column) is None]
+        offset = int(request.query.get("offset", 0))
+        rows = rows[offset:]
+        if "limit" in request.query:
+            rows = rows[:int(request.query["limit"])]
+        columns = [c.strip() for c in request.query.get("select", "*").split(",") if c.strip()]
+        if columns != ["*"]:
+            rows = [{re.split(r"->>?", c)[-1].strip(): _column_value(row, c) for c in columns}
+                    for row in rows]
+        return web.json_response(rows)
+
+    async def _insert(self, request: web.Request) -> web.Response:
+        table = request.match_info["table"]
+        self.requests[f"insert:{table}"] += 1
+        await asyncio.sleep(self.latency_s)
+        body = await request.json()
+        rows = [self._new_row(row) for row in (body if isinstance(body, list) else [body])]
+        key = self.unique.get(table)
+        if key is not None:
+            existing = {key(row) for row in self.tables.get(table, [])}
+            for row in rows:
+                if key(row) is not None and key(row) in existing:
+                    return self._error(409, "23505", f"duplicate key value violates unique "
+                                                     f"constraint on {table}: {key(row)}")
+                existing.add(key(row))
+        self.tables.setdefault(table, []).extend(rows)
+        if "return=representation" in request.headers.get("Prefer", ""):
+            return web.json_response(rows, status=201)
+        return web.Response(status=201)
+
+    # --- Functions ---
+
+    async def _rpc(self, request: web.Request) -> web.Response:
+        name = request.match_info["function"]
+        self.requests[f"rpc:{name}"] += 1
+        await asyncio.sleep(self.latency_s)
+        function = self.functions.get(name)
+        if function is None:
+            return self._error(404, "PGRST202", f"Could not find the function public.{name}")
+        return web.json_response(function(await request.json()))
+
+    def _upsert_trends(self, params: Dict[str, Any]) -> List[Dict[str, int]]:
+        trends = self.tables.setdefault("trends", [])
+        by_hash = {row.get("url_hash"): row for row in trends}
+        inserted = updated = 0
+        for incoming in params.get("trend_rows", []):
+            row = by_hash.get(incoming.get("url_hash"))
+            if row is None:
+                row = self._new_row({**incoming, "scraped_at": datetime.utcnow().isoformat()})
+                trends.append(row)
+                by_hash[row["url_hash"]] = row
+                inserted += 1
+            else:
+                # GREATEST() ignores NULLs: the best score seen so far is kept
+                scores = [s for s in (row.get("relevance_score"), incoming.get("relevance_score"))
+                          if s is not None]
+                incoming = {**incoming, "relevance_score": max(scores) if scores else None}
+                if any(row.get(f) != incoming.get(f) for f in TREND_FIELDS):
+                    row.update({f: incoming.get(f) for f in TREND_FIELDS})
+                    updated += 1
+        return [{"inserted": inserted, "updated": updated}]
+
+
+# ============================================
+# FEED STAND-IN
+# ============================================
+
+FEED_TOPICS = ["AI agents", "marketing automation", "LLM tooling", "customer support AI",
+               "AI regulation", "open-source models", "AI search", "workflow automation"]
+
+
+def rss_feed(name: str, items: int, item_bytes: int = 400) -> bytes:
+    """RSS 2.0 document with `items` entries whose descriptions are ~`item_bytes` long."""
+    now = datetime.now(timezone.utc)
+    filler = ("Companies are putting AI agents to work on routine tasks. " * (item_bytes // 58 + 1))
+    entries = []
+    for i in range(items):
+        topic = FEED_TOPICS[(i + len(name)) % len(FEED_TOPICS)]
+        entries.append(
+            "<item>"
+            f"<title>{escape(f'{topic}: what changes for business ({name} #{i})')}</title>"
+            f"<link>https://example.com/{escape(name)}/{i}</link>"
+            f"<description>{escape(filler[:item_bytes])}</description>"
+            f"<pubDate>{format_datetime(now)}</pubDate>"
+            "</item>"
+        )
+    return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>{escape(name)}</title><link>https://example.com/{escape(name)}</link>"
+            + "".join(entries) + "</channel></rss>").encode("utf-8")
+
+
+class FeedStandIn:
+    """Local stand-in for the RSS feeds and the Pollinations image check.
+
+    Every `/feeds/{name}.xml` returns a generated feed of `items` entries
+    after `latency_s`; `/prompt/{prompt}` answers the image URL check.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, items: int = 20,
+                 item_bytes: int = 400, latency_s: float = 0.0):
+        self.host = host
+        self.port = port
+        self.items = items
+        self.item_bytes = item_bytes
+        self.latency_s = latency_s
+        self.requests: Counter = Counter()
+        self._feeds: Dict[str, bytes] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def feed_url(self, name: str) -> str:
+        return f"{self.base_url}/feeds/{name}.xml"
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/feeds/{name}.xml", self._feed)
+        app.router.add_route("*", "/prompt/{prompt:.*}", self._image)
+        return app
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self._app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FeedStandIn":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _feed(self, request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+        self.requests["feeds"] += 1
+        await asyncio.sleep(self.latency_s)
+        if name not in self._feeds:
+            self._feeds[name] = rss_feed(name, self.items, self.item_bytes)
+        return web.Response(body=self._feeds[name], content_type="application/rss+xml")
+
+    async def _image(self, request: web.Request) -> web.Response:
+        self.requests["images"] += 1
+        await asyncio.sleep(self.latency_s)
+        return web.Response(status=200, content_type="image/jpeg")
+
+
+# ============================================
+# ENTRY POINT
+# ============================================
+
+async def _serve(server):
+    await server.start()
+    print(f"{type(server).__name__} listening on {server.base_url} (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local API stand-in")
+    parser.add_argument("service", choices=["anthropic", "postgrest", "feeds"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    args = parser.parse_args()
+
+    servers = {"anthropic": AnthropicStandIn, "postgrest": PostgrestStandIn, "feeds": FeedStandIn}
+    try:
+        asyncio.run(_serve(servers[args.service](host=args.host, port=args.port)))
+    except KeyboardInterrupt:
+        pass
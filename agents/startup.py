@@ -0,0 +1,104 @@
+"""
+NovaClaw AI - Startup & Lazy Imports
+====================================
+Heavy third-party packages are imported on first use instead of at
+module load:
+- `lazy_import("aiohttp")` returns a module whose code runs the first
+  time one of its attributes is read (importlib.util.LazyLoader)
+- feedparser is only imported by the fallback feed parser (feeds.py)
+
+`--startup-profile` on the agents prints when each heavy package was
+actually loaded and what it cost; `python -X importtime` gives the full
+per-module breakdown.
+"""
+
+import sys
+import time
+import importlib.util
+from types import ModuleType
+from typing import Dict, List, Any
+
+# Packages reported on by the startup profile
+HEAVY_MODULES = ("aiohttp", "numpy", "feedparser")
+
+_started = time.perf_counter()
+_main_at = None
+_main_cpu = None
+_loads: Dict[str, Dict[str, float]] = {}  # module → {"at_ms", "load_ms"}
+
+
+class _TimedLoader:
+    """Loader wrapper that records when and how long a lazy module executes."""
+
+    def __init__(self, name: str, loader: Any):
+        self._name = name
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType):
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            _loads[self._name] = {"at_ms": (start - _started) * 1000,
+                                  "load_ms": (time.perf_counter() - start) * 1000}
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._loader, attribute)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """`name`, executed on first attribute access (or the module itself if already loaded).
+
+    Only use for modules first touched on the event loop thread: the lazy
+    load is not thread-safe before Python 3.12.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(_TimedLoader(name, spec.loader))
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# ============================================
+# STARTUP PROFILE
+# ============================================
+
+def mark_main():
+    """Call first thing under `__main__`: module imports end here."""
+    global _main_at, _main_cpu
+    _main_at = time.perf_counter()
+    _main_cpu = time.process_time()
+
+
+def startup_report() -> List[str]:
+    lines = []
+    if _main_at is not None:
+        lines.append(f"process CPU until main: {_main_cpu * 1000:.0f}ms, "
+                     f"{(_main_at - _started) * 1000:.0f}ms of it after startup.py was loaded")
+    for name in HEAVY_MODULES:
+        module, load = sys.modules.get(name), _loads.get(name)
+        if load is not None:
+            lines.append(f"{name}: loaded on first use at +{load['at_ms']:.0f}ms "
+                         f"in {load['load_ms']:.0f}ms")
+        elif module is None:
+            lines.append(f"{name}: not loaded")
+        elif type(module) is not ModuleType:
+            lines.append(f"{name}: not loaded (never used)")  # Still a pending lazy module
+        else:
+            lines.append(f"{name}: imported directly")
+    lines.append(f"{len(sys.modules)} modules in memory")
+    return lines
+
+
+def print_startup_report():
+    for line in startup_report():
+        print(f"  [startup] {line}")
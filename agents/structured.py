@@ -0,0 +1,337 @@
+"""
+NovaClaw AI - Structured Output
+===============================
+Every Claude call that expects JSON declares its output as a tool with
+an input schema and forces that tool, so the answer arrives as a parsed
+`tool_use` input instead of free text. The input is checked by a
+validator compiled once per schema and turned into typed objects.
+
+Free-text JSON extraction (extract_json) remains as a last resort — for
+CLAUDE_STRUCTURED=false or a response without the tool call — and every
+use of it is counted in the parse stats of the current run
+(start_parse_stats).
+"""
+
+import os
+import re
+import json
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Any, Callable
+from dataclasses import dataclass, field
+
+from claude_client import ClaudeResult
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+STRUCTURED_OUTPUT = os.environ.get("CLAUDE_STRUCTURED", "true").lower() == "true"
+
+# "<output>.tool", "<output>.fallback", "<output>.invalid" → count. Per
+# task context, so two agent runs in one process count separately
+_parse_stats: ContextVar[Optional[Counter]] = ContextVar("parse_stats", default=None)
+
+
+# ============================================
+# SCHEMA VALIDATOR
+# ============================================
+
+class SchemaError(ValueError):
+    pass
+
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def compile_schema(schema: Dict[str, Any], path: str = "$") -> Callable[[Any], None]:
+    """Compile a JSON Schema subset into a validator that raises SchemaError.
+
+    Supports type (incl. lists), properties, required, additionalProperties,
+    items, enum, minimum/maximum, minLength/maxLength and minItems/maxItems.
+    All lookups are resolved here, so validating is a chain of closures.
+    """
+    checks: List[Callable[[Any], None]] = []
+
+    types = schema.get("type")
+    if types:
+        type_checks = [_TYPE_CHECKS[t] for t in ([types] if isinstance(types, str) else types)]
+        expected = types if isinstance(types, str) else "|".join(types)
+
+        def check_type(value):
+            if not any(check(value) for check in type_checks):
+                raise SchemaError(f"{path}: expected {expected}, got {type(value).__name__}")
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value):
+            if value not in allowed:
+                raise SchemaError(f"{path}: {value!r} not in {allowed}")
+        checks.append(check_enum)
+
+    low, high = schema.get("minimum"), schema.get("maximum")
+    if low is not None or high is not None:
+        def check_range(value):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if (low is not None and value < low) or (high is not None and value > high):
+                    raise SchemaError(f"{path}: {value} outside [{low}, {high}]")
+        checks.append(check_range)
+
+    for key, sized in (("minLength", str), ("minItems", list)):
+        if key in schema:
+            least = schema[key]
+
+            def check_min(value, least=least, sized=sized, key=key):
+                if isinstance(value, sized) and len(value) < least:
+                    raise SchemaError(f"{path}: {key} {least}")
+            checks.append(check_min)
+
+    for key, sized in (("maxLength", str), ("maxItems", list)):
+        if key in schema:
+            most = schema[key]
+
+            def check_max(value, most=most, sized=sized, key=key):
+                if isinstance(value, sized) and len(value) > most:
+                    raise SchemaError(f"{path}: {key} {most}")
+            checks.append(check_max)
+
+    properties = {name: compile_schema(sub, f"{path}.{name}")
+                  for name, sub in schema.get("properties", {}).items()}
+    required = list(schema.get("required", []))
+    extra = schema.get("additionalProperties")
+    extra_check = compile_schema(extra, f"{path}.*") if isinstance(extra, dict) else None
+    if properties or required or extra is not None:
+        def check_object(value):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    raise SchemaError(f"{path}: missing {name!r}")
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None:
+                    check(item)
+                elif extra is False:
+                    raise SchemaError(f"{path}: unexpected {name!r}")
+                elif extra_check is not None:
+                    extra_check(item)
+        checks.append(check_object)
+
+    if "items" in schema:
+        item_check = compile_schema(schema["items"], f"{path}[]")
+
+        def check_items(value):
+            if isinstance(value, list):
+                for item in value:
+                    item_check(item)
+        checks.append(check_items)
+
+    def validate(value):
+        for check in checks:
+            check(value)
+    return validate
+
+
+# ============================================
+# OUTPUT SPECS
+# ============================================
+
+@dataclass
+class OutputSpec:
+    """A named output shape: sent as a forced tool, validated on the way back."""
+    name: str
+    description: str
+    schema: Dict[str, Any]
+    validate: Callable[[Any], None] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.validate = compile_schema(self.schema)
+
+    def request_params(self) -> Dict[str, Any]:
+        """`tools` + forced `tool_choice` for a Messages request (empty when disabled)."""
+        if not STRUCTURED_OUTPUT:
+            return {}
+        return {
+            "tools": [{"name": self.name, "description": self.description,
+                       "input_schema": self.schema}],
+            "tool_choice": {"type": "tool", "name": self.name},
+        }
+
+
+def extract_json(text: str) -> Any:
+    """Last-resort JSON extraction from free text (markdown fences, extra prose)."""
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    match = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', text, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group(1).strip())
+        except json.JSONDecodeError:
+            pass
+    # Whichever of { or [ comes first is the outer value
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if starts:
+        start = min(starts)
+        end = text.rfind("}" if text[start] == "{" else "]")
+        if end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                pass
+    raise json.JSONDecodeError("No valid JSON found in response", text, 0)
+
+
+def parse_output(result: ClaudeResult, spec: OutputSpec) -> Dict[str, Any]:
+    """Validated output of `spec` from a response; raises on anything else.
+
+    A response that cannot be parsed or validated is dropped from the
+    response cache, so the next run asks Claude again.
+    """
+    stats = _parse_stats.get()
+    if stats is None:
+        stats = start_parse_stats()
+    data = result.tool_input(spec.name)
+    try:
+        if data is not None:
+            stats[f"{spec.name}.tool"] += 1
+        else:
+            stats[f"{spec.name}.fallback"] += 1
+            data = extract_json(result.text)
+            if isinstance(data, list) and len(data) == 1:
+                data = data[0]
+        try:
+            spec.validate(data)
+        except SchemaError:
+            stats[f"{spec.name}.invalid"] += 1
+            raise
+    except ValueError:
+        result.uncache()
+        raise
+    return data
+
+
+def start_parse_stats() -> Counter:
+    """Fresh parse counters for the current run; call before its tasks are started."""
+    stats: Counter = Counter()
+    _parse_stats.set(stats)
+    return stats
+
+
+def parse_summary() -> Dict[str, int]:
+    return dict(sorted((_parse_stats.get() or {}).items()))
+
+
+# ============================================
+# TYPED OUTPUTS
+# ============================================
+
+@dataclass
+class CriticVerdict:
+    approved: bool
+    score: float
+    feedback: str = ""
+    suggested_edits: Optional[str] = None
+
+    @classmethod
+    def from_output(cls, data: Dict[str, Any]) -> "CriticVerdict":
+        return cls(approved=data["approved"], score=float(data["score"]),
+                   feedback=data.get("feedback", ""), suggested_edits=data.get("suggested_edits"))
+
+
+@dataclass
+class FactCheckVerdict:
+    passed: bool
+    violations: List[str]
+    verdict: str
+
+    @classmethod
+    def from_output(cls, data: Dict[str, Any]) -> "FactCheckVerdict":
+        return cls(passed=data["passed"], violations=list(data["violations"]),
+                   verdict=data["verdict"])
+
+
+SCORES = OutputSpec(
+    "record_scores",
+    "Record a relevance score between 0.0 and 1.0 for every trend ID.",
+    {
+        "type": "object",
+        "properties": {
+            "scores": {"type": "object", "additionalProperties": {"type": "number"}},
+        },
+        "required": ["scores"],
+    },
+)
+
+SOCIAL_POST = OutputSpec(
+    "write_post",
+    "Return the social media post.",
+    {
+        "type": "object",
+        "properties": {
+            "content": {"type": "string", "minLength": 1},
+            "hashtags": {"type": "array", "items": {"type": "string"}},
+            "image_prompt": {"type": ["string", "null"]},
+        },
+        "required": ["content", "hashtags"],
+    },
+)
+
+BLOG_ARTICLE = OutputSpec(
+    "write_article",
+    "Return the complete blog article.",
+    {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string", "minLength": 1},
+            "slug": {"type": "string", "minLength": 1},
+            "description": {"type": "string"},
+            "content": {"type": "string", "minLength": 1},
+            "category": {"type": "string"},
+            "tags": {"type": "array", "items": {"type": "string"}},
+            "reading_time": {"type": "string"},
+        },
+        "required": ["title", "slug", "description", "content"],
+    },
+)
+
+CRITIC = OutputSpec(
+    "record_review",
+    "Record the review verdict.",
+    {
+        "type": "object",
+        "properties": {
+            "approved": {"type": "boolean"},
+            "score": {"type": "number", "minimum": 0, "maximum": 1},
+            "feedback": {"type": "string"},
+            "suggested_edits": {"type": ["string", "null"]},
+        },
+        "required": ["approved", "score"],
+    },
+)
+
+FACT_CHECK = OutputSpec(
+    "record_fact_check",
+    "Record the fact-check verdict.",
+    {
+        "type": "object",
+        "properties": {
+            "passed": {"type": "boolean"},
+            "violations": {"type": "array", "items": {"type": "string"}},
+            "verdict": {"type": "string"},
+        },
+        "required": ["passed", "violations", "verdict"],
+    },
+)
@@ -0,0 +1,18 @@
+"""
+Shared setup for the agent tests: the agents are flat scripts that import
+each other as siblings, so agents/ goes on sys.path. The response cache
+and batch audit files are switched off before any agent module is
+imported; the tests run against the local stand-ins in stand_ins.py.
+"""
+
+import os
+import sys
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["CLAUDE_CACHE"] = "false"
+os.environ["CLAUDE_BATCH_KEEP"] = "0"
+os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+
+if AGENTS_DIR not in sys.path:
+    sys.path.insert(0, AGENTS_DIR)
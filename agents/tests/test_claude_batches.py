@@ -0,0 +1,122 @@
+"""Message Batches mode of ClaudeClient against the Anthropic stand-in."""
+
+import time
+import asyncio
+from typing import Dict, Any
+
+from aiohttp import web
+
+from claude_client import ClaudeClient
+from stand_ins import AnthropicStandIn, _prompt_text
+
+
+def echo(params: Dict[str, Any]) -> str:
+    return f"echo: {_prompt_text(params)}"
+
+
+def batch_requests(count: int) -> Dict[str, Dict[str, Any]]:
+    return {f"req-{i}": {"model": "claude-test", "max_tokens": 64,
+                         "messages": [{"role": "user", "content": f"prompt {i}"}]}
+            for i in range(count)}
+
+
+async def run_batch(stand: AnthropicStandIn, requests: Dict[str, Dict[str, Any]], **kwargs):
+    async with ClaudeClient(api_url=stand.messages_url, max_retries=0, use_cache=False) as claude:
+        return await claude.batch(requests, poll_interval=0.02, **kwargs)
+
+
+def test_batch_submit_and_poll_until_ended():
+    async def main():
+        async with AnthropicStandIn(echo, batch_delay_s=0.1) as stand:
+            results = await run_batch(stand, batch_requests(4), max_wait=5)
+            return stand, results
+
+    stand, results = asyncio.run(main())
+    assert set(results) == {"req-0", "req-1", "req-2", "req-3"}
+    assert all(r.ok for r in results.values())
+    assert results["req-2"].text == "echo: prompt 2"
+    assert stand.requests["batches_create"] == 1
+    assert stand.requests["batches_get"] >= 1
+    assert stand.requests["batches_results"] == 1
+    assert stand.requests["messages"] == 0
+    assert stand.requests["batches_cancel"] == 0
+
+
+def test_cancelled_batch_keeps_finished_results():
+    async def main():
+        # Requests finish one by one over 2s; the client gives up after ~0.5s
+        async with AnthropicStandIn(echo, batch_delay_s=2.0) as stand:
+            results = await run_batch(stand, batch_requests(10), max_wait=0.5)
+            return stand, results
+
+    stand, results = asyncio.run(main())
+    assert stand.requests["batches_cancel"] == 1
+    assert stand.requests["batches_results"] == 1
+    # Finished requests come from the batch, only the canceled ones are re-sent
+    assert 0 < stand.requests["messages"] < 10
+    assert all(r.ok for r in results.values())
+    assert {cid: r.text for cid, r in results.items()} == {
+        f"req-{i}": f"echo: prompt {i}" for i in range(10)}
+
+
+def test_errored_batch_items_fall_back_per_custom_id():
+    async def main():
+        async with AnthropicStandIn(echo, batch_delay_s=0.05,
+                                    batch_error_ids={"req-1"}) as stand:
+            results = await run_batch(stand, batch_requests(3), max_wait=5)
+            return stand, results
+
+    stand, results = asyncio.run(main())
+    assert all(r.ok for r in results.values())
+    assert stand.requests["messages"] == 1
+    assert stand.received[-1]["messages"][0]["content"] == "prompt 1"
+    assert results["req-1"].text == "echo: prompt 1"
+
+
+class MalformedBatchStandIn(AnthropicStandIn):
+    """Accepts batch submissions with a body that has no batch id."""
+
+    async def _create_batch(self, request: web.Request) -> web.Response:
+        self.requests["batches_create"] += 1
+        return web.json_response({"type": "message_batch"})
+
+
+def test_malformed_submit_response_falls_back_to_sync():
+    async def main():
+        async with MalformedBatchStandIn(echo) as stand:
+            results = await run_batch(stand, batch_requests(2), max_wait=5)
+            return stand, results
+
+    stand, results = asyncio.run(main())
+    assert stand.requests["batches_create"] == 1
+    assert stand.requests["batches_get"] == 0
+    assert stand.requests["messages"] == 2
+    assert all(r.ok for r in results.values())
+
+
+def test_spent_batch_budget_sends_synchronously():
+    async def main():
+        async with AnthropicStandIn(echo, batch_delay_s=0.05) as stand:
+            async with ClaudeClient(api_url=stand.messages_url, max_retries=0, use_cache=False,
+                                    batch_budget_s=0.0) as claude:
+                results = await claude.batch(batch_requests(2), poll_interval=0.02)
+            return stand, results
+
+    stand, results = asyncio.run(main())
+    assert stand.requests["batches_create"] == 0
+    assert stand.requests["messages"] == 2
+    assert all(r.ok for r in results.values())
+
+
+def test_sync_fallback_runs_concurrently():
+    async def main():
+        async with MalformedBatchStandIn(echo, latency_s=0.3) as stand:
+            start = time.monotonic()
+            results = await run_batch(stand, batch_requests(6), max_wait=5)
+            return stand, results, time.monotonic() - start
+
+    stand, results, elapsed = asyncio.run(main())
+    assert stand.requests["messages"] == 6
+    assert all(r.ok for r in results.values())
+    # GENERATION_CONCURRENCY (3) calls at a time: two rounds, not six
+    assert elapsed < 6 * 0.3
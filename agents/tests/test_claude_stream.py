@@ -0,0 +1,170 @@
+"""Streaming calls of ClaudeClient: the article abort guard and retries."""
+
+import json
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
+
+from aiohttp import web
+
+from claude_client import ClaudeClient
+from blog_generator import article_stream_guard
+from stand_ins import AnthropicStandIn
+
+ENGLISH = "This is what the agents can do for your business and how it works. "
+
+
+def article(content: str) -> str:
+    return json.dumps({"title": "Test", "slug": "test", "description": "Test article.",
+                       "content": content, "category": "AI Trends", "tags": ["AI"]})
+
+
+async def run_stream(stand: AnthropicStandIn, lang: Optional[str] = None, max_retries: int = 2):
+    guard = article_stream_guard(lang) if lang else None
+    async with ClaudeClient(api_url=stand.messages_url, max_retries=max_retries,
+                            use_cache=False) as claude:
+        return await claude.stream("claude-test", 16000, [{"role": "user", "content": "Write"}],
+                                   guard=guard)
+
+
+def test_guard_aborts_an_over_long_article():
+    async def main():
+        # ~7000 words, far beyond ARTICLE_MAX_WORDS * ARTICLE_ABORT_FACTOR
+        async with AnthropicStandIn(lambda params: article(ENGLISH * 500),
+                                    stream_chunk_chars=200) as stand:
+            return await run_stream(stand, "en")
+
+    result = asyncio.run(main())
+    assert not result.ok
+    assert result.aborted.startswith("over length")
+    assert result.stop_reason == "aborted"
+    assert result.usage["output_tokens"] > 0  # Billed tokens are still accounted for
+
+
+def test_guard_aborts_a_wrong_language_article():
+    async def main():
+        async with AnthropicStandIn(lambda params: article(ENGLISH * 40)) as stand:
+            return await run_stream(stand, "nl")
+
+    result = asyncio.run(main())
+    assert not result.ok
+    assert result.aborted == "language mismatch (expected nl, got en)"
+
+
+def test_guard_keeps_a_matching_article():
+    async def main():
+        async with AnthropicStandIn(lambda params: article(ENGLISH * 40)) as stand:
+            return await run_stream(stand, "en")
+
+    result = asyncio.run(main())
+    assert result.ok
+    assert result.aborted is None
+    assert json.loads(result.text)["content"] == ENGLISH * 40
+
+
+class FlakyStandIn(AnthropicStandIn):
+    """Fails the first `failures` Messages requests with a 529."""
+
+    def __init__(self, *args: Any, failures: int = 1, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.failures = failures
+
+    def _injected_error(self) -> Optional[web.Response]:
+        if self.requests["messages"] > self.failures:
+            return None
+        self.requests["errors"] += 1
+        return web.json_response(
+            {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}},
+            status=529, headers={"retry-after": "0"})
+
+
+def first_events(body: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """message_start and the first text token of `body`, as SSE events."""
+    return [
+        ("message_start", {"type": "message_start", "message": {
+            **{k: v for k, v in body.items() if k != "content"},
+            "content": [], "stop_reason": None}}),
+        ("content_block_start", {"type": "content_block_start", "index": 0,
+                                 "content_block": {"type": "text", "text": ""}}),
+        ("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                 "delta": {"type": "text_delta", "text": "Hello"}}),
+    ]
+
+
+class BrokenStreamStandIn(AnthropicStandIn):
+    """The first `broken` streams send `events(body)` and then end early:
+    cleanly (`drop=False`) or by closing the connection."""
+
+    def __init__(self, *args: Any, events=first_events, broken: int = 1, drop: bool = False,
+                 **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.events = events
+        self.broken = broken
+        self.drop = drop
+
+    async def _stream(self, request: web.Request, body: Dict[str, Any]) -> web.StreamResponse:
+        if self.requests["streams"] >= self.broken:
+            return await super()._stream(request, body)
+        self.requests["streams"] += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for event, data in self.events(body):
+            await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        if self.drop:
+            request.transport.close()
+        else:
+            await response.write_eof()
+        return response
+
+
+def overloaded(body: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    return first_events(body)[:1] + [("error", {"type": "error", "error": {
+        "type": "overloaded_error", "message": "Overloaded"}})]
+
+
+def test_stream_retries_before_the_first_token():
+    async def main():
+        async with FlakyStandIn(lambda params: "Hello there", failures=2) as stand:
+            return stand, await run_stream(stand)
+
+    stand, result = asyncio.run(main())
+    assert result.ok
+    assert result.text == "Hello there"
+    assert result.attempts == 3
+    assert stand.requests["errors"] == 2
+    assert stand.requests["streams"] == 1
+
+
+def test_stream_retries_an_in_stream_error_before_the_first_token():
+    async def main():
+        async with BrokenStreamStandIn(lambda params: "Hello there", events=overloaded) as stand:
+            return stand, await run_stream(stand)
+
+    stand, result = asyncio.run(main())
+    assert result.ok
+    assert result.text == "Hello there"
+    assert result.attempts == 2
+    assert stand.requests["streams"] == 2
+
+
+def test_stream_is_not_retried_after_the_first_token():
+    async def main():
+        async with BrokenStreamStandIn(lambda params: "Hello there", drop=True) as stand:
+            return stand, await run_stream(stand)
+
+    stand, result = asyncio.run(main())
+    assert not result.ok
+    assert result.ttft_ms is not None
+    assert result.attempts == 1
+    assert stand.requests["messages"] == 1
+
+
+def test_stream_without_a_stop_reason_is_not_ok():
+    async def main():
+        async with BrokenStreamStandIn(lambda params: "Hello there") as stand:
+            return stand, await run_stream(stand)
+
+    stand, result = asyncio.run(main())
+    assert not result.ok
+    assert result.error == "stream ended without a stop_reason"
+    assert result.text == ""
+    assert result.attempts == 1
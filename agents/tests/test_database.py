@@ -0,0 +1,174 @@
+"""Database, slug allocation and trend upserts against the PostgREST stand-in."""
+
+import asyncio
+from typing import List, Set
+
+import pytest
+from aiohttp import web
+
+from database import Database, DatabaseError
+from blog_generator import BlogArticle, Trend, save_blog_post
+from structured import CriticVerdict
+from trend_store import upsert_trends
+from stand_ins import PostgrestStandIn
+
+
+def blog_article(slug: str) -> BlogArticle:
+    return BlogArticle(lang="en", title="Test", slug=slug, description="Test article.",
+                       content="Body", category="AI Trends", tags=["AI"], reading_time="1 min",
+                       trend_source="test")
+
+
+def blog_slugs(stand: PostgrestStandIn) -> List[str]:
+    return [row["performance"]["slug"] for row in stand.tables.get("content_calendar", [])]
+
+
+def trend(url: str, score: float, scored: bool = True, title: str = "Title") -> Trend:
+    return Trend(source="test", category="ai", title=title, url=url, summary="Summary",
+                 relevance_score=score, scored=scored)
+
+
+class RacingDatabase(Database):
+    """Lets another "run" claim every slug right after our lookup saw it free."""
+
+    def __init__(self, stand: PostgrestStandIn, races: int, **kwargs):
+        super().__init__(stand.base_url, "test", **kwargs)
+        self.stand = stand
+        self.races = races
+
+    async def existing_blog_slugs(self, slugs: List[str]) -> Set[str]:
+        taken = await super().existing_blog_slugs(slugs)
+        if self.races > 0:
+            self.races -= 1
+            free = next(slug for slug in slugs if slug not in taken)
+            self.stand.tables.setdefault("content_calendar", []).append(
+                self.stand._new_row({"platform": "blog", "performance": {"slug": free}}))
+        return taken
+
+
+def test_save_blog_post_skips_taken_slugs():
+    async def main():
+        async with PostgrestStandIn() as stand:
+            async with Database(stand.base_url, "test") as db:
+                first = await save_blog_post(db, blog_article("ai-agents"), CriticVerdict(True, 0.9))
+                second = await save_blog_post(db, blog_article("ai-agents"), CriticVerdict(True, 0.9))
+            return stand, first, second
+
+    stand, first, second = asyncio.run(main())
+    assert first is not None and second is not None
+    assert blog_slugs(stand) == ["ai-agents", "ai-agents-2"]
+
+
+def test_save_blog_post_retries_after_a_409():
+    async def main():
+        async with PostgrestStandIn() as stand:
+            async with RacingDatabase(stand, races=2) as db:
+                saved = await save_blog_post(db, blog_article("ai-agents"), CriticVerdict(True, 0.9))
+            return stand, saved
+
+    stand, saved = asyncio.run(main())
+    assert saved is not None
+    assert saved["performance"]["slug"] == "ai-agents-3"
+    assert stand.requests["insert:content_calendar"] == 3
+    assert sorted(blog_slugs(stand)) == ["ai-agents", "ai-agents-2", "ai-agents-3"]
+
+
+def test_save_blog_post_gives_up_after_the_attempt_limit():
+    async def main():
+        async with PostgrestStandIn() as stand:
+            async with RacingDatabase(stand, races=10) as db:
+                saved = await save_blog_post(db, blog_article("ai-agents"), CriticVerdict(True, 0.9))
+            return stand, saved
+
+    stand, saved = asyncio.run(main())
+    assert saved is None
+    assert stand.requests["insert:content_calendar"] == 3  # SLUG_SAVE_ATTEMPTS
+
+
+def test_upsert_trends_counts_inserts_updates_and_duplicates():
+    async def main():
+        async with PostgrestStandIn() as stand:
+            async with Database(stand.base_url, "test") as db:
+                first = await upsert_trends(db, [
+                    trend("https://example.com/a", 0.8),
+                    trend("https://www.example.com/a/?utm_source=x", 0.6),  # Same story
+                    trend("https://example.com/b", 0.5),
+                ])
+                second = await upsert_trends(db, [
+                    trend("https://example.com/a", 0.8),                 # Unchanged
+                    trend("https://example.com/b", 0.7),                 # Higher score
+                    trend("https://example.com/c", 0.4),                 # New
+                ])
+            return stand, first, second
+
+    stand, first, second = asyncio.run(main())
+    assert (first.sent, first.inserted, first.updated, first.unchanged) == (2, 2, 0, 0)
+    assert (second.sent, second.inserted, second.updated, second.unchanged) == (3, 1, 1, 1)
+    assert second.error is None
+    assert stand.requests["rpc:upsert_trends"] == 2
+    scores = {row["url"]: row["relevance_score"] for row in stand.tables["trends"]}
+    assert scores == {"https://example.com/a": 0.8, "https://example.com/b": 0.7,
+                      "https://example.com/c": 0.4}
+
+
+def test_upsert_trends_keeps_scores_of_unscored_trends():
+    async def main():
+        async with PostgrestStandIn() as stand:
+            async with Database(stand.base_url, "test") as db:
+                await upsert_trends(db, [trend("https://example.com/a", 0.8)])
+                report = await upsert_trends(db, [trend("https://example.com/a", 0.0, scored=False)])
+            return stand, report
+
+    stand, report = asyncio.run(main())
+    assert (report.inserted, report.updated) == (0, 0)
+    assert stand.tables["trends"][0]["relevance_score"] == 0.8
+
+
+class FlakyPostgrestStandIn(PostgrestStandIn):
+    """Answers the first `failures` selects with a 503."""
+
+    def __init__(self, failures: int, status: int = 503):
+        super().__init__()
+        self.failures = failures
+        self.status = status
+
+    async def _select(self, request: web.Request) -> web.Response:
+        if self.failures > 0:
+            self.failures -= 1
+            self.requests["errors"] += 1
+            return web.json_response({"message": "unavailable"}, status=self.status,
+                                     headers={"retry-after": "0"})
+        return await super()._select(request)
+
+
+def run_select(stand: PostgrestStandIn, max_retries: int = 2):
+    async def main():
+        async with stand:
+            async with Database(stand.base_url, "test", max_retries=max_retries) as db:
+                rows = await db.select("trends")
+                return rows, db.requests
+    return asyncio.run(main())
+
+
+def test_reads_are_retried_on_5xx():
+    stand = FlakyPostgrestStandIn(failures=2)
+    rows, requests = run_select(stand)
+    assert rows == []
+    assert requests == 3
+    assert stand.requests["errors"] == 2
+
+
+def test_reads_give_up_after_max_retries():
+    stand = FlakyPostgrestStandIn(failures=5)
+    with pytest.raises(DatabaseError) as error:
+        run_select(stand, max_retries=1)
+    assert error.value.status == 503
+    assert stand.requests["errors"] == 2
+
+
+def test_client_errors_are_not_retried():
+    stand = FlakyPostgrestStandIn(failures=1, status=400)
+    with pytest.raises(DatabaseError) as error:
+        run_select(stand)
+    assert error.value.status == 400
+    assert stand.requests["errors"] == 1
@@ -0,0 +1,75 @@
+"""StagePipeline: per-item stage spans and per-item failures."""
+
+import asyncio
+from typing import Any, Dict, List
+
+from pipeline import Stage, StagePipeline, NO_RESULT
+from tracing import Tracer
+
+
+class Rows:
+    """Collects the agent_logs rows a Tracer would queue on a LogSink."""
+
+    def __init__(self):
+        self.rows: List[Dict[str, Any]] = []
+
+    def log(self, row: Dict[str, Any]):
+        self.rows.append(row)
+
+    def named(self, action: str) -> List[Dict[str, Any]]:
+        return [row for row in self.rows if row["action"] == action]
+
+
+async def slow(item: int) -> int:
+    await asyncio.sleep(0.1)
+    return item
+
+
+async def check(item: int) -> Any:
+    if item == 1:
+        return None  # Rejected
+    if item == 2:
+        raise ValueError("bad item")
+    return item
+
+
+def run_pipeline(stages: List[Stage], items: List[int]):
+    logs = Rows()
+
+    async def main():
+        async with Tracer("run.test", "test", logs=logs):
+            return await StagePipeline(stages).run(items)
+
+    return asyncio.run(main()), logs
+
+
+def test_rejected_and_failed_items_are_reported_per_stage():
+    result, _ = run_pipeline([Stage("check", check, workers=2)], [0, 1, 2, 3])
+    assert result.outputs == [0, 3]
+    assert [(f.index, f.stage, f.error) for f in result.failures] == [
+        (1, "check", NO_RESULT), (2, "check", "bad item")]
+    assert result.stage_passed == {"check": 2}
+
+
+def test_stage_spans_time_each_item_not_the_idle_worker():
+    result, logs = run_pipeline([Stage("slow", slow), Stage("check", check)], [0, 1, 2, 3])
+    spans = logs.named("stage.check")
+    assert sorted(row["input"]["item"] for row in spans) == [0, 1, 2, 3]
+    # The worker idles ~0.1s per item on its inbox; none of that is in the spans
+    assert all(row["duration_ms"] < 50 for row in spans)
+    assert len(logs.named("stage.slow")) == 4
+    assert {row["input"]["item"]: row["status"] for row in spans if row["status"] == "failed"} == {
+        1: "failed", 2: "failed"}
+    assert result.outputs == [0, 3]
+
+
+def test_collect_stage_reports_dropped_items():
+    async def keep_even(items: List[int]) -> List[Any]:
+        return [item if item % 2 == 0 else None for item in items]
+
+    result, logs = run_pipeline([Stage("batch", keep_even, collect=True)], [0, 1, 2, 3])
+    assert result.outputs == [0, 2]
+    assert [(f.index, f.stage, f.error) for f in result.failures] == [
+        (1, "batch", NO_RESULT), (3, "batch", NO_RESULT)]
+    [row] = logs.named("stage.batch")
+    assert row["input"] == {"items": 4, "passed": 2}
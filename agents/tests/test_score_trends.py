@@ -0,0 +1,63 @@
+"""Trend scoring: Claude scores for the local top-K, BM25 order for the rest."""
+
+import json
+import asyncio
+from typing import List
+
+from claude_client import ClaudeClient
+from ranker import prerank
+from stand_ins import AnthropicStandIn
+import blog_generator
+import content_loop
+
+TITLES = [
+    "Football club wins the cup final",
+    "AI agents automate customer support for SMB teams",
+    "New smartphone camera reviewed",
+    "Marketing automation with LLM agents for B2B sales",
+    "Workflow automation tools for AI agents in business",
+]
+
+
+def trends(module) -> List:
+    return [module.Trend(source="test", category="ai", title=title, url=f"https://example.com/{i}",
+                         summary="", relevance_score=0.0) for i, title in enumerate(TITLES)]
+
+
+def run_scoring(module, stand_kwargs) -> List:
+    async def main():
+        async with AnthropicStandIn(**stand_kwargs) as stand:
+            async with ClaudeClient(api_url=stand.messages_url, max_retries=0,
+                                    use_cache=False) as claude:
+                return await module.score_trends(trends(module), claude)
+    return asyncio.run(main())
+
+
+def local_order() -> List[str]:
+    _, local_scores = prerank(trends(blog_generator))
+    ranked = sorted(zip(local_scores, range(len(TITLES))), key=lambda entry: -entry[0])
+    return [TITLES[i] for _, i in ranked]
+
+
+def test_failed_scoring_keeps_the_local_ranking():
+    for module in (blog_generator, content_loop):
+        scored = run_scoring(module, {"error_rate": 1.0, "error_status": 400})
+        assert [t.title for t in scored] == local_order()
+        assert not any(t.scored for t in scored)
+        assert scored[0].relevance_score > 0
+
+
+def test_claude_scores_rank_before_unscored_trends(monkeypatch):
+    # Claude only scores the trend it likes least; it still ranks first
+    low = TITLES.index("New smartphone camera reviewed")
+
+    def responder(params):
+        return json.dumps({"scores": {"t1": 0.1}})
+
+    for module in (blog_generator, content_loop):
+        monkeypatch.setattr(module, "prerank",
+                            lambda items, history=(): ([low], prerank(items, history)[1]))
+        scored = run_scoring(module, {"responder": responder})
+        assert scored[0].title == TITLES[low]
+        assert scored[0].scored and scored[0].relevance_score == 0.1
+        assert [t.title for t in scored[1:]] == [t for t in local_order() if t != TITLES[low]]
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+NovaClaw AI - Topic Classifier
+==============================
+Keyword classifier built once at import. A single pass over the words
+of a text returns all matching topic labels; matching is on whole words,
+so "ai" no longer matches "said" or "claim".
+
+Keywords match whole words with an optional plural "s"; a trailing "*"
+makes a keyword a prefix ("zoek*" matches "zoekmachine").
+
+Microbenchmark against the old substring chains:
+
+    python agents/topics.py --bench 20000
+"""
+
+import re
+import time
+import argparse
+from typing import Dict, List, Set, FrozenSet, Iterable
+
+# ============================================
+# TOPICS
+# ============================================
+
+# Label → keywords. Order is priority order for pick_topic().
+TOPIC_KEYWORDS: Dict[str, List[str]] = {
+    "security": ["security", "veiligheid", "privacy", "gdpr", "compliance"],
+    "seo": ["seo", "aio", "search", "zoek*", "vindbaar*"],
+    "marketing": ["marketing", "email", "social media", "ads"],
+    "automation": ["automation", "automatiser*", "workflow"],
+    "data": ["data", "analytics", "dashboard"],
+    "content": ["content", "blog", "schrijven", "writing"],
+    "coding": ["code", "coding", "developer", "programming", "api"],
+    "agents": ["agent*", "chatbot", "assistant"],
+    "business": ["business", "bedrij*", "mkb", "enterprise", "startup"],
+    "ai": ["ai", "artificial intelligence", "machine learning", "deep learning", "llm",
+           "chatgpt", "gpt*", "openai", "anthropic", "claude", "gemini", "neural",
+           "generative", "robot*", "agent*", "automation"],
+}
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class TopicClassifier:
+    """Multi-label keyword classifier over word tokens.
+
+    The text is split into words with one precompiled regex; each distinct
+    word (and each two-word phrase, for multi-word keywords) is resolved to
+    its labels once and memoized, so classification is a dictionary lookup
+    per word.
+    """
+
+    def __init__(self, topics: Dict[str, Iterable[str]], cache_size: int = 50000):
+        self.order = list(topics)
+        self.exact: Dict[str, Set[str]] = {}
+        self.prefixes: Dict[str, Set[str]] = {}
+        for label, keywords in topics.items():
+            for keyword in keywords:
+                word = " ".join(keyword.rstrip("*").lower().split())
+                table = self.prefixes if keyword.endswith("*") else self.exact
+                table.setdefault(word, set()).add(label)
+        # First words of multi-word keywords; only these start a phrase lookup
+        self.phrase_heads = {word.split()[0] for word in self.exact if " " in word}
+        self.cache_size = cache_size
+        self._cache: Dict[str, FrozenSet[str]] = {}
+
+    def _resolve(self, token: str) -> FrozenSet[str]:
+        labels = set(self.exact.get(token, ()))
+        if token.endswith("s"):
+            labels |= self.exact.get(token[:-1], set())
+        for prefix, prefix_labels in self.prefixes.items():
+            if token.startswith(prefix):
+                labels |= prefix_labels
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[token] = result = frozenset(labels)
+        return result
+
+    def labels(self, text: str) -> Set[str]:
+        """All topic labels whose keywords occur in `text` as whole words."""
+        tokens = _WORD_RE.findall(text.lower())
+        found: Set[str] = set()
+        cache = self._cache
+        for token in tokens:
+            labels = cache.get(token)
+            if labels is None:
+                labels = self._resolve(token)
+            if labels:
+                found |= labels
+        if self.phrase_heads:
+            for first, second in zip(tokens, tokens[1:]):
+                if first not in self.phrase_heads:
+                    continue
+                phrase = f"{first} {second}"
+                labels = cache.get(phrase)
+                if labels is None:
+                    labels = self._resolve(phrase)
+                if labels:
+                    found |= labels
+        return found
+
+    def matches(self, text: str, label: str) -> bool:
+        return label in self.labels(text)
+
+    def pick(self, text: str, default: str) -> str:
+        """Highest-priority label found in `text`, or `default`."""
+        found = self.labels(text)
+        return next((label for label in self.order if label in found), default)
+
+
+TOPICS = TopicClassifier(TOPIC_KEYWORDS)
+
+
+def classify(text: str) -> Set[str]:
+    return TOPICS.labels(text)
+
+
+def pick_topic(text: str, default: str = "ai") -> str:
+    return TOPICS.pick(text, default)
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+def legacy_pick(text: str) -> str:
+    """The substring chain this module replaced, for comparison."""
+    text = text.lower()
+    for label in TOPIC_KEYWORDS:
+        if any(kw.rstrip("*") in text for kw in TOPIC_KEYWORDS[label]):
+            return label
+    return "ai"
+
+
+def legacy_is_ai(text: str) -> bool:
+    """The scraper's old per-entry keyword filter, for comparison."""
+    ai_keywords = ["ai", "artificial intelligence", "machine learning",
+                   "chatgpt", "llm", "agent", "automation", "neural",
+                   "openai", "anthropic", "gemini", "deep learning",
+                   "gpt", "claude", "robot", "generative"]
+    text = text.lower()
+    return any(kw in text for kw in ai_keywords)
+
+
+def run_benchmark(count: int, repeat: int = 3) -> Dict[str, float]:
+    from ranker import synthetic_headlines
+    texts = synthetic_headlines(count)
+
+    def best(func) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for text in texts:
+                func(text)
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000
+
+    def legacy_all(text: str) -> List[str]:
+        text = text.lower()
+        return [label for label, keywords in TOPIC_KEYWORDS.items()
+                if any(kw.rstrip("*") in text for kw in keywords)]
+
+    legacy_ms = best(legacy_pick)
+    classifier_ms = best(pick_topic)
+    all_labels_legacy_ms = best(legacy_all)
+    all_labels_ms = best(classify)
+    filter_legacy_ms = best(legacy_is_ai)
+    filter_ms = best(lambda text: TOPICS.matches(text, "ai"))
+    return {
+        "texts": count,
+        "legacy_filter_ms": round(filter_legacy_ms, 2),
+        "classifier_filter_ms": round(filter_ms, 2),
+        "legacy_first_ms": round(legacy_ms, 2),
+        "classifier_first_ms": round(classifier_ms, 2),
+        "legacy_all_labels_ms": round(all_labels_legacy_ms, 2),
+        "classifier_all_labels_ms": round(all_labels_ms, 2),
+        "speedup_all_labels": round(all_labels_legacy_ms / max(all_labels_ms, 1e-6), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the topic classifier")
+    parser.add_argument("--bench", type=int, default=20000, help="number of synthetic headlines")
+    args = parser.parse_args()
+
+    for sample in ["He said the claim was fair", "AI agents automate workflows",
+                   "Nieuwe zoekmachine voor bedrijven"]:
+        print(f"{sample!r}: legacy={legacy_pick(sample)} classifier={sorted(classify(sample))}")
+    print(run_benchmark(args.bench))
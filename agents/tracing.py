@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+NovaClaw AI - Run Tracing
+=========================
+Span tree for one agent run: the run span, a span per pipeline stage and
+a span per feed fetch, Claude call, image check and database request.
+Each span records start/end time, status and attributes.
+
+Spans are exported to agent_logs (one row per span, linked through
+parent_log_id and sharing a trace_id) or, in dry-run mode or with
+TRACE_FILE set, to a JSONL file with one OTLP-style span per line.
+Instrumented code calls `span(...)`, which is a no-op outside a run.
+
+Critical path of a trace file:
+
+    python agents/tracing.py agents/.cache/traces/<run>.jsonl
+"""
+
+import os
+import json
+import time
+import uuid
+import argparse
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Any
+from dataclasses import dataclass, field
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+TRACE_FILE = os.environ.get("TRACE_FILE")
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "traces")
+
+
+def default_trace_file(name: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return os.path.join(TRACE_DIR, f"{name}-{stamp}.jsonl")
+
+
+# ============================================
+# SPANS
+# ============================================
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    parent_id: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    ended_at: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "success"
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> int:
+        return int(((self.ended_at or time.time()) - self.started_at) * 1000)
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def fail(self, error: str):
+        self.status = "failed"
+        self.error = error
+
+
+_tracer: ContextVar[Optional["Tracer"]] = ContextVar("tracer", default=None)
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """Child span of the current span; yields None when no run is traced."""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield None
+        return
+    parent = _current.get()
+    current = Span(name, tracer.trace_id, parent_id=parent.span_id if parent else tracer.parent_id,
+                   attributes=attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:  # Incl. cancellation at a stage deadline
+        current.fail(str(e) or type(e).__name__)
+        raise
+    finally:
+        _current.reset(token)
+        current.ended_at = time.time()
+        tracer.export(current)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def span_row(s: Span, agent_type: str) -> Dict[str, Any]:
+    """agent_logs row for a finished span.
+
+    Token and cost attributes stay in `input` with the other attributes,
+    never in tokens_used/cost_usd: the run's complete row carries the
+    totals, so SUM() over those columns counts every call once.
+    """
+    return {
+        "id": s.span_id,
+        "parent_log_id": s.parent_id,
+        "trace_id": s.trace_id,
+        "agent_type": agent_type,
+        "action": s.name[:100],
+        "status": s.status,
+        "input": s.attributes,
+        "output": {},
+        "error": s.error,
+        "duration_ms": s.duration_ms,
+        "started_at": _iso(s.started_at),
+        "ended_at": _iso(s.ended_at or time.time()),
+    }
+
+
+def otlp_span(s: Span) -> Dict[str, Any]:
+    """OTLP/JSON-style span (hex trace and span IDs, nanosecond timestamps)."""
+    def attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": value if isinstance(value, str) else json.dumps(value)}}
+
+    return {
+        "traceId": uuid.UUID(s.trace_id).hex,
+        "spanId": uuid.UUID(s.span_id).hex[:16],
+        "parentSpanId": uuid.UUID(s.parent_id).hex[:16] if s.parent_id else "",
+        "name": s.name,
+        "kind": "SPAN_KIND_INTERNAL",
+        "startTimeUnixNano": str(int(s.started_at * 1e9)),
+        "endTimeUnixNano": str(int((s.ended_at or time.time()) * 1e9)),
+        "attributes": [attribute(k, v) for k, v in s.attributes.items() if v is not None],
+        "status": {"code": "STATUS_CODE_ERROR", "message": s.error or ""} if s.status == "failed"
+                  else {"code": "STATUS_CODE_OK"},
+    }
+
+
+# ============================================
+# TRACER
+# ============================================
+
+class Tracer:
+    """Traces one run; use as `async with` around the run body.
+
+    With a `trace_file`, spans are appended there as JSONL; otherwise each
+    span becomes an agent_logs row queued on `logs` (a LogSink). `parent_id`
+    hangs the run span under an existing row, e.g. the run's start log.
+    """
+
+    def __init__(self, name: str, agent_type: str, logs: Any = None,
+                 trace_file: Optional[str] = None, parent_id: Optional[str] = None,
+                 **attributes: Any):
+        self.name = name
+        self.agent_type = agent_type
+        self.logs = logs
+        self.trace_file = trace_file
+        self.trace_id = str(uuid.uuid4())
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.spans = 0
+        self._file = None
+        self._scope = None
+
+    def export(self, s: Span):
+        self.spans += 1
+        if self._file is not None:
+            self._file.write(json.dumps(otlp_span(s)) + "\n")
+        elif self.logs is not None:
+            self.logs.log(span_row(s, self.agent_type))
+
+    async def __aenter__(self) -> "Tracer":
+        if self.trace_file:
+            os.makedirs(os.path.dirname(os.path.abspath(self.trace_file)), exist_ok=True)
+            self._file = open(self.trace_file, "a", encoding="utf-8")
+        self._token = _tracer.set(self)
+        self._scope = span(self.name, **self.attributes)
+        self.root = self._scope.__enter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        try:
+            self._scope.__exit__(*exc_info)
+        finally:
+            _tracer.reset(self._token)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                print(f"  [trace] {self.spans} spans written to {self.trace_file}")
+
+
+# ============================================
+# CRITICAL PATH
+# ============================================
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """From the root, repeatedly follow the child that finished last."""
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    ids = {s["spanId"] for s in spans}
+    for s in spans:
+        children.setdefault(s["parentSpanId"], []).append(s)
+    roots = [s for s in spans if s["parentSpanId"] not in ids]
+    if not roots:
+        return []
+    path = [max(roots, key=lambda s: int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"]))]
+    while children.get(path[-1]["spanId"]):
+        path.append(max(children[path[-1]["spanId"]], key=lambda s: int(s["endTimeUnixNano"])))
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the critical path of a trace file")
+    parser.add_argument("trace", help="JSONL trace written with TRACE_FILE or in dry-run mode")
+    args = parser.parse_args()
+
+    spans = load_trace(args.trace)
+    path = critical_path(spans)
+    origin = int(path[0]["startTimeUnixNano"]) if path else 0
+    for depth, s in enumerate(path):
+        start_ms = (int(s["startTimeUnixNano"]) - origin) / 1e6
+        duration_ms = (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6
+        print(f"{'  ' * depth}{s['name']:<30} +{start_ms:8.0f}ms {duration_ms:8.0f}ms")
+    print(f"{len(spans)} spans")
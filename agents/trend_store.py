@@ -0,0 +1,96 @@
+"""
+NovaClaw AI - Trend Store
+=========================
+Persists scored trends from both agents in one request: rows are keyed
+by a SHA-256 of the normalized URL and sent to the `upsert_trends`
+database function (see supabase/schema.sql), which inserts new trends,
+refreshes changed ones and skips exact duplicates.
+
+Trends Claude never scored (outside the local top-K, or missing after
+the retry rounds) are stored with a NULL score, and the function keeps
+the highest score a trend ever got: two agents scoring the same URL
+with different prompts never lower each other's score to 0.
+"""
+
+import hashlib
+from typing import Optional, Dict, List, Any, Iterable
+from dataclasses import dataclass
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that never change which article a URL points to
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src", "cmpid"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a trend URL: https, lowercase host without www, no
+    fragment, no tracking parameters, sorted query, no trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS)
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def trend_key(trend: Any) -> str:
+    """Stable upsert key; trends without a URL fall back to source + title."""
+    basis = normalize_url(trend.url) if trend.url else f"{trend.source}:{trend.title.strip().lower()}"
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+
+def _rank(score: Optional[float]) -> float:
+    return -1.0 if score is None else score
+
+
+def trend_rows(trends: Iterable[Any]) -> List[Dict[str, Any]]:
+    """One row per key (highest score wins when a feed repeats a story)."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for trend in trends:
+        key = trend_key(trend)
+        score = round(float(trend.relevance_score), 2) if getattr(trend, "scored", True) else None
+        if key in rows and _rank(rows[key]["relevance_score"]) >= _rank(score):
+            continue
+        rows[key] = {
+            "url_hash": key,
+            "source": trend.source[:50],
+            "category": trend.category,
+            "title": trend.title[:300],
+            "url": trend.url,
+            "summary": trend.summary,
+            "relevance_score": score,
+        }
+    return list(rows.values())
+
+
+@dataclass
+class UpsertReport:
+    sent: int = 0
+    inserted: int = 0
+    updated: int = 0
+    error: Optional[str] = None
+
+    @property
+    def unchanged(self) -> int:
+        return max(self.sent - self.inserted - self.updated, 0)
+
+    def summary(self) -> str:
+        if self.error:
+            return f"failed ({self.error[:120]})"
+        return f"{self.inserted} new, {self.updated} updated, {self.unchanged} unchanged"
+
+
+async def upsert_trends(db: Any, trends: Iterable[Any]) -> UpsertReport:
+    """Write all trends with a single upsert_trends RPC call."""
+    rows = trend_rows(trends)
+    report = UpsertReport(sent=len(rows))
+    if not rows:
+        return report
+    try:
+        counts = await db.upsert_trends(rows)
+        report.inserted = counts["inserted"]
+        report.updated = counts["updated"]
+    except Exception as e:
+        report.error = str(e) or type(e).__name__
+    return report
@@ -0,0 +1,190 @@
+"""
+NovaClaw AI - Token & Cost Accounting
+=====================================
+Every billed Claude response is recorded with its input, output and
+prompt-cache tokens, latency and the pipeline stage it ran in:
+- calls roll up per stage (score, generate, critic, review, fact_check, ...)
+  and per run
+- cost comes from a price table in USD per million tokens, overridable
+  with CLAUDE_PRICES='{"claude-haiku-4-5": {"input": 1.0, "output": 5.0}}';
+  Message Batches are billed at BATCH_DISCOUNT
+- CLAUDE_TOKEN_BUDGET caps the tokens one run may spend (0 = no cap)
+"""
+
+import os
+import re
+import json
+from typing import Optional, Dict, List, Any
+from dataclasses import dataclass, asdict
+
+from pipeline import current_stage
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# USD per million tokens; cache_write is the 5-minute prompt cache rate
+PRICE_TABLE: Dict[str, Dict[str, float]] = {
+    "claude-haiku-4-5": {"input": 1.00, "output": 5.00, "cache_write": 1.25, "cache_read": 0.10},
+    "claude-sonnet-4-5": {"input": 3.00, "output": 15.00, "cache_write": 3.75, "cache_read": 0.30},
+    "claude-opus-4-1": {"input": 15.00, "output": 75.00, "cache_write": 18.75, "cache_read": 1.50},
+}
+BATCH_DISCOUNT = 0.5
+
+CLAUDE_TOKEN_BUDGET = int(os.environ.get("CLAUDE_TOKEN_BUDGET", "0"))
+
+
+def load_prices() -> Dict[str, Dict[str, float]]:
+    """PRICE_TABLE with per-model overrides from CLAUDE_PRICES (JSON)."""
+    prices = {model: dict(rates) for model, rates in PRICE_TABLE.items()}
+    raw = os.environ.get("CLAUDE_PRICES")
+    if raw:
+        try:
+            for model, rates in json.loads(raw).items():
+                prices.setdefault(model, {}).update({k: float(v) for k, v in rates.items()})
+        except (ValueError, AttributeError) as e:
+            print(f"  [warn] Ignoring invalid CLAUDE_PRICES: {e}")
+    return prices
+
+
+# ============================================
+# DATA CLASSES
+# ============================================
+
+@dataclass
+class CallUsage:
+    model: str
+    stage: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    duration_ms: int = 0
+    batch: bool = False
+    cost_usd: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return (self.input_tokens + self.output_tokens
+                + self.cache_read_input_tokens + self.cache_creation_input_tokens)
+
+
+@dataclass
+class UsageTotals:
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    duration_ms: int = 0
+    max_ms: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return (self.input_tokens + self.output_tokens
+                + self.cache_read_input_tokens + self.cache_creation_input_tokens)
+
+    def add(self, call: CallUsage):
+        self.calls += 1
+        self.input_tokens += call.input_tokens
+        self.output_tokens += call.output_tokens
+        self.cache_read_input_tokens += call.cache_read_input_tokens
+        self.cache_creation_input_tokens += call.cache_creation_input_tokens
+        self.duration_ms += call.duration_ms
+        self.max_ms = max(self.max_ms, call.duration_ms)
+        self.cost_usd += call.cost_usd
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["cost_usd"] = round(self.cost_usd, 6)
+        data["total_tokens"] = self.total_tokens
+        return data
+
+
+# ============================================
+# LEDGER
+# ============================================
+
+class UsageLedger:
+    """Per-call usage records with stage and run roll-ups for one run."""
+
+    def __init__(self, prices: Optional[Dict[str, Dict[str, float]]] = None,
+                 token_budget: int = CLAUDE_TOKEN_BUDGET):
+        self.prices = prices if prices is not None else load_prices()
+        self.token_budget = token_budget
+        self.calls: List[CallUsage] = []
+        self.totals = UsageTotals()
+        self.stages: Dict[str, UsageTotals] = {}
+        self.refused = 0  # Calls refused by ClaudeClient once the budget was spent
+        self._unpriced: set = set()
+
+    def rates(self, model: str) -> Optional[Dict[str, float]]:
+        """Prices for `model`; dated IDs (claude-haiku-4-5-20251001) match their alias."""
+        if model in self.prices:
+            return self.prices[model]
+        alias = re.sub(r"-\d{8}$", "", model)
+        return self.prices.get(alias)
+
+    def cost(self, call: CallUsage) -> float:
+        rates = self.rates(call.model)
+        if rates is None:
+            if call.model not in self._unpriced:
+                self._unpriced.add(call.model)
+                print(f"  [warn] No price for model {call.model}; cost counted as 0")
+            return 0.0
+        input_rate = rates.get("input", 0.0)
+        cost = (call.input_tokens * input_rate
+                + call.output_tokens * rates.get("output", 0.0)
+                + call.cache_read_input_tokens * rates.get("cache_read", input_rate)
+                + call.cache_creation_input_tokens * rates.get("cache_write", input_rate)) / 1e6
+        return cost * BATCH_DISCOUNT if call.batch else cost
+
+    def record(self, model: str, usage: Dict[str, Any], duration_ms: int = 0,
+               batch: bool = False, stage: Optional[str] = None) -> CallUsage:
+        call = CallUsage(
+            model=model or "unknown",
+            stage=stage or current_stage.get() or "other",
+            input_tokens=int(usage.get("input_tokens") or 0),
+            output_tokens=int(usage.get("output_tokens") or 0),
+            cache_read_input_tokens=int(usage.get("cache_read_input_tokens") or 0),
+            cache_creation_input_tokens=int(usage.get("cache_creation_input_tokens") or 0),
+            duration_ms=duration_ms,
+            batch=batch,
+        )
+        call.cost_usd = self.cost(call)
+        self.calls.append(call)
+        self.totals.add(call)
+        self.stages.setdefault(call.stage, UsageTotals()).add(call)
+        return call
+
+    @property
+    def tokens_used(self) -> int:
+        return self.totals.total_tokens
+
+    @property
+    def cost_usd(self) -> float:
+        return round(self.totals.cost_usd, 6)
+
+    def over_budget(self) -> Optional[str]:
+        """Reason to refuse a new call, or None while the run is within budget."""
+        if self.token_budget and self.tokens_used >= self.token_budget:
+            return f"token budget exhausted: {self.tokens_used}/{self.token_budget} tokens used"
+        return None
+
+    def summary(self) -> List[str]:
+        lines = []
+        for name, totals in sorted(self.stages.items(), key=lambda item: -item[1].cost_usd):
+            lines.append(f"{name}: {totals.calls} calls, {totals.total_tokens} tokens, "
+                         f"${totals.cost_usd:.4f}, max {totals.max_ms}ms")
+        if self.refused:
+            lines.append(f"budget: {self.refused} calls refused at {self.token_budget} tokens")
+        return lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.totals.to_dict(),
+            "token_budget": self.token_budget or None,
+            "refused": self.refused,
+            "stages": {name: totals.to_dict() for name, totals in self.stages.items()},
+        }
@@ -24,10 +24,11 @@ export async function GET(request: NextRequest) {
   try {
     const supabase = getSupabaseAdmin();
 
-    // Get latest agent logs
+    // Get latest agent logs (top-level rows; trace spans hang off them)
     const { data: logsData, error: logsError } = await supabase
       .from("agent_logs")
       .select("*")
+      .is("parent_log_id", null)
       .order("created_at", { ascending: false })
       .limit(10);
 
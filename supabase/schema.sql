@@ -68,6 +68,26 @@ CREATE INDEX idx_content_platform ON content_calendar(platform);
 CREATE INDEX idx_content_scheduled ON content_calendar(scheduled_for);
 CREATE INDEX idx_content_created ON content_calendar(created_at DESC);
 
+-- Blog slugs live in performance->>'slug'; one post per slug, and slug
+-- lookups (agents/database.py) are index scans instead of text searches.
+-- Existing databases can hold duplicate slugs, which would make the index
+-- fail: the oldest post keeps its slug and every later duplicate gets the
+-- start of its id appended (a no-op once slugs are unique).
+UPDATE content_calendar c
+SET performance = jsonb_set(
+        c.performance, '{slug}',
+        to_jsonb(left(c.performance->>'slug', 71) || '-' || left(c.id::text, 8)))
+FROM (
+    SELECT id, ROW_NUMBER() OVER (
+               PARTITION BY performance->>'slug' ORDER BY created_at, id) AS duplicate_rank
+    FROM content_calendar
+    WHERE platform = 'blog' AND performance->>'slug' IS NOT NULL
+) ranked
+WHERE c.id = ranked.id AND ranked.duplicate_rank > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_content_blog_slug
+    ON content_calendar ((performance->>'slug')) WHERE platform = 'blog';
+
 -- ============================================
 -- AGENT LOGS TABLE
 -- Comprehensive logging for all agent activity
@@ -86,14 +106,24 @@ CREATE TABLE IF NOT EXISTS agent_logs (
     tokens_used INTEGER,
     cost_usd DECIMAL(10,6),
     parent_log_id UUID REFERENCES agent_logs(id),
+    -- Run tracing (agents/tracing.py): span rows share the run's trace_id
+    trace_id UUID,
+    started_at TIMESTAMPTZ,
+    ended_at TIMESTAMPTZ,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Trace columns (ADD COLUMN for databases created before tracing existed)
+ALTER TABLE agent_logs ADD COLUMN IF NOT EXISTS trace_id UUID;
+ALTER TABLE agent_logs ADD COLUMN IF NOT EXISTS started_at TIMESTAMPTZ;
+ALTER TABLE agent_logs ADD COLUMN IF NOT EXISTS ended_at TIMESTAMPTZ;
+
 -- Indexes for log queries
 CREATE INDEX idx_logs_agent_type ON agent_logs(agent_type);
 CREATE INDEX idx_logs_status ON agent_logs(status);
 CREATE INDEX idx_logs_created ON agent_logs(created_at DESC);
 CREATE INDEX idx_logs_parent ON agent_logs(parent_log_id);
+CREATE INDEX IF NOT EXISTS idx_logs_trace ON agent_logs(trace_id);
 
 -- ============================================
 -- TRENDS TABLE
@@ -110,13 +140,19 @@ CREATE TABLE IF NOT EXISTS trends (
     used_for_content BOOLEAN DEFAULT FALSE,
     content_id UUID REFERENCES content_calendar(id),
     scraped_at TIMESTAMPTZ DEFAULT NOW(),
-    expires_at TIMESTAMPTZ DEFAULT NOW() + INTERVAL '7 days'
+    expires_at TIMESTAMPTZ DEFAULT NOW() + INTERVAL '7 days',
+    -- SHA-256 of the normalized URL (agents/trend_store.py); upsert key
+    url_hash CHAR(64)
 );
 
 CREATE INDEX idx_trends_source ON trends(source);
 CREATE INDEX idx_trends_relevance ON trends(relevance_score DESC);
 CREATE INDEX idx_trends_unused ON trends(used_for_content) WHERE used_for_content = FALSE;
 
+-- Upsert key (ADD COLUMN for databases created before url_hash existed)
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS url_hash CHAR(64);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_trends_url_hash ON trends(url_hash);
+
 -- ============================================
 -- DISTRIBUTION QUEUE TABLE
 -- Queue for content distribution
@@ -226,6 +262,37 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Bulk upsert of scored trends in one round trip (called via RPC).
+-- Rows whose fields did not change are skipped; returns the counts.
+-- relevance_score keeps the highest score seen: a NULL (not scored this
+-- run) or lower score from another agent never overwrites a real one.
+CREATE OR REPLACE FUNCTION upsert_trends(trend_rows JSONB)
+RETURNS TABLE (inserted INTEGER, updated INTEGER) AS $$
+BEGIN
+    RETURN QUERY
+    WITH upserted AS (
+        INSERT INTO trends (url_hash, source, category, title, url, summary, relevance_score)
+        SELECT r.url_hash, r.source, r.category, r.title, r.url, r.summary, r.relevance_score
+        FROM jsonb_to_recordset(trend_rows) AS r(
+            url_hash CHAR(64), source VARCHAR(50), category VARCHAR(100), title VARCHAR(300),
+            url TEXT, summary TEXT, relevance_score DECIMAL(3,2))
+        ON CONFLICT (url_hash) DO UPDATE SET
+            title = EXCLUDED.title,
+            summary = EXCLUDED.summary,
+            relevance_score = GREATEST(trends.relevance_score, EXCLUDED.relevance_score),
+            expires_at = NOW() + INTERVAL '7 days'
+        WHERE trends.relevance_score IS DISTINCT FROM
+                  GREATEST(trends.relevance_score, EXCLUDED.relevance_score)
+           OR trends.title IS DISTINCT FROM EXCLUDED.title
+           OR trends.summary IS DISTINCT FROM EXCLUDED.summary
+        RETURNING (xmax = 0) AS was_inserted
+    )
+    SELECT (COUNT(*) FILTER (WHERE was_inserted))::INTEGER,
+           (COUNT(*) FILTER (WHERE NOT was_inserted))::INTEGER
+    FROM upserted;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Trigger to auto-score leads
 CREATE OR REPLACE FUNCTION auto_score_lead()
 RETURNS TRIGGER AS $$